@@ -0,0 +1,169 @@
+"""Batched amodal box expansion over occluded and partially visible tracks."""
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+try:
+    import torch
+except ImportError:  # pragma: no cover - optional dependency in scaffolding stage
+    torch = None
+
+from ..trackers.association import candidate_pairs, paired_overlap
+from .expander_head import ExpanderHeadConfig, build_amodal_head
+from .roi_cache import ROICache
+
+
+def _is_placeholder(value: Optional[str]) -> bool:
+    return value is not None and "{{PLACEHOLDER" in value
+
+
+@dataclass
+class AmodalStageConfig:
+    """Configuration for the per-frame amodal expansion stage.
+
+    Tracks are expanded when they are coasting (``time_since_update > 0``) or overlap
+    another track by at least ``overlap_thresh`` IoU. At most ``max_tracks`` are
+    expanded per frame, most recently seen first, which bounds the per-frame cost.
+    Deltas are relative to box width/height.
+    """
+
+    enabled: bool = False
+    weights: Optional[str] = None
+    device: str = "cpu"
+    torchscript: bool = False
+    max_tracks: int = 256
+    overlap_thresh: float = 0.1
+    cache_items: int = 4096
+    cache_bytes: Optional[int] = 256 * 1024 * 1024
+    ttl_frames: Optional[int] = 90
+    head_config: Optional[Dict[str, Any]] = None
+
+
+class AmodalExpansionStage:
+    """Run :class:`AmodalExpanderHead` once per frame over every target track.
+
+    Visible tracks whose ``feature`` matches the head's input width refresh their ROI
+    features in a :class:`ROICache`; targets then fetch theirs with one ``get_many``
+    and go through a single batched ``inference_mode`` forward pass. Predicted deltas
+    are written into ``tracks.box`` in place.
+    """
+
+    def __init__(self, config: AmodalStageConfig, head: Any = None) -> None:
+        if torch is None:
+            raise ImportError("PyTorch is required for the amodal expansion stage.")
+        self.config = config
+        device = config.device
+        if device.startswith("cuda") and not torch.cuda.is_available():
+            device = "cpu"
+        self.device = torch.device(device)
+        self.head = head if head is not None else self._load_head()
+        self.head.eval().to(self.device)
+        head_config = getattr(self.head, "config", None)
+        if not isinstance(head_config, ExpanderHeadConfig):
+            head_config = ExpanderHeadConfig(**(config.head_config or {}))
+        self.input_dim = head_config.input_dim
+        self.model = self._compile(self.head) if config.torchscript else self.head
+        self.cache = ROICache(max_items=config.cache_items, max_bytes=config.cache_bytes, ttl_frames=config.ttl_frames)
+        self._frame = 0
+
+    def _load_head(self) -> Any:
+        """Build the head and load ``weights``.
+
+        Checkpoints written by :func:`~amodal_cctv.amodal.train_expander.train_expander`
+        carry the ``head_config`` they were trained with (``input_dim`` is the ROI
+        feature width), which overrides ``config.head_config``.
+        """
+        weights = self.config.weights
+        if _is_placeholder(weights):
+            raise ValueError(
+                "Amodal head weights path unresolved ({{PLACEHOLDER:AMODAL_HEAD_WEIGHTS_PATH}}). "
+                "Update placeholders.md with a valid checkpoint path."
+            )
+        if not weights:
+            warnings.warn(
+                "Amodal expansion is enabled without weights; boxes are adjusted by a randomly "
+                "initialised head. Set amodal_head.weights to a trained checkpoint.",
+                RuntimeWarning,
+                stacklevel=3,
+            )
+            return build_amodal_head(self.config.head_config)
+        resolved = Path(weights).expanduser()
+        if not resolved.exists():
+            raise FileNotFoundError(f"Amodal head weights not found at {resolved}. See placeholders.md.")
+        state = torch.load(resolved, map_location="cpu")
+        head_config = dict(self.config.head_config or {})
+        if isinstance(state, dict) and "model" in state:
+            head_config.update(state.get("head_config") or {})
+            state = state["model"]
+        head = build_amodal_head(head_config)
+        head.load_state_dict(state)
+        return head
+
+    @staticmethod
+    def _compile(head: Any) -> Any:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            return torch.jit.script(head)
+
+    def targets(self, tracks: Any) -> np.ndarray:
+        """Rows of ``tracks`` to expand: coasting tracks and tracks overlapping a neighbour.
+
+        Only grid-neighbouring pairs are scored, so the cost follows local crowding
+        rather than the square of the track count.
+        """
+        boxes = np.asarray(tracks.box, dtype=float)
+        coasting = np.asarray(tracks.time_since_update) > 0
+        if self.config.overlap_thresh <= 0:
+            crowded = np.full(boxes.shape[0], boxes.shape[0] > 1)
+        else:
+            first, second = candidate_pairs(boxes, boxes)
+            distinct = first != second
+            first, second = first[distinct], second[distinct]
+            overlap = np.zeros(boxes.shape[0])
+            np.maximum.at(overlap, first, paired_overlap(boxes[first], boxes[second]))
+            crowded = overlap >= self.config.overlap_thresh
+        rows = np.flatnonzero(coasting | crowded)
+        order = np.argsort(np.asarray(tracks.time_since_update)[rows], kind="stable")
+        return rows[order[: self.config.max_tracks]]
+
+    def _refresh_cache(self, tracks: Any) -> None:
+        if tracks.feature is None or tracks.feature.shape[1] != self.input_dim:
+            return
+        fresh = np.flatnonzero((np.asarray(tracks.time_since_update) == 0) & np.asarray(tracks.has_feature, dtype=bool))
+        if fresh.size:
+            features = torch.from_numpy(np.ascontiguousarray(tracks.feature[fresh])).float()
+            self.cache.put_many(tracks.track_id[fresh].tolist(), features)
+
+    def expand(self, tracks: Any) -> np.ndarray:
+        """Expand target tracks' boxes in place; return the rows that were expanded."""
+        self._frame += 1
+        self.cache.advance(self._frame)
+        self._refresh_cache(tracks)
+        if len(tracks) == 0:
+            return np.empty((0,), dtype=np.int64)
+        rows = self.targets(tracks)
+        if rows.size == 0:
+            return rows
+        features, found = self.cache.get_many(tracks.track_id[rows].tolist())
+        if features is None:
+            return np.empty((0,), dtype=np.int64)
+        rows = rows[found.numpy()]
+        with torch.inference_mode():
+            deltas = self.model(features[found].to(self.device)).float().cpu().numpy()
+        boxes = tracks.box
+        extent = np.tile(np.abs(boxes[rows, 2:] - boxes[rows, :2]), 2)
+        boxes[rows] += deltas * extent
+        return rows
+
+
+def build_amodal_stage(config_dict: Dict[str, Any] | None = None, head: Any = None) -> Optional[AmodalExpansionStage]:
+    """Build the stage from an ``amodal_head`` config section; ``None`` when disabled."""
+    config = AmodalStageConfig(**(config_dict or {}))
+    if not config.enabled:
+        return None
+    return AmodalExpansionStage(config, head=head)
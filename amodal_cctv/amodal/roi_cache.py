@@ -1,24 +1,133 @@
 """Region-of-interest caching utilities."""
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import torch
 
 
+def tensor_nbytes(tensor: torch.Tensor) -> int:
+    return tensor.element_size() * tensor.nelement()
+
+
 @dataclass
 class ROICache:
+    """Per-track ROI feature cache with LRU order, frame TTL and a byte budget.
+
+    ``get`` refreshes recency; inserts evict least-recently-used entries until both
+    ``max_items`` and ``max_bytes`` hold. Entries last written more than
+    ``ttl_frames`` frames before the current frame (see :meth:`advance`) expire.
+    Tensors are detached and copied to CPU so cached rows never pin a larger batch.
+    """
+
     max_items: int = 128
-    storage: Dict[int, torch.Tensor] = field(default_factory=dict)
+    max_bytes: Optional[int] = 256 * 1024 * 1024
+    ttl_frames: Optional[int] = None
+    storage: "OrderedDict[int, torch.Tensor]" = field(default_factory=OrderedDict)
+    current_frame: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    _written: Dict[int, int] = field(default_factory=dict, repr=False)
+    _nbytes: int = field(default=0, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.storage)
+
+    def __contains__(self, track_id: int) -> bool:
+        return track_id in self.storage and not self._expired(track_id)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def _expired(self, track_id: int) -> bool:
+        return self.ttl_frames is not None and self.current_frame - self._written[track_id] > self.ttl_frames
 
-    def put(self, track_id: int, tensor: torch.Tensor) -> None:
-        if len(self.storage) >= self.max_items:
-            self.storage.pop(next(iter(self.storage)))
-        self.storage[track_id] = tensor.detach().cpu()
+    def _remove(self, track_id: int) -> None:
+        self._nbytes -= tensor_nbytes(self.storage.pop(track_id))
+        del self._written[track_id]
+
+    def advance(self, frame: int) -> int:
+        """Set the current frame and drop expired entries; return how many expired."""
+        self.current_frame = frame
+        if self.ttl_frames is None:
+            return 0
+        stale = [track_id for track_id in self.storage if self._expired(track_id)]
+        for track_id in stale:
+            self._remove(track_id)
+        self.expirations += len(stale)
+        return len(stale)
+
+    def _insert(self, track_id: int, tensor: torch.Tensor, frame: Optional[int]) -> None:
+        if track_id in self.storage:
+            self._remove(track_id)
+        size = tensor_nbytes(tensor)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.evictions += 1
+            return
+        while self.storage and (
+            len(self.storage) >= self.max_items or (self.max_bytes is not None and self._nbytes + size > self.max_bytes)
+        ):
+            self._remove(next(iter(self.storage)))
+            self.evictions += 1
+        self.storage[track_id] = tensor
+        self._written[track_id] = self.current_frame if frame is None else frame
+        self._nbytes += size
+
+    def put(self, track_id: int, tensor: torch.Tensor, frame: Optional[int] = None) -> None:
+        self._insert(track_id, tensor.detach().to("cpu", copy=True), frame)
+
+    def put_many(self, track_ids: Sequence[int], tensors: torch.Tensor, frame: Optional[int] = None) -> None:
+        """Cache row ``i`` of a ``(K, ...)`` batch under ``track_ids[i]`` with one device transfer."""
+        rows = tensors.detach().to("cpu")
+        for track_id, row in zip(track_ids, rows):
+            self._insert(int(track_id), row.clone(), frame)
 
     def get(self, track_id: int) -> torch.Tensor | None:
-        return self.storage.get(track_id)
+        tensor = self.storage.get(track_id)
+        if tensor is None or self._expired(track_id):
+            if tensor is not None:
+                self._remove(track_id)
+                self.expirations += 1
+            self.misses += 1
+            return None
+        self.storage.move_to_end(track_id)
+        self.hits += 1
+        return tensor
+
+    def get_many(self, track_ids: Sequence[int]) -> Tuple[Optional[torch.Tensor], torch.Tensor]:
+        """Stack cached features for ``track_ids`` into one contiguous ``(K, ...)`` tensor.
+
+        Returns ``(features, found)``; rows for missing tracks are zero and ``found`` is
+        a boolean mask. ``features`` is ``None`` when nothing was found.
+        """
+        cached = [self.get(int(track_id)) for track_id in track_ids]
+        found = torch.tensor([tensor is not None for tensor in cached], dtype=torch.bool)
+        present = [tensor for tensor in cached if tensor is not None]
+        if not present:
+            return None, found
+        out = torch.zeros((len(cached), *present[0].shape), dtype=present[0].dtype)
+        out[found] = torch.stack(present)
+        return out, found
 
     def keys(self) -> List[int]:
         return list(self.storage.keys())
+
+    def clear(self) -> None:
+        self.storage.clear()
+        self._written.clear()
+        self._nbytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "items": len(self.storage),
+            "bytes": self._nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -1,7 +1,34 @@
-"""Training loop placeholder for the amodal expander head."""
+"""Training loop for the amodal expander head over precomputed ROI feature shards.
+
+Training runs in two phases. :func:`dump_roi_shards` writes backbone ROI features
+(for example the ``features`` column of a :class:`~amodal_cctv.detectors.cache.DetectionCache`
+recorded with the detector's ``roi_features`` on) and their amodal-delta targets to
+fixed-size ``.npy`` shards once. :func:`train_expander` then fits
+:class:`AmodalExpanderHead` from memory-mapped shards, so the detector backbone never
+runs during head training.
+"""
 from __future__ import annotations
 
-from typing import Any, Dict
+import json
+import math
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import torch
+    from torch.utils.data import DataLoader, Dataset, Sampler
+except ImportError:  # pragma: no cover - optional dependency in scaffolding stage
+    torch = None
+    DataLoader = None
+    Dataset = object
+    Sampler = object
+
+from ..trackers.box_ops import iou_matrix
+from .expander_head import build_amodal_head
 
 
 def configure_optimizer(model: Any, lr: float = 1e-3, weight_decay: float = 1e-4) -> Dict[str, Any]:
@@ -13,9 +40,340 @@ def configure_optimizer(model: Any, lr: float = 1e-3, weight_decay: float = 1e-4
     }
 
 
-def schedule_config(total_steps: int = 20000) -> Dict[str, Any]:
+def schedule_config(total_steps: int = 20000, warmup_fraction: float = 0.1) -> Dict[str, Any]:
     return {
         "type": "cosine",
         "total_steps": total_steps,
-        "warmup_steps": int(0.1 * total_steps),
+        "warmup_steps": int(warmup_fraction * total_steps),
+    }
+
+
+def build_optimizer(model: Any, spec: Dict[str, Any]) -> Any:
+    """Instantiate the optimizer described by :func:`configure_optimizer`."""
+    optimizer = getattr(torch.optim, spec["optimizer"])
+    return optimizer(model.parameters(), lr=spec["lr"], weight_decay=spec["weight_decay"])
+
+
+class CosineWarmup:
+    """``LambdaLR`` multiplier: linear warmup, then cosine decay to ``min_ratio``.
+
+    A callable object rather than a closure so ``LambdaLR.state_dict`` can save it.
+    """
+
+    def __init__(self, schedule: Dict[str, Any], min_ratio: float = 0.0) -> None:
+        self.total_steps = int(schedule["total_steps"])
+        self.warmup_steps = int(schedule["warmup_steps"])
+        self.min_ratio = min_ratio
+
+    def __call__(self, step: int) -> float:
+        if step < self.warmup_steps:
+            return (step + 1) / self.warmup_steps
+        progress = min((step - self.warmup_steps) / max(self.total_steps - self.warmup_steps, 1), 1.0)
+        return self.min_ratio + (1.0 - self.min_ratio) * 0.5 * (1.0 + math.cos(math.pi * progress))
+
+
+def amodal_delta_targets(visible_boxes: np.ndarray, amodal_boxes: np.ndarray) -> np.ndarray:
+    """Deltas the expansion stage adds to a visible box, relative to its width/height.
+
+    Inverse of :meth:`AmodalExpansionStage.expand`: ``visible + delta * (w, h, w, h) == amodal``.
+    """
+    visible = np.asarray(visible_boxes, dtype=np.float64).reshape(-1, 4)
+    amodal = np.asarray(amodal_boxes, dtype=np.float64).reshape(-1, 4)
+    extent = np.maximum(np.tile(np.abs(visible[:, 2:] - visible[:, :2]), 2), 1e-6)
+    return ((amodal - visible) / extent).astype(np.float32)
+
+
+def roi_samples(
+    detections: Sequence[Dict[str, Any]],
+    ground_truth: Dict[str, np.ndarray],
+    iou_threshold: float = 0.5,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield ``(features, targets)`` per frame from cached detections and amodal ground truth.
+
+    ``ground_truth`` is a columnar table with ``image_id`` (the detection frame id),
+    amodal ``boxes`` and ``visible_boxes``. Each detection is assigned to the visible
+    ground-truth box it overlaps most, as in ROI-head training; detections below
+    ``iou_threshold`` are skipped. Targets are relative to the detection box. Frames
+    with boxes but no ``features`` raise: the detections were cached without ROI
+    features (enable ``roi_features`` on the detector).
+    """
+    image_ids = np.asarray(ground_truth["image_id"]).reshape(-1)
+    order = np.argsort(image_ids, kind="stable")
+    sorted_ids = image_ids[order]
+    amodal = np.asarray(ground_truth["boxes"], dtype=float).reshape(-1, 4)[order]
+    visible = np.asarray(ground_truth["visible_boxes"], dtype=float).reshape(-1, 4)[order]
+    for frame in detections:
+        if len(frame["boxes"]) == 0:
+            continue
+        features = frame.get("features")
+        if features is None:
+            raise ValueError(
+                f"Frame {frame['frame_id']} has detections but no ROI features; "
+                "re-run the detector with roi_features enabled before dumping shards."
+            )
+        lo = int(np.searchsorted(sorted_ids, frame["frame_id"], side="left"))
+        hi = int(np.searchsorted(sorted_ids, frame["frame_id"], side="right"))
+        if lo == hi:
+            continue
+        boxes = np.asarray(frame["boxes"], dtype=float).reshape(-1, 4)
+        overlap = iou_matrix(boxes, visible[lo:hi])
+        best = overlap.argmax(axis=1)
+        keep = overlap[np.arange(boxes.shape[0]), best] >= iou_threshold
+        if keep.any():
+            yield np.asarray(features)[keep], amodal_delta_targets(boxes[keep], amodal[lo:hi][best[keep]])
+
+
+def _save_npy(path: Path, array: np.ndarray) -> None:
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def dump_roi_shards(
+    samples: Iterable[Tuple[np.ndarray, np.ndarray]],
+    out_dir: str,
+    shard_size: int = 65536,
+    dtype: str = "float32",
+) -> Dict[str, Any]:
+    """Write ``(features, targets)`` batches into ``shard-NNNNN.{features,targets}.npy`` files.
+
+    Every shard except the last holds exactly ``shard_size`` rows; ``meta.json`` is
+    written last, so a directory with it is complete. Raises ``ValueError`` when
+    ``samples`` holds no rows, since there would be nothing to train on.
+    """
+    root = Path(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "meta.json").unlink(missing_ok=True)
+    pending: List[Tuple[np.ndarray, np.ndarray]] = []
+    buffered, counts, feature_dim = 0, [], None
+
+    def flush(rows: int) -> None:
+        nonlocal pending, buffered
+        features = np.concatenate([f for f, _ in pending]) if pending else np.zeros((0, feature_dim or 0), dtype)
+        targets = np.concatenate([t for _, t in pending]) if pending else np.zeros((0, 4), np.float32)
+        name = f"shard-{len(counts):05d}"
+        _save_npy(root / f"{name}.features.npy", np.ascontiguousarray(features[:rows], dtype=dtype))
+        _save_npy(root / f"{name}.targets.npy", np.ascontiguousarray(targets[:rows], dtype=np.float32))
+        counts.append(rows)
+        pending = [(features[rows:], targets[rows:])] if rows < features.shape[0] else []
+        buffered -= rows
+
+    for features, targets in samples:
+        features = np.asarray(features, dtype=dtype).reshape(len(targets), -1)
+        feature_dim = feature_dim or features.shape[1]
+        if features.shape[1] != feature_dim:
+            raise ValueError(f"ROI feature width changed from {feature_dim} to {features.shape[1]}")
+        pending.append((features, np.asarray(targets, dtype=np.float32).reshape(-1, 4)))
+        buffered += features.shape[0]
+        while buffered >= shard_size:
+            flush(shard_size)
+    if buffered:
+        flush(buffered)
+    if not counts:
+        raise ValueError(f"No ROI samples to write to {out_dir}; check the detections and ground truth overlap.")
+    meta = {"shards": counts, "rows": int(sum(counts)), "feature_dim": int(feature_dim or 0), "dtype": dtype}
+    (root / "meta.json").write_text(json.dumps(meta))
+    return meta
+
+
+class ROIShardDataset(Dataset):
+    """Memory-mapped view over ROI shards, indexed by arrays of global row ids.
+
+    ``dataset[rows]`` gathers one whole batch with a fancy index per shard, so a
+    :class:`DataLoader` worker returns ready-made batches. Pickles by path so each
+    worker reopens the maps instead of copying them.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = str(root)
+        meta_path = Path(root) / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No ROI shards at {root}; run dump_roi_shards first.")
+        self.meta = json.loads(meta_path.read_text())
+        self.offsets = np.concatenate([[0], np.cumsum(self.meta["shards"])]).astype(np.int64)
+        if self.offsets[-1] == 0:
+            raise ValueError(f"ROI shards at {root} hold no rows.")
+        self._open()
+
+    def _open(self) -> None:
+        names = [Path(self.root) / f"shard-{index:05d}" for index in range(len(self.meta["shards"]))]
+        self.features = [np.load(f"{name}.features.npy", mmap_mode="r") for name in names]
+        self.targets = [np.load(f"{name}.targets.npy", mmap_mode="r") for name in names]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"root": self.root, "meta": self.meta, "offsets": self.offsets}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    @property
+    def feature_dim(self) -> int:
+        return int(self.meta["feature_dim"])
+
+    def __getitem__(self, rows: Any) -> Tuple[Any, Any]:
+        rows = np.sort(np.atleast_1d(np.asarray(rows, dtype=np.int64)))
+        shard = np.searchsorted(self.offsets, rows, side="right") - 1
+        bounds = np.searchsorted(shard, np.arange(len(self.features) + 1))
+        features = np.empty((rows.shape[0], self.feature_dim), dtype=np.float32)
+        targets = np.empty((rows.shape[0], 4), dtype=np.float32)
+        for index in np.flatnonzero(np.diff(bounds)):
+            lo, hi = bounds[index], bounds[index + 1]
+            local = rows[lo:hi] - self.offsets[index]
+            features[lo:hi] = self.features[index][local]
+            targets[lo:hi] = self.targets[index][local]
+        return torch.from_numpy(features), torch.from_numpy(targets)
+
+
+class ShardBatchSampler(Sampler):
+    """Yield row-id batches; reshuffled per epoch from ``(seed, epoch)`` like ``DistributedSampler``.
+
+    ``start`` skips the first batches of the epoch, which is how training resumes
+    mid-epoch without replaying data.
+    """
+
+    def __init__(self, rows: int, batch_size: int, shuffle: bool = True, seed: int = 0, drop_last: bool = False) -> None:
+        self.rows = rows
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.epoch = 0
+        self.start = 0
+
+    def set_epoch(self, epoch: int, start: int = 0) -> None:
+        self.epoch = epoch
+        self.start = start
+
+    def __len__(self) -> int:
+        full, rest = divmod(self.rows, self.batch_size)
+        return full if self.drop_last or rest == 0 else full + 1
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        if self.shuffle:
+            order = np.random.default_rng((self.seed, self.epoch)).permutation(self.rows)
+        else:
+            order = np.arange(self.rows)
+        for batch in range(self.start, len(self)):
+            yield order[batch * self.batch_size : (batch + 1) * self.batch_size]
+
+
+@dataclass
+class ExpanderTrainConfig:
+    shard_dir: str = "outputs/roi_shards"
+    checkpoint_path: str = "outputs/amodal_head/checkpoint.pt"
+    batch_size: int = 4096
+    num_workers: int = 2
+    prefetch_factor: int = 4
+    epochs: int = 10
+    total_steps: Optional[int] = None
+    lr: float = 1e-3
+    weight_decay: float = 1e-4
+    warmup_fraction: float = 0.1
+    min_lr_ratio: float = 0.0
+    grad_clip: Optional[float] = 1.0
+    checkpoint_every: int = 500
+    resume: bool = True
+    device: str = "cpu"
+    seed: int = 0
+    head_config: Dict[str, Any] = field(default_factory=dict)
+
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """Atomically write a checkpoint.
+
+    :class:`~amodal_cctv.amodal.expansion.AmodalExpansionStage` loads ``state["model"]``
+    into a head built from ``state["head_config"]``.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    torch.save(state, tmp)
+    os.replace(tmp, target)
+
+
+def _loader(dataset: ROIShardDataset, sampler: ShardBatchSampler, config: ExpanderTrainConfig, device: Any) -> Any:
+    options: Dict[str, Any] = {"batch_size": None, "sampler": sampler, "num_workers": config.num_workers}
+    if config.num_workers > 0:
+        options["prefetch_factor"] = config.prefetch_factor
+    if device.type == "cuda":
+        options["pin_memory"] = True
+    return DataLoader(dataset, **options)
+
+
+def train_expander(config: ExpanderTrainConfig, head: Any = None) -> Dict[str, Any]:
+    """Train the expander head from ROI shards, resuming from ``checkpoint_path`` if present."""
+    if torch is None:
+        raise ImportError("PyTorch is required to train the amodal expander head.")
+    device = torch.device(config.device if not config.device.startswith("cuda") or torch.cuda.is_available() else "cpu")
+    torch.manual_seed(config.seed)
+    dataset = ROIShardDataset(config.shard_dir)
+    head_config = {"input_dim": dataset.feature_dim, **config.head_config}
+    head = (head if head is not None else build_amodal_head(head_config)).to(device)
+    optimizer = build_optimizer(head, configure_optimizer(head, config.lr, config.weight_decay))
+    sampler = ShardBatchSampler(len(dataset), config.batch_size, seed=config.seed, drop_last=len(dataset) > config.batch_size)
+    steps_per_epoch = max(len(sampler), 1)
+    total_steps = config.total_steps or config.epochs * steps_per_epoch
+    schedule = schedule_config(total_steps, config.warmup_fraction)
+    scheduler = torch.optim.lr_scheduler.LambdaLR(optimizer, CosineWarmup(schedule, config.min_lr_ratio))
+
+    step, resumed = 0, False
+    checkpoint = Path(config.checkpoint_path)
+    if config.resume and checkpoint.exists():
+        state = torch.load(checkpoint, map_location="cpu", weights_only=False)
+        head.load_state_dict(state["model"])
+        optimizer.load_state_dict(state["optimizer"])
+        scheduler.load_state_dict(state["scheduler"])
+        # The saved lambda carries the old horizon; keep the schedule for this run's total_steps.
+        scheduler.lr_lambdas = [CosineWarmup(schedule, config.min_lr_ratio)]
+        torch.set_rng_state(state["rng"])
+        step, resumed = int(state["step"]), True
+
+    def snapshot() -> Dict[str, Any]:
+        return {
+            "model": head.state_dict(),
+            "optimizer": optimizer.state_dict(),
+            "scheduler": scheduler.state_dict(),
+            "rng": torch.get_rng_state(),
+            "step": step,
+            "head_config": head_config,
+            "train_config": asdict(config),
+        }
+
+    head.train()
+    losses: List[float] = []
+    while step < total_steps:
+        sampler.set_epoch(step // steps_per_epoch, start=step % steps_per_epoch)
+        for features, targets in _loader(dataset, sampler, config, device):
+            features = features.to(device, non_blocking=True)
+            targets = targets.to(device, non_blocking=True)
+            loss, _ = head.loss(head(features), targets)
+            optimizer.zero_grad(set_to_none=True)
+            loss.backward()
+            if config.grad_clip:
+                torch.nn.utils.clip_grad_norm_(head.parameters(), config.grad_clip)
+            optimizer.step()
+            scheduler.step()
+            step += 1
+            losses.append(float(loss.detach()))
+            if step % config.checkpoint_every == 0:
+                save_checkpoint(config.checkpoint_path, snapshot())
+            if step >= total_steps:
+                break
+    save_checkpoint(config.checkpoint_path, snapshot())
+    return {
+        "steps": step,
+        "total_steps": total_steps,
+        "resumed": resumed,
+        "rows": len(dataset),
+        "loss": losses[-1] if losses else None,
+        "lr": scheduler.get_last_lr()[0],
+        "checkpoint": str(checkpoint),
     }
+
+
+def build_train_config(config_dict: Dict[str, Any] | None = None) -> ExpanderTrainConfig:
+    return ExpanderTrainConfig(**(config_dict or {}))
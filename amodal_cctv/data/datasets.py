@@ -6,6 +6,7 @@ from typing import Dict, Type
 from .tao_amodal import TAOAmodalDataset
 from .mot17 import MOT17Dataset
 from .detrac import UADETRACDataset
+from .synthetic_crowd import SyntheticCrowd
 from .toy_examples import ToyAmodalSequence
 
 
@@ -14,6 +15,7 @@ DATASET_REGISTRY: Dict[str, Type] = {
     "mot17": MOT17Dataset,
     "ua_detrac": UADETRACDataset,
     "toy": ToyAmodalSequence,
+    "synthetic_crowd": SyntheticCrowd,
 }
 
 
@@ -1,14 +1,93 @@
 """UA-DETRAC dataset adapter."""
 from __future__ import annotations
 
+import xml.etree.ElementTree as ET
 from dataclasses import dataclass
-from typing import Iterator
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .index import IndexBuilder, IndexedDataset
+
+DETRAC_CLASSES = ["car", "bus", "van", "others"]
+
+
+def _occluded_area(box: np.ndarray, regions: List[np.ndarray]) -> float:
+    """Area of ``box`` covered by occlusion regions (their union is approximated by a capped sum)."""
+    area = 0.0
+    for region in regions:
+        w = min(box[2], region[2]) - max(box[0], region[0])
+        h = min(box[3], region[3]) - max(box[1], region[1])
+        area += max(w, 0.0) * max(h, 0.0)
+    return area
+
+
+def _xyxy(element: ET.Element) -> np.ndarray:
+    left, top = float(element.get("left", 0)), float(element.get("top", 0))
+    return np.array([left, top, left + float(element.get("width", 0)), top + float(element.get("height", 0))])
 
 
 @dataclass
-class UADETRACDataset:
+class UADETRACDataset(IndexedDataset):
+    """UA-DETRAC layout: ``DETRAC-<Split>-Annotations-XML/<seq>.xml`` and ``Insight-MVT_Annotation_<Split>/<seq>/img%05d.jpg``.
+
+    ``visibility`` is ``1 - occluded fraction - truncation_ratio`` (clipped), where the
+    occluded fraction comes from the target's ``region_overlap`` boxes.
+    """
+
     root: str
     split: str = "train"
+    annotation_dir: Optional[str] = None
+    image_dir: Optional[str] = None
+    cache_dir: Optional[str] = None
+
+    index_name = "detrac"
+
+    def _annotation_dir(self) -> Path:
+        return Path(self.annotation_dir or Path(self.root) / f"DETRAC-{self.split.capitalize()}-Annotations-XML")
+
+    def _image_dir(self) -> Path:
+        return Path(self.image_dir or Path(self.root) / f"Insight-MVT_Annotation_{self.split.capitalize()}")
+
+    def _sources(self) -> List[Path]:
+        directory = self._annotation_dir()
+        if not directory.is_dir():
+            raise FileNotFoundError(f"UA-DETRAC annotations not found at {directory}")
+        return sorted(directory.glob("*.xml"))
+
+    def _options(self) -> Dict[str, Any]:
+        return {"images": str(self._image_dir().resolve())}
 
-    def sequences(self) -> Iterator[str]:
-        yield f"detrac-{self.split}-seq"
+    def _build(self, builder: IndexBuilder) -> Dict[str, Any]:
+        class_ids = {name: idx for idx, name in enumerate(DETRAC_CLASSES)}
+        for path in self._sources():
+            root = ET.parse(path).getroot()
+            name = root.get("name", path.stem)
+            frames = root.findall("frame")
+            numbers = np.array([int(frame.get("num")) for frame in frames], dtype=np.int64)
+            order = np.argsort(numbers, kind="stable")
+            paths = [str(self._image_dir() / name / f"img{number:05d}.jpg") for number in numbers[order]]
+            base = builder.add_sequence(name, numbers[order], paths)
+            rows: Dict[str, List[Any]] = {key: [] for key in ("frame", "boxes", "track_ids", "category_ids", "visibility")}
+            for position, frame_index in enumerate(order):
+                for target in frames[frame_index].iter("target"):
+                    box = _xyxy(target.find("box"))
+                    attribute = target.find("attribute")
+                    attrs = attribute.attrib if attribute is not None else {}
+                    regions = [_xyxy(region) for region in target.iter("region_overlap")]
+                    area = max((box[2] - box[0]) * (box[3] - box[1]), 1e-6)
+                    hidden = min(_occluded_area(box, regions) / area, 1.0) + float(attrs.get("truncation_ratio", 0.0))
+                    rows["frame"].append(base + position)
+                    rows["boxes"].append(box)
+                    rows["track_ids"].append(int(target.get("id")))
+                    rows["category_ids"].append(class_ids.get(attrs.get("vehicle_type", "others"), class_ids["others"]))
+                    rows["visibility"].append(float(np.clip(1.0 - hidden, 0.0, 1.0)))
+            builder.add_rows(
+                rows["frame"],
+                boxes=np.asarray(rows["boxes"], dtype=np.float32).reshape(-1, 4),
+                track_ids=np.asarray(rows["track_ids"], dtype=np.int64),
+                category_ids=np.asarray(rows["category_ids"], dtype=np.int32),
+                visibility=np.asarray(rows["visibility"], dtype=np.float32),
+            )
+        return {"categories": DETRAC_CLASSES}
@@ -0,0 +1,261 @@
+"""Columnar, memory-mapped annotation index shared by the dataset adapters."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from collections.abc import Sequence as SequenceABC
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Bump when the on-disk layout or any adapter's parsing changes.
+INDEX_VERSION = 1
+DEFAULT_INDEX_DIR = "outputs/dataset_index"
+
+
+def load_image(path: str) -> Any:
+    try:
+        import cv2  # type: ignore
+    except ImportError as exc:  # pragma: no cover - dependency enforcement
+        raise ImportError("OpenCV is required to decode dataset frames. Install via `pip install opencv-python`.") from exc
+    image = cv2.imread(path)
+    if image is None:
+        raise FileNotFoundError(f"Unable to read frame {path!r}.")
+    return image
+
+
+def source_digest(name: str, options: Dict[str, Any], sources: Iterable[Path]) -> str:
+    """Hash of adapter options and each annotation file's path, size and mtime."""
+    entries = []
+    for path in sorted(Path(p) for p in sources):
+        stat = path.stat()
+        entries.append((str(path.resolve()), stat.st_size, stat.st_mtime_ns))
+    payload = json.dumps({"name": name, "version": INDEX_VERSION, "options": options, "sources": entries}, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class IndexBuilder:
+    """Collect frames per sequence and annotation rows in any order, then write an index.
+
+    Rows refer to frames by the global frame row returned from :meth:`add_sequence`.
+    """
+
+    def __init__(self) -> None:
+        self.sequences: List[Dict[str, Any]] = []
+        self.frame_numbers: List[np.ndarray] = []
+        self.frame_paths: List[np.ndarray] = []
+        self.row_frames: List[np.ndarray] = []
+        self.columns: Dict[str, List[np.ndarray]] = {}
+        self.num_frames = 0
+
+    def add_sequence(self, name: str, frame_numbers: Any, paths: Any, **info: Any) -> int:
+        numbers = np.asarray(frame_numbers, dtype=np.int64).reshape(-1)
+        base = self.num_frames
+        self.sequences.append({"name": name, "start": base, "stop": base + numbers.shape[0], **info})
+        self.frame_numbers.append(numbers)
+        self.frame_paths.append(np.char.encode(np.asarray(paths, dtype=str).reshape(-1), "utf-8"))
+        self.num_frames += numbers.shape[0]
+        return base
+
+    def add_rows(self, frame_rows: Any, **columns: Any) -> None:
+        frame_rows = np.asarray(frame_rows, dtype=np.int64).reshape(-1)
+        if self.row_frames and set(columns) != set(self.columns):
+            raise ValueError(f"Annotation columns changed from {sorted(self.columns)} to {sorted(columns)}")
+        self.row_frames.append(frame_rows)
+        for name, values in columns.items():
+            if name.endswith("boxes"):
+                values = np.asarray(values, dtype=np.float32).reshape(-1, 4)
+            else:
+                values = np.asarray(values).reshape(-1)
+            if values.shape[0] != frame_rows.shape[0]:
+                raise ValueError(f"Column {name!r} has {values.shape[0]} rows, expected {frame_rows.shape[0]}")
+            self.columns.setdefault(name, []).append(values)
+
+    def write(self, directory: Path, meta: Dict[str, Any]) -> None:
+        """Write all arrays into a temporary directory and move it into place."""
+        tmp = directory.with_name(f"{directory.name}.{os.getpid()}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        row_frames = np.concatenate(self.row_frames) if self.row_frames else np.zeros(0, np.int64)
+        order = np.argsort(row_frames, kind="stable")
+        offsets = np.searchsorted(row_frames[order], np.arange(self.num_frames + 1)).astype(np.int64)
+        np.save(tmp / "frame_offsets.npy", offsets)
+        np.save(tmp / "frame_numbers.npy", np.concatenate(self.frame_numbers) if self.frame_numbers else np.zeros(0, np.int64))
+        np.save(tmp / "frame_paths.npy", np.concatenate(self.frame_paths) if self.frame_paths else np.zeros(0, "S1"))
+        for name, chunks in self.columns.items():
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(np.concatenate(chunks)[order]))
+        meta = {**meta, "sequences": self.sequences, "columns": sorted(self.columns), "rows": int(row_frames.shape[0])}
+        (tmp / "meta.json").write_text(json.dumps(meta))
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+
+
+class AnnotationIndex:
+    """Memory-mapped annotation columns with a frame → row-range offset table.
+
+    Frame ``f`` (a global frame row) owns annotation rows ``offsets[f]:offsets[f + 1]``
+    of every column. Opening only maps the ``.npy`` files, so it costs milliseconds
+    regardless of annotation size. Pickles by path for DataLoader workers.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = str(directory)
+        self._open()
+
+    def _open(self) -> None:
+        root = Path(self.directory)
+        self.meta = json.loads((root / "meta.json").read_text())
+        self.offsets = np.load(root / "frame_offsets.npy", mmap_mode="r")
+        self.frame_numbers = np.load(root / "frame_numbers.npy", mmap_mode="r")
+        self.frame_paths = np.load(root / "frame_paths.npy", mmap_mode="r")
+        self.columns = {name: np.load(root / f"{name}.npy", mmap_mode="r") for name in self.meta["columns"]}
+        self._sequences = {entry["name"]: entry for entry in self.meta["sequences"]}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"directory": self.directory}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.directory = state["directory"]
+        self._open()
+
+    def sequence_names(self) -> List[str]:
+        return [entry["name"] for entry in self.meta["sequences"]]
+
+    def sequence_info(self, name: str) -> Dict[str, Any]:
+        if name not in self._sequences:
+            raise KeyError(f"Unknown sequence {name!r}")
+        return self._sequences[name]
+
+    def frame(self, row: int) -> Dict[str, Any]:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        out: Dict[str, Any] = {name: column[start:end] for name, column in self.columns.items()}
+        out["frame_id"] = int(self.frame_numbers[row])
+        out["image_path"] = self.frame_paths[row].decode("utf-8")
+        return out
+
+    def table(self, name: str) -> Dict[str, Any]:
+        """All rows of one sequence as a columnar table with a per-row ``image_id`` (frame number).
+
+        Column names follow the evaluators (:mod:`amodal_cctv.eval.tao_amodal_metrics`,
+        :func:`amodal_cctv.eval.slices.evaluate_slices`): ``category_ids`` becomes
+        ``category_id``, so a table can be scored as ground truth directly.
+        """
+        info = self.sequence_info(name)
+        lo, hi = int(self.offsets[info["start"]]), int(self.offsets[info["stop"]])
+        counts = np.diff(self.offsets[info["start"] : info["stop"] + 1])
+        table: Dict[str, Any] = {key: column[lo:hi] for key, column in self.columns.items()}
+        if "category_ids" in table:
+            table["category_id"] = table.pop("category_ids")
+        table["image_id"] = np.repeat(np.asarray(self.frame_numbers[info["start"] : info["stop"]]), counts)
+        for key in ("width", "height"):
+            if info.get(key) is not None:
+                table[key] = info[key]
+        return table
+
+
+def open_index(
+    cache_dir: Optional[str],
+    name: str,
+    options: Dict[str, Any],
+    sources: Iterable[Path],
+    build: Callable[[IndexBuilder], Dict[str, Any]],
+) -> AnnotationIndex:
+    """Open the cached index for these sources, parsing them with ``build`` only on a miss."""
+    directory = Path(cache_dir or DEFAULT_INDEX_DIR) / f"{name}-{source_digest(name, options, sources)}"
+    if not (directory / "meta.json").exists():
+        builder = IndexBuilder()
+        meta = build(builder) or {}
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        builder.write(directory, meta)
+    return AnnotationIndex(str(directory))
+
+
+class SequenceFrames(SequenceABC):
+    """Randomly accessible frames of one sequence; images decode only when asked for."""
+
+    def __init__(self, index: AnnotationIndex, name: str, decode: bool = False) -> None:
+        self.index = index
+        self.name = name
+        self.decode = decode
+        info = index.sequence_info(name)
+        self.start, self.stop = info["start"], info["stop"]
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, position):  # type: ignore[override]
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        frame = self.index.frame(self.start + position)
+        frame["sequence"] = self.name
+        if self.decode:
+            frame["image"] = load_image(frame["image_path"])
+        return frame
+
+    def image(self, position: int) -> Any:
+        return load_image(self[position]["image_path"])
+
+
+class IndexedDataset:
+    """Shared behaviour of the annotation-backed dataset adapters.
+
+    Subclasses are dataclasses that implement ``_sources`` (annotation files the index
+    depends on), ``_options`` (parsing options) and ``_build`` (parse into an
+    :class:`IndexBuilder`). The index is built on first use and reused from
+    ``cache_dir`` until a source file or option changes.
+    """
+
+    index_name = "dataset"
+
+    def _sources(self) -> List[Path]:
+        raise NotImplementedError
+
+    def _options(self) -> Dict[str, Any]:
+        return {}
+
+    def _build(self, builder: IndexBuilder) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    @property
+    def index(self) -> AnnotationIndex:
+        cached = self.__dict__.get("_index")
+        if cached is None:
+            name = f"{self.index_name}-{self.split}"  # type: ignore[attr-defined]
+            cached = open_index(self.cache_dir, name, self._options(), self._sources(), self._build)  # type: ignore[attr-defined]
+            self.__dict__["_index"] = cached
+        return cached
+
+    def sequences(self) -> List[str]:
+        return self.index.sequence_names()
+
+    def __len__(self) -> int:
+        return len(self.sequences())
+
+    def sequence(self, name: str, decode: bool = False) -> SequenceFrames:
+        return SequenceFrames(self.index, name, decode=decode)
+
+    def frames(self, sequence: Optional[str] = None, decode: bool = False) -> Iterator[Dict[str, Any]]:
+        """Iterate frames of ``sequence`` (every sequence when ``None``) in order."""
+        for name in [sequence] if sequence is not None else self.sequences():
+            yield from self.sequence(name, decode=decode)
+
+    def table(self, sequence: str) -> Dict[str, Any]:
+        return self.index.table(sequence)
+
+    def categories(self) -> List[str]:
+        return list(self.index.meta.get("categories", []))
+
+
+def frame_rows(base: int, frame_numbers: np.ndarray, row_numbers: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Global frame rows for annotation ``row_numbers``; also a mask of rows whose frame exists."""
+    position = np.searchsorted(frame_numbers, row_numbers)
+    clipped = np.minimum(position, max(frame_numbers.shape[0] - 1, 0))
+    known = (position < frame_numbers.shape[0]) & (frame_numbers[clipped] == row_numbers) if frame_numbers.size else np.zeros(row_numbers.shape, bool)
+    return base + clipped, known
@@ -1,14 +1,102 @@
 """MOT17 dataset adapter."""
 from __future__ import annotations
 
+import configparser
 from dataclasses import dataclass
-from typing import Iterator
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .index import IndexBuilder, IndexedDataset, frame_rows
+
+# gt.txt class ids 1..12, in order.
+MOT17_CLASSES = [
+    "pedestrian",
+    "person_on_vehicle",
+    "car",
+    "bicycle",
+    "motorbike",
+    "non_motorized_vehicle",
+    "static_person",
+    "distractor",
+    "occluder",
+    "occluder_on_ground",
+    "occluder_full",
+    "reflection",
+]
 
 
 @dataclass
-class MOT17Dataset:
+class MOT17Dataset(IndexedDataset):
+    """MOTChallenge layout: ``<root>/<split>/<sequence>/{gt/gt.txt, img1/, seqinfo.ini}``.
+
+    MOT17 ships every sequence once per public detector with identical ground truth;
+    ``detector`` keeps one copy (``None`` keeps all). Rows carry ``boxes`` (xyxy),
+    ``track_ids``, ``category_ids``, ``visibility`` and the gt ``flags`` (0 = ignore).
+    """
+
     root: str
     split: str = "train"
+    detector: Optional[str] = "FRCNN"
+    cache_dir: Optional[str] = None
+
+    index_name = "mot17"
+
+    def _sequence_dirs(self) -> List[Path]:
+        base = Path(self.root) / self.split
+        if not base.is_dir():
+            raise FileNotFoundError(f"MOT17 split directory not found at {base}")
+        dirs = sorted(path for path in base.iterdir() if path.is_dir())
+        if self.detector is not None:
+            dirs = [path for path in dirs if path.name.endswith(f"-{self.detector}")]
+        return dirs
+
+    def _sources(self) -> List[Path]:
+        return [
+            path
+            for directory in self._sequence_dirs()
+            for path in (directory / "gt" / "gt.txt", directory / "seqinfo.ini")
+            if path.exists()
+        ]
+
+    def _options(self) -> Dict[str, Any]:
+        return {"root": str(Path(self.root).resolve()), "detector": self.detector}
 
-    def sequences(self) -> Iterator[str]:
-        yield f"mot17-{self.split}-seq"
+    def _build(self, builder: IndexBuilder) -> Dict[str, Any]:
+        for directory in self._sequence_dirs():
+            info = configparser.ConfigParser()
+            info.read(directory / "seqinfo.ini")
+            seq = info["Sequence"] if info.has_section("Sequence") else {}
+            image_dir = directory / seq.get("imDir", "img1")
+            extension = seq.get("imExt", ".jpg")
+            gt_path = directory / "gt" / "gt.txt"
+            rows = np.loadtxt(gt_path, delimiter=",", ndmin=2) if gt_path.exists() else np.zeros((0, 9))
+            if "seqLength" in seq:
+                numbers = np.arange(1, int(seq["seqLength"]) + 1)
+            elif image_dir.is_dir():
+                numbers = np.array(sorted(int(p.stem) for p in image_dir.glob(f"*{extension}")), dtype=np.int64)
+            else:
+                numbers = np.unique(rows[:, 0]).astype(np.int64)
+            paths = [str(image_dir / f"{number:06d}{extension}") for number in numbers]
+            width, height = seq.get("imWidth"), seq.get("imHeight")
+            base = builder.add_sequence(
+                directory.name,
+                numbers,
+                paths,
+                width=int(width) if width else None,
+                height=int(height) if height else None,
+                frame_rate=float(seq["frameRate"]) if "frameRate" in seq else None,
+            )
+            frames, known = frame_rows(base, numbers, rows[:, 0].astype(np.int64))
+            rows = rows[known]
+            xywh = rows[:, 2:6]
+            builder.add_rows(
+                frames[known],
+                boxes=np.concatenate([xywh[:, :2], xywh[:, :2] + xywh[:, 2:]], axis=1),
+                track_ids=rows[:, 1].astype(np.int64),
+                flags=rows[:, 6].astype(np.int8) if rows.shape[1] > 6 else np.ones(rows.shape[0], np.int8),
+                category_ids=rows[:, 7].astype(np.int32) if rows.shape[1] > 7 else np.ones(rows.shape[0], np.int32),
+                visibility=rows[:, 8].astype(np.float32) if rows.shape[1] > 8 else np.ones(rows.shape[0], np.float32),
+            )
+        return {"categories": MOT17_CLASSES}
@@ -0,0 +1,176 @@
+"""Seeded, streaming synthetic crowd used as the load generator for benchmarks."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+MOTION_MODELS = ("constant_velocity", "random_walk", "turning")
+
+
+def _visible_part(boxes: np.ndarray, visibility: np.ndarray, side: np.ndarray) -> np.ndarray:
+    """Cut ``1 - visibility`` of each box away from ``side`` (0 left, 1 right, 2 top, 3 bottom)."""
+    visible = boxes.copy()
+    hidden = 1.0 - visibility
+    width, height = boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]
+    visible[:, 0] += np.where(side == 0, hidden * width, 0.0)
+    visible[:, 2] -= np.where(side == 1, hidden * width, 0.0)
+    visible[:, 1] += np.where(side == 2, hidden * height, 0.0)
+    visible[:, 3] -= np.where(side == 3, hidden * height, 0.0)
+    return visible
+
+
+@dataclass
+class SyntheticCrowd:
+    """Crowd of ``num_objects`` boxes moving in a bounded scene, one frame at a time.
+
+    :meth:`stream` yields ``(detections, ground_truth)`` per frame. Detections are in
+    the tracker's input format (``boxes``/``scores``/``classes`` and ``features`` when
+    ``feature_dim > 0``), in shuffled order, with box noise, random misses, misses
+    driven by occlusion and Poisson false positives. Ground truth has amodal ``boxes``,
+    ``visible_boxes``, ``track_ids``, ``visibility`` and ``det_rows`` (each object's
+    row in the detections, ``-1`` when missed).
+
+    Objects bounce off the scene borders; ``turnover`` replaces objects with new
+    identities. Occlusion episodes last ``occlusion_length`` frames and hide a random
+    side of the box. When ``width``/``height`` are unset the scene grows with the crowd
+    (``area_per_object`` px² each), so density stays constant as ``num_objects``
+    scales. State is a fixed set of ``(num_objects, ...)`` arrays, so memory does not
+    grow with the number of frames (``num_frames=None`` streams forever).
+    """
+
+    num_objects: int = 200
+    num_frames: Optional[int] = 1000
+    width: Optional[float] = None
+    height: Optional[float] = None
+    area_per_object: float = 16000.0
+    motion: str = "constant_velocity"
+    speed: float = 2.0
+    size_range: Tuple[float, float] = (20.0, 80.0)
+    occlusion_rate: float = 0.01
+    occlusion_length: Tuple[int, int] = (5, 30)
+    box_noise: float = 1.5
+    miss_rate: float = 0.05
+    false_positives: float = 1.0
+    turnover: float = 0.0
+    feature_dim: int = 0
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        if self.motion not in MOTION_MODELS:
+            raise ValueError(f"Unknown motion model {self.motion!r}; choose from {MOTION_MODELS}")
+
+    def extent(self) -> Tuple[float, float]:
+        side = float(np.sqrt(max(self.num_objects, 1) * self.area_per_object))
+        return float(self.width or side), float(self.height or side)
+
+    def _spawn(self, rng: np.random.Generator, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        width, height = self.extent()
+        wh = rng.uniform(*self.size_range, size=(count, 2))
+        xy = rng.uniform(0.0, 1.0, size=(count, 2)) * np.maximum([width, height] - wh, 0.0)
+        return xy, wh, rng.normal(0.0, self.speed, size=(count, 2))
+
+    def _embeddings(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        vectors = rng.normal(size=(count, self.feature_dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def stream(self) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        rng = np.random.default_rng(self.seed)
+        n = self.num_objects
+        bounds = np.array(self.extent())
+        xy, wh, velocity = self._spawn(rng, n)
+        track_ids = np.arange(n, dtype=np.int64)
+        next_id = n
+        omega = rng.normal(0.0, 0.03, size=n) if self.motion == "turning" else None
+        remaining = np.zeros(n, dtype=np.int64)
+        level = np.ones(n)
+        side = np.zeros(n, dtype=np.int64)
+        identities = self._embeddings(rng, n) if self.feature_dim else None
+        frame = 0
+        while self.num_frames is None or frame < self.num_frames:
+            if self.motion == "random_walk":
+                velocity += rng.normal(0.0, 0.25 * self.speed, size=(n, 2))
+                velocity *= 0.95
+            elif self.motion == "turning":
+                cos, sin = np.cos(omega), np.sin(omega)
+                velocity = np.stack([cos * velocity[:, 0] - sin * velocity[:, 1], sin * velocity[:, 0] + cos * velocity[:, 1]], axis=1)
+            xy += velocity
+            limit = np.maximum(bounds - wh, 0.0)
+            velocity[(xy < 0) | (xy > limit)] *= -1
+            np.clip(xy, 0.0, limit, out=xy)
+
+            if self.turnover:
+                leaving = np.flatnonzero(rng.random(n) < self.turnover)
+                if leaving.size:
+                    xy[leaving], wh[leaving], velocity[leaving] = self._spawn(rng, leaving.size)
+                    track_ids[leaving] = np.arange(next_id, next_id + leaving.size)
+                    next_id += leaving.size
+                    remaining[leaving] = 0
+                    if identities is not None:
+                        identities[leaving] = self._embeddings(rng, leaving.size)
+
+            starting = np.flatnonzero((remaining == 0) & (rng.random(n) < self.occlusion_rate))
+            remaining[starting] = rng.integers(self.occlusion_length[0], self.occlusion_length[1] + 1, size=starting.size)
+            level[starting] = rng.uniform(0.0, 0.6, size=starting.size)
+            side[starting] = rng.integers(0, 4, size=starting.size)
+            visibility = np.where(remaining > 0, level, 1.0)
+            remaining = np.maximum(remaining - 1, 0)
+
+            boxes = np.concatenate([xy, xy + wh], axis=1)
+            visible = _visible_part(boxes, visibility, side)
+            # Below half visibility an object is increasingly likely to be missed.
+            detected = np.flatnonzero(rng.random(n) < (1.0 - self.miss_rate) * np.minimum(visibility / 0.5, 1.0))
+            false_count = int(rng.poisson(self.false_positives)) if self.false_positives else 0
+            fp_xy = rng.uniform(0.0, 1.0, size=(false_count, 2)) * bounds
+            fp_boxes = np.concatenate([fp_xy, fp_xy + rng.uniform(*self.size_range, size=(false_count, 2))], axis=1)
+            det_boxes = np.concatenate([visible[detected] + rng.normal(0.0, self.box_noise, size=(detected.size, 4)), fp_boxes])
+            scores = np.concatenate(
+                [
+                    np.clip(0.4 + 0.6 * visibility[detected] + rng.normal(0.0, 0.1, size=detected.size), 0.05, 1.0),
+                    rng.uniform(0.05, 0.6, size=false_count),
+                ]
+            )
+            order = rng.permutation(det_boxes.shape[0])
+            det_rows = np.full(n, -1, dtype=np.int64)
+            det_rows[detected] = np.argsort(order)[: detected.size]
+            detections: Dict[str, Any] = {
+                "frame_id": frame,
+                "boxes": det_boxes[order],
+                "scores": scores[order],
+                "classes": np.zeros(det_boxes.shape[0], dtype=int),
+            }
+            if identities is not None:
+                features = np.concatenate(
+                    [
+                        identities[detected] + 0.1 * rng.normal(size=(detected.size, self.feature_dim)),
+                        self._embeddings(rng, false_count),
+                    ]
+                ).astype(np.float32)
+                detections["features"] = features[order]
+            ground_truth = {
+                "frame_id": frame,
+                "boxes": boxes,
+                "visible_boxes": visible,
+                "track_ids": track_ids.copy(),
+                "visibility": visibility,
+                "det_rows": det_rows,
+            }
+            yield detections, ground_truth
+            frame += 1
+
+    def detections(self) -> Iterator[Dict[str, Any]]:
+        for detections, _ in self.stream():
+            yield detections
+
+    def frames(self) -> Iterator[Dict[str, Any]]:
+        """Ground-truth frames (like :class:`ToyAmodalSequence`) carrying their ``detections``."""
+        for detections, ground_truth in self.stream():
+            yield {**ground_truth, "detections": detections}
+
+    def metadata(self) -> Dict[str, Any]:
+        width, height = self.extent()
+        return {"num_frames": self.num_frames, "num_objects": self.num_objects, "width": width, "height": height}
+
+    def categories(self) -> List[str]:
+        return ["person"]
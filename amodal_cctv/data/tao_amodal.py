@@ -1,20 +1,93 @@
 """TAO-Amodal dataset adapter."""
 from __future__ import annotations
 
+import itertools
+import json
 from dataclasses import dataclass
-from typing import Iterator, List
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .index import IndexBuilder, IndexedDataset, frame_rows
+
+
+def _xywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    return np.concatenate([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]], axis=1)
 
 
 @dataclass
-class TAOAmodalDataset:
+class TAOAmodalDataset(IndexedDataset):
+    """TAO-Amodal layout: ``amodal_annotations/<split>.json`` with frames under ``frames/``.
+
+    Rows carry amodal ``boxes``, modal ``visible_boxes`` (xyxy), ``track_ids``,
+    ``category_ids`` and ``visibility``. The JSON is parsed once into the index;
+    later opens only memory-map it.
+    """
+
     root: str
     split: str = "train"
+    annotation_file: Optional[str] = None
+    image_root: Optional[str] = None
+    cache_dir: Optional[str] = None
+
+    index_name = "tao_amodal"
+
+    def _annotation_file(self) -> Path:
+        path = Path(self.annotation_file or Path(self.root) / "amodal_annotations" / f"{self.split}.json")
+        if not path.is_file():
+            raise FileNotFoundError(f"TAO-Amodal annotations not found at {path}")
+        return path
+
+    def _sources(self) -> List[Path]:
+        return [self._annotation_file()]
 
-    def sequences(self) -> Iterator[str]:
-        yield f"tao-{self.split}-seq"
+    def _options(self) -> Dict[str, Any]:
+        return {"image_root": str(Path(self.image_root or Path(self.root) / "frames").resolve())}
 
-    def __len__(self) -> int:
-        return 1
+    def _build(self, builder: IndexBuilder) -> Dict[str, Any]:
+        data = json.loads(self._annotation_file().read_text())
+        image_root = Path(self.image_root or Path(self.root) / "frames")
+        videos = {video["id"]: video for video in data.get("videos", [])}
+        images = sorted(data.get("images", []), key=lambda image: (image["video_id"], image.get("frame_index", 0), image["id"]))
+        image_ids = np.array([image["id"] for image in images], dtype=np.int64)
+        image_rows = np.empty(len(images), dtype=np.int64)
+        start = 0
+        for video_id, group in itertools.groupby(images, key=lambda image: image["video_id"]):
+            chunk = list(group)
+            video = videos.get(video_id, {})
+            base = builder.add_sequence(
+                video.get("name", str(video_id)),
+                [image.get("frame_index", position) for position, image in enumerate(chunk)],
+                [str(image_root / image["file_name"]) for image in chunk],
+                video_id=video_id,
+                width=chunk[0].get("width"),
+                height=chunk[0].get("height"),
+            )
+            image_rows[start : start + len(chunk)] = base + np.arange(len(chunk))
+            start += len(chunk)
 
-    def categories(self) -> List[str]:
-        return ["person", "vehicle"]
+        annotations = data.get("annotations", [])
+        lookup = np.argsort(image_ids, kind="stable")
+        ann_images = np.array([ann["image_id"] for ann in annotations], dtype=np.int64)
+        # Annotations whose image is not listed are dropped, as MOT17 drops rows past the last frame.
+        sorted_position, known = frame_rows(0, image_ids[lookup], ann_images)
+        annotations = [ann for ann, keep in zip(annotations, known) if keep]
+        position = lookup[sorted_position[known]]
+        # Fully hidden objects have a null modal ``bbox`` in TAO-Amodal.
+        visible = np.array([ann.get("bbox") or [0, 0, 0, 0] for ann in annotations], dtype=np.float64).reshape(-1, 4)
+        amodal = np.array([ann.get("amodal_bbox") or ann.get("bbox") or [0, 0, 0, 0] for ann in annotations], dtype=np.float64)
+        amodal = amodal.reshape(-1, 4)
+        builder.add_rows(
+            image_rows[position],
+            boxes=_xywh_to_xyxy(amodal),
+            visible_boxes=_xywh_to_xyxy(visible),
+            track_ids=np.array([ann.get("track_id", -1) for ann in annotations], dtype=np.int64),
+            category_ids=np.array([ann.get("category_id", 0) for ann in annotations], dtype=np.int32),
+            visibility=np.array([ann.get("visibility", 1.0) for ann in annotations], dtype=np.float32),
+        )
+        categories = sorted(data.get("categories", []), key=lambda category: category["id"])
+        return {
+            "categories": [category["name"] for category in categories],
+            "category_ids": [category["id"] for category in categories],
+        }
@@ -0,0 +1,221 @@
+"""Content-addressed on-disk cache of detector outputs."""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections.abc import Sequence as SequenceABC
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Config fields that do not change what a detector outputs.
+_NON_OUTPUT_FIELDS = {"device", "batch_size"}
+_COLUMNS = ("boxes", "scores", "classes", "features")
+_WEIGHTS_HASHES: Dict[Tuple[str, int, int], str] = {}
+
+
+def weights_digest(path: Optional[str]) -> str:
+    """SHA-256 of a weights file (memoised by path, size and mtime); the raw string otherwise."""
+    if not path or not Path(path).expanduser().is_file():
+        return f"name:{path}"
+    resolved = Path(path).expanduser()
+    stat = resolved.stat()
+    memo = (str(resolved), stat.st_size, stat.st_mtime_ns)
+    if memo not in _WEIGHTS_HASHES:
+        digest = hashlib.sha256()
+        with resolved.open("rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        _WEIGHTS_HASHES[memo] = digest.hexdigest()
+    return _WEIGHTS_HASHES[memo]
+
+
+def detector_cache_key(name: str, config: Any) -> str:
+    """Key over detector name, output-relevant config fields and the weights' content hash."""
+    values = asdict(config) if is_dataclass(config) else dict(config or {})
+    weights = values.pop("weights_path", None)
+    values = {k: v for k, v in values.items() if k not in _NON_OUTPUT_FIELDS}
+    payload = json.dumps({"name": name, "config": values, "weights": weights_digest(weights)}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+
+
+def _safe_name(sequence: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", sequence)
+
+
+class CachedDetections(SequenceABC):
+    """Per-frame detections backed by memory-mapped columns; frames are zero-copy slices."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.meta = json.loads((directory / "meta.json").read_text())
+        self.offsets = np.load(directory / "offsets.npy")
+        self.columns = {
+            name: np.load(directory / f"{name}.npy", mmap_mode="r")
+            for name in _COLUMNS
+            if (directory / f"{name}.npy").exists()
+        }
+
+    def __len__(self) -> int:
+        return int(self.offsets.shape[0] - 1)
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        frame: Dict[str, Any] = {name: column[start:end] for name, column in self.columns.items()}
+        frame["frame_id"] = index
+        frame["metadata"] = {"cache_key": self.meta["key"]}
+        return frame
+
+
+class DetectionCache:
+    """Detections stored as ``<root>/<key>/<sequence>/{boxes,scores,classes,features,offsets}.npy``.
+
+    ``offsets[i]:offsets[i+1]`` are frame ``i``'s rows. ``meta.json`` is written last,
+    so a sequence without it is incomplete and ignored. ``index.jsonl`` lists entries.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, key: str, sequence: str) -> Path:
+        return self.root / key / _safe_name(sequence)
+
+    def contains(self, key: str, sequence: str) -> bool:
+        return (self._dir(key, sequence) / "meta.json").exists()
+
+    def read(self, key: str, sequence: str) -> CachedDetections:
+        if not self.contains(key, sequence):
+            raise KeyError(f"No cached detections for {key}/{sequence}")
+        return CachedDetections(self._dir(key, sequence))
+
+    def write(
+        self, key: str, sequence: str, detections: Iterable[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None
+    ) -> CachedDetections:
+        frames = list(detections)
+        counts = [len(np.asarray(d.get("boxes", [])).reshape(-1, 4)) for d in frames]
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        columns = {
+            "boxes": np.concatenate([np.asarray(d.get("boxes", []), dtype=np.float32).reshape(-1, 4) for d in frames])
+            if frames
+            else np.empty((0, 4), np.float32),
+            "scores": _stack(frames, "scores", np.float32, counts),
+            "classes": _stack(frames, "classes", np.int32, counts),
+        }
+        if any(d.get("features") is not None for d in frames):
+            dim = next(np.asarray(d["features"]).shape[-1] for d in frames if d.get("features") is not None)
+            columns["features"] = np.concatenate(
+                [
+                    np.asarray(d["features"], dtype=np.float32).reshape(n, dim)
+                    if d.get("features") is not None
+                    else np.zeros((n, dim), np.float32)
+                    for d, n in zip(frames, counts)
+                ]
+            )
+        directory = self._dir(key, sequence)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "meta.json").unlink(missing_ok=True)
+        for name, array in {**columns, "offsets": offsets}.items():
+            tmp = directory / f"{name}.{os.getpid()}.tmp.npy"
+            np.save(tmp, array)
+            os.replace(tmp, directory / f"{name}.npy")
+        entry = {"key": key, "sequence": sequence, "frames": len(frames), "detections": int(offsets[-1]), **(meta or {})}
+        (directory / "meta.json").write_text(json.dumps({**entry, "created": time.time()}, default=str))
+        with (self.root / "index.jsonl").open("a") as handle:
+            handle.write(json.dumps(entry, default=str) + "\n")
+        return CachedDetections(directory)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Complete cached sequences, one ``meta.json`` payload each."""
+        return [json.loads(path.read_text()) for path in sorted(self.root.glob("*/*/meta.json"))]
+
+
+def _stack(frames: List[Dict[str, Any]], name: str, dtype: Any, counts: List[int]) -> np.ndarray:
+    parts = []
+    for d, n in zip(frames, counts):
+        values = np.asarray(d.get(name, []), dtype=dtype).reshape(-1)
+        parts.append(values if values.size == n else np.zeros(n, dtype=dtype))
+    return np.concatenate(parts) if parts else np.empty((0,), dtype=dtype)
+
+
+class ReplayDetector:
+    """Detector stand-in serving cached frames by ``frame["frame_id"]`` (or position)."""
+
+    # Read-only over memory-mapped columns, so pipeline workers may share it.
+    reentrant = True
+
+    def __init__(self, cached: CachedDetections) -> None:
+        self.cached = cached
+
+    def infer(self, frame: Any) -> Dict[str, Any]:
+        index = frame.get("frame_id") if isinstance(frame, dict) else frame
+        return self.cached[int(index)]
+
+    def infer_batch(self, frames: List[Any], frame_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        return [self.infer(frame) for frame in (frame_ids if frame_ids is not None else frames)]
+
+
+class RecordingDetector:
+    """Wrap a detector and keep its outputs by frame id so a run can be cached afterwards."""
+
+    def __init__(self, detector: Any) -> None:
+        self.detector = detector
+        self.outputs: Dict[int, Dict[str, Any]] = {}
+
+    def infer(self, frame: Any) -> Dict[str, Any]:
+        result = self.detector.infer(frame)
+        index = frame.get("frame_id", len(self.outputs)) if isinstance(frame, dict) else len(self.outputs)
+        self.outputs[int(index)] = result
+        return result
+
+    def missing_frames(self, num_frames: Optional[int] = None) -> List[int]:
+        """Frame ids below ``num_frames`` (default: the highest recorded id) that never reached the detector."""
+        count = max(self.outputs, default=-1) + 1 if num_frames is None else num_frames
+        return [i for i in range(count) if i not in self.outputs]
+
+    def save(
+        self,
+        cache: DetectionCache,
+        key: str,
+        sequence: str,
+        meta: Optional[Dict[str, Any]] = None,
+        num_frames: Optional[int] = None,
+    ) -> CachedDetections:
+        """Write the recorded frames; refuse when any frame is missing (e.g. dropped by the pipeline).
+
+        A gap would otherwise replay as "nothing detected" on every later hit of ``key``.
+        """
+        missing = self.missing_frames(num_frames)
+        if missing:
+            raise ValueError(
+                f"Refusing to cache {key}/{sequence}: {len(missing)} frame(s) were never detected, e.g. {missing[:5]}"
+            )
+        count = max(self.outputs, default=-1) + 1 if num_frames is None else num_frames
+        return cache.write(key, sequence, [self.outputs[i] for i in range(count)], meta)
+
+
+def cached_or_run(
+    cache: DetectionCache, key: str, sequence: str, detector: Any, frames: List[Any], meta: Optional[Dict[str, Any]] = None
+) -> Tuple[CachedDetections, bool]:
+    """Return cached detections for ``sequence``, running and caching ``detector`` on a miss.
+
+    The second element tells whether the cache was hit.
+    """
+    if cache.contains(key, sequence):
+        return cache.read(key, sequence), True
+    if hasattr(detector, "infer_batch"):
+        detections = detector.infer_batch(frames)
+    else:
+        detections = [detector.infer(frame) for frame in frames]
+    return cache.write(key, sequence, detections, meta), False
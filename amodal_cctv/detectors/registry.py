@@ -0,0 +1,20 @@
+"""Detector registry used by config-driven runners."""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+from .rtdetrv2 import build_rtdetrv2_detector
+from .vitdet import build_vitdet_detector
+from .yolo_v10 import build_yolov10_detector
+
+DETECTOR_REGISTRY: Dict[str, Callable[..., Any]] = {
+    "yolov10": build_yolov10_detector,
+    "rtdetrv2": build_rtdetrv2_detector,
+    "vitdet": build_vitdet_detector,
+}
+
+
+def build_detector(name: str, config_dict: Dict[str, Any] | None = None) -> Any:
+    if name not in DETECTOR_REGISTRY:
+        raise KeyError(f"Detector {name} not registered")
+    return DETECTOR_REGISTRY[name](config_dict)
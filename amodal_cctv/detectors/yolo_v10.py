@@ -1,9 +1,11 @@
 """YOLOv10 detector wrapper for amodal CCTV tracking."""
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 
@@ -12,9 +14,41 @@ def _is_placeholder(value: Optional[str]) -> bool:
     return value is not None and "{{PLACEHOLDER" in value
 
 
+def roi_mean_pool(feature_map: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """Mean of a ``(C, H, W)`` feature map inside each box given in feature-grid coordinates.
+
+    A summed-area table turns every box into four gathers; boxes are snapped outwards to
+    whole cells and keep at least one cell, so boxes off the map pool their nearest edge.
+    Returns ``(K, C)`` float32.
+    """
+    channels, height, width = feature_map.shape
+    integral = np.zeros((channels, height + 1, width + 1), dtype=np.float64)
+    np.cumsum(np.cumsum(feature_map, axis=1, dtype=np.float64), axis=2, out=integral[:, 1:, 1:])
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    x1 = np.clip(np.floor(boxes[:, 0]), 0, width - 1).astype(np.intp)
+    y1 = np.clip(np.floor(boxes[:, 1]), 0, height - 1).astype(np.intp)
+    x2 = np.clip(np.ceil(boxes[:, 2]), x1 + 1, width).astype(np.intp)
+    y2 = np.clip(np.ceil(boxes[:, 3]), y1 + 1, height).astype(np.intp)
+    sums = integral[:, y2, x2] - integral[:, y1, x2] - integral[:, y2, x1] + integral[:, y1, x1]
+    return (sums / ((y2 - y1) * (x2 - x1))).T.astype(np.float32)
+
+
+def letterbox_boxes(boxes: np.ndarray, orig_shape: Tuple[int, int], input_shape: Tuple[int, int]) -> np.ndarray:
+    """Map xyxy boxes from the original image onto the letterboxed network input (Ultralytics padding)."""
+    (h, w), (in_h, in_w) = orig_shape, input_shape
+    gain = min(in_h / h, in_w / w)
+    pad_x, pad_y = (in_w - round(w * gain)) / 2, (in_h - round(h * gain)) / 2
+    return np.asarray(boxes, dtype=float).reshape(-1, 4) * gain + np.array([pad_x, pad_y, pad_x, pad_y])
+
+
 @dataclass
 class YOLOv10Config:
-    """Runtime configuration for the YOLOv10 detector."""
+    """Runtime configuration for the YOLOv10 detector.
+
+    ``roi_features`` mean-pools every neck level feeding the detection head inside each
+    kept box and returns the concatenation as ``features`` (what the expander's ROI
+    shard dump reads from the detection cache).
+    """
 
     weights_path: Optional[str] = None
     device: str = "cuda"
@@ -24,14 +58,28 @@ class YOLOv10Config:
     max_detections: int = 300
     half_precision: bool = False
     fuse: bool = True
+    batch_size: int = 8
+    roi_features: bool = False
 
 
 class YOLOv10Detector:
-    """Ultralytics YOLOv10 detector with numpy-friendly outputs."""
+    """Ultralytics YOLOv10 detector with numpy-friendly outputs.
+
+    Not re-entrant: the Ultralytics predictor and the ROI-feature hook keep per-call
+    state, so concurrent callers need one instance each (or must serialise calls).
+    """
+
+    reentrant = False
 
     def __init__(self, config: YOLOv10Config) -> None:
         self.config = config
         self._model = None
+        self._load_lock = threading.Lock()
+        self._weights: Optional[str] = None
+        self._hooked: Any = None
+        self._strides: List[float] = []
+        self._neck: List[np.ndarray] = []
+        self._neck_row = 0
 
     def _resolve_weights(self) -> str:
         if _is_placeholder(self.config.weights_path):
@@ -52,6 +100,12 @@ class YOLOv10Detector:
     def _ensure_model(self):
         if self._model is not None:
             return self._model
+        with self._load_lock:
+            if self._model is None:
+                self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
         try:
             from ultralytics import YOLO  # type: ignore
         except ImportError as exc:  # pragma: no cover - dependency enforcement
@@ -61,28 +115,55 @@ class YOLOv10Detector:
             ) from exc
 
         weights = self._resolve_weights()
+        self._weights = weights
         model = YOLO(weights)
         if self.config.fuse and hasattr(model, "fuse"):
             model.fuse()
-        self._model = model
-        return self._model
-
-    def infer(self, inputs: Any, frame_id: Optional[int] = None) -> Dict[str, Any]:
-        """Run inference on an image tensor, numpy array, or file path."""
+        return model
+
+    def _capture_neck(self, head: Any, inputs: Tuple[Any, ...]) -> None:
+        # Forward pre-hook on the detection head: its input is the list of neck levels.
+        self._neck = [level.detach().float().cpu().numpy() for level in inputs[0]]
+        self._neck_row = 0
+
+    def _attach_roi_hook(self, model: Any) -> None:
+        if self._hooked is model:
+            return
+        head = model.model.model[-1]
+        head.register_forward_pre_hook(self._capture_neck)
+        self._strides = [float(stride) for stride in head.stride]
+        self._hooked = model
+
+    def _roi_features(self, result: Any, boxes: np.ndarray) -> np.ndarray:
+        """Pool the captured neck levels of this result's batch row inside ``boxes``."""
+        row = self._neck_row
+        self._neck_row += 1
+        if not self._neck:
+            raise RuntimeError("roi_features is set but the detection head produced no neck features.")
+        levels = [level[row] for level in self._neck]
+        input_shape = (levels[0].shape[1] * self._strides[0], levels[0].shape[2] * self._strides[0])
+        boxes = letterbox_boxes(boxes, tuple(result.orig_shape[:2]), input_shape)
+        pooled = [roi_mean_pool(level, boxes / stride) for level, stride in zip(levels, self._strides)]
+        return np.concatenate(pooled, axis=1)
+
+    def _predict(self, source: Any, stream: bool, batch: int = 1):
         model = self._ensure_model()
-        results = model.predict(  # type: ignore[attr-defined]
-            source=inputs,
+        if self.config.roi_features:
+            self._attach_roi_hook(model)
+        return model.predict(  # type: ignore[attr-defined]
+            source=source,
             device=self.config.device,
             conf=self.config.confidence,
             iou=self.config.iou_threshold,
             imgsz=self.config.image_size,
             half=self.config.half_precision,
             max_det=self.config.max_detections,
+            batch=batch,
             verbose=False,
-            stream=False,
+            stream=stream,
         )
 
-        result = results[0]
+    def _to_detections(self, result: Any, frame_id: Optional[int]) -> Dict[str, Any]:
         if result.boxes is None:
             boxes_xyxy = np.empty((0, 4), dtype=float)
             scores = np.empty((0,), dtype=float)
@@ -92,8 +173,10 @@ class YOLOv10Detector:
             scores = result.boxes.conf.detach().cpu().numpy()
             classes = result.boxes.cls.detach().cpu().numpy().astype(int)
 
-        # Ultralytics YOLO does not expose ROI embeddings by default; keep placeholder for downstream hooks.
+        # Ultralytics YOLO does not expose ROI embeddings; pool them from the neck on request.
         roi_features: Optional[np.ndarray] = None
+        if self.config.roi_features:
+            roi_features = self._roi_features(result, boxes_xyxy)
 
         return {
             "frame_id": frame_id,
@@ -103,12 +186,58 @@ class YOLOv10Detector:
             "features": roi_features,
             "metadata": {
                 "model": "yolov10",
-                "weights": self._resolve_weights(),
+                "weights": self._weights or self._resolve_weights(),
                 "device": self.config.device,
                 "image_size": self.config.image_size,
             },
         }
 
+    def infer(self, inputs: Any, frame_id: Optional[int] = None) -> Dict[str, Any]:
+        """Run inference on an image tensor, numpy array, or file path."""
+        results = self._predict(inputs, stream=False)
+        return self._to_detections(results[0], frame_id)
+
+    def infer_batch(
+        self, frames: Sequence[Any], frame_ids: Optional[Sequence[Optional[int]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Detect on a list of frames (possibly from several cameras), ``batch_size`` per forward pass.
+
+        Returns one detection dict per input frame, in input order.
+        """
+        frames = list(frames)
+        ids = list(frame_ids) if frame_ids is not None else [None] * len(frames)
+        if len(ids) != len(frames):
+            raise ValueError("frame_ids must align with frames.")
+        outputs: List[Dict[str, Any]] = []
+        step = max(1, self.config.batch_size)
+        for offset in range(0, len(frames), step):
+            chunk = frames[offset : offset + step]
+            results = self._predict(chunk, stream=False, batch=len(chunk))
+            outputs.extend(self._to_detections(r, fid) for r, fid in zip(results, ids[offset : offset + step]))
+        return outputs
+
+    def infer_stream(self, source: Any, start_frame: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield detections frame by frame with bounded memory.
+
+        ``source`` may be a video path/URL, handed to Ultralytics in ``stream=True``
+        mode, or any iterable of frames, consumed ``batch_size`` frames at a time.
+        """
+        frame_id = start_frame
+        if isinstance(source, (str, Path)):
+            for result in self._predict(str(source), stream=True, batch=max(1, self.config.batch_size)):
+                yield self._to_detections(result, frame_id)
+                frame_id += 1
+            return
+        iterator: Iterator[Any] = iter(source)
+        step = max(1, self.config.batch_size)
+        while True:
+            chunk = list(islice(iterator, step))
+            if not chunk:
+                return
+            for result in self._predict(chunk, stream=True, batch=len(chunk)):
+                yield self._to_detections(result, frame_id)
+                frame_id += 1
+
 
 def build_yolov10_detector(config_dict: Dict[str, Any] | None = None) -> YOLOv10Detector:
     """Factory that builds the default YOLOv10 detector."""
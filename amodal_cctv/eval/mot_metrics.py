@@ -0,0 +1,232 @@
+"""In-process HOTA, CLEAR (MOTA) and Identity (IDF1) metrics over MOTChallenge arrays."""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # pragma: no cover - fallback when SciPy unavailable
+    linear_sum_assignment = None
+
+from ..trackers.box_ops import iou_matrix
+from .trackeval_adapter import read_mot_file
+
+HOTA_ALPHAS = np.arange(0.05, 0.99, 0.05)
+_EPS = np.finfo(float).eps
+# Additive per-sequence counters; combining sequences is a plain sum.
+_HOTA_FIELDS = ("hota_tp", "hota_fn", "hota_fp", "ass_sum", "ass_re_sum", "ass_pr_sum", "loc_sum")
+_CLEAR_FIELDS = ("tp", "fn", "fp", "idsw", "motp_sum", "idtp", "num_gt", "num_pred")
+
+MOTSource = Union[str, np.ndarray]
+
+
+@dataclass
+class MOTMetricsConfig:
+    iou_threshold: float = 0.5
+    workers: int = 4
+
+
+def _as_rows(rows: Any) -> np.ndarray:
+    rows = np.asarray(rows, dtype=float)
+    return rows.reshape(-1, rows.shape[-1] if rows.ndim == 2 else 6)
+
+
+def _concat(parts: List[np.ndarray], dtype: Any) -> np.ndarray:
+    return np.concatenate(parts) if parts else np.empty((0,), dtype=dtype)
+
+
+def _split(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """Sort rows by frame; return frames, dense ids, xyxy boxes and the id count."""
+    rows = rows[np.argsort(rows[:, 0], kind="stable")]
+    frames = rows[:, 0].astype(np.int64)
+    _, ids = np.unique(rows[:, 1].astype(np.int64), return_inverse=True)
+    boxes = rows[:, 2:6].astype(float).copy()
+    boxes[:, 2:] += boxes[:, :2]
+    return frames, ids.astype(np.int64), boxes, int(ids.max(initial=-1)) + 1
+
+
+def _frames(gt: np.ndarray, pred: np.ndarray):
+    """Yield ``(gt_ids, pred_ids, iou)`` for every frame present in either input."""
+    g_frames, g_ids, g_boxes, _ = gt
+    p_frames, p_ids, p_boxes, _ = pred
+    for frame in np.union1d(g_frames, p_frames):
+        g0, g1 = np.searchsorted(g_frames, [frame, frame + 1])
+        p0, p1 = np.searchsorted(p_frames, [frame, frame + 1])
+        yield g_ids[g0:g1], p_ids[p0:p1], iou_matrix(g_boxes[g0:g1], p_boxes[p0:p1])
+
+
+def _pair_counts(g: np.ndarray, t: np.ndarray, weights: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    return np.bincount(g * shape[1] + t, weights=weights, minlength=shape[0] * shape[1]).reshape(shape)
+
+
+def evaluate_sequence(gt_rows: np.ndarray, pred_rows: np.ndarray, iou_threshold: float = 0.5) -> Dict[str, Any]:
+    """Raw additive HOTA/CLEAR/Identity counters for one sequence.
+
+    Follows TrackEval's definitions: HOTA averages over :data:`HOTA_ALPHAS` with matches
+    chosen by global alignment score, CLEAR prefers continuing last frame's match, and
+    IDF1 uses the optimal one-to-one id assignment. Ground-truth rows whose
+    consider-flag (column 7) is 0 are dropped; distractor classes are not filtered.
+    """
+    if linear_sum_assignment is None:
+        raise ImportError("SciPy is required for MOT metrics.")
+    gt_rows, pred_rows = _as_rows(gt_rows), _as_rows(pred_rows)
+    if gt_rows.shape[1] >= 7:
+        gt_rows = gt_rows[gt_rows[:, 6] != 0]
+    gt, pred = _split(gt_rows), _split(pred_rows)
+    shape = (gt[3], pred[3])
+    gt_count = np.bincount(gt[1], minlength=shape[0]).astype(float)
+    tr_count = np.bincount(pred[1], minlength=shape[1]).astype(float)
+    frames = list(_frames(gt, pred))
+
+    # Pass 1: soft id overlap (HOTA global alignment) and thresholded id overlap (IDF1).
+    soft_g, soft_t, soft_w, id_g, id_t = [], [], [], [], []
+    for g, t, sim in frames:
+        if sim.size == 0:
+            continue
+        denom = sim.sum(0)[None, :] + sim.sum(1)[:, None] - sim
+        rows, cols = np.nonzero(denom > _EPS)
+        soft_g.append(g[rows])
+        soft_t.append(t[cols])
+        soft_w.append(sim[rows, cols] / denom[rows, cols])
+        rows, cols = np.nonzero(sim >= iou_threshold - _EPS)
+        id_g.append(g[rows])
+        id_t.append(t[cols])
+    potential = _pair_counts(_concat(soft_g, np.int64), _concat(soft_t, np.int64), _concat(soft_w, float), shape)
+    alignment = potential / np.maximum(gt_count[:, None] + tr_count[None, :] - potential, _EPS)
+
+    raw: Dict[str, Any] = {name: np.zeros(len(HOTA_ALPHAS)) for name in _HOTA_FIELDS}
+    raw.update({name: 0.0 for name in _CLEAR_FIELDS})
+    raw["num_gt"], raw["num_pred"] = float(len(gt[1])), float(len(pred[1]))
+    match_a, match_g, match_t = [], [], []
+    prev_match = np.full(shape[0], -1, dtype=np.int64)
+    prev_step = np.full(shape[0], -1, dtype=np.int64)
+    for g, t, sim in frames:
+        if g.size == 0 or t.size == 0:
+            continue
+        # HOTA pass 2: one assignment per frame, thresholded at every alpha.
+        rows, cols = linear_sum_assignment(-(alignment[np.ix_(g, t)] * sim))
+        scores = sim[rows, cols]
+        ok = scores[None, :] >= HOTA_ALPHAS[:, None] - _EPS
+        raw["hota_tp"] += ok.sum(axis=1)
+        raw["loc_sum"] += (ok * scores[None, :]).sum(axis=1)
+        alpha_idx, pair_idx = np.nonzero(ok)
+        match_a.append(alpha_idx)
+        match_g.append(g[rows[pair_idx]])
+        match_t.append(t[cols[pair_idx]])
+
+        # CLEAR: continuing last frame's match outweighs any IoU difference.
+        score = 1000.0 * (t[None, :] == prev_step[g][:, None]) + sim
+        score[sim < iou_threshold - _EPS] = 0.0
+        rows, cols = linear_sum_assignment(-score)
+        keep = score[rows, cols] > _EPS
+        matched_g, matched_t = g[rows[keep]], t[cols[keep]]
+        previous = prev_match[matched_g]
+        raw["idsw"] += float(np.count_nonzero((previous >= 0) & (previous != matched_t)))
+        prev_match[matched_g] = matched_t
+        prev_step[:] = -1
+        prev_step[matched_g] = matched_t
+        raw["tp"] += float(keep.sum())
+        raw["motp_sum"] += float(sim[rows[keep], cols[keep]].sum())
+
+    raw["fn"] = raw["num_gt"] - raw["tp"]
+    raw["fp"] = raw["num_pred"] - raw["tp"]
+    raw["hota_fn"] = raw["num_gt"] - raw["hota_tp"]
+    raw["hota_fp"] = raw["num_pred"] - raw["hota_tp"]
+    if match_a:
+        a, g, t = np.concatenate(match_a), np.concatenate(match_g), np.concatenate(match_t)
+        keys, counts = np.unique((a * shape[0] + g) * shape[1] + t, return_counts=True)
+        a, rest = np.divmod(keys, shape[0] * shape[1])
+        g, t = np.divmod(rest, shape[1])
+        counts = counts.astype(float)
+        ass = counts / np.maximum(gt_count[g] + tr_count[t] - counts, 1.0)
+        bins = len(HOTA_ALPHAS)
+        raw["ass_sum"] = np.bincount(a, weights=counts * ass, minlength=bins)
+        raw["ass_re_sum"] = np.bincount(a, weights=counts * counts / np.maximum(gt_count[g], 1.0), minlength=bins)
+        raw["ass_pr_sum"] = np.bincount(a, weights=counts * counts / np.maximum(tr_count[t], 1.0), minlength=bins)
+
+    if shape[0] and shape[1]:
+        overlaps = _pair_counts(_concat(id_g, np.int64), _concat(id_t, np.int64), None, shape)
+        rows, cols = linear_sum_assignment(-overlaps)
+        raw["idtp"] = float(overlaps[rows, cols].sum())
+    return raw
+
+
+def combine(raws: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum raw counters across sequences."""
+    return {name: sum(raw[name] for raw in raws) for name in _HOTA_FIELDS + _CLEAR_FIELDS}
+
+
+def summarize(raw: Dict[str, Any]) -> Dict[str, float]:
+    """Turn raw counters into the headline metrics (HOTA family averaged over alphas)."""
+    tp = raw["hota_tp"]
+    det_a = tp / np.maximum(tp + raw["hota_fn"] + raw["hota_fp"], 1.0)
+    ass_a = raw["ass_sum"] / np.maximum(tp, 1.0)
+    clear_tp, num_gt, num_pred = raw["tp"], raw["num_gt"], raw["num_pred"]
+    return {
+        "HOTA": float(np.mean(np.sqrt(det_a * ass_a))),
+        "DetA": float(np.mean(det_a)),
+        "AssA": float(np.mean(ass_a)),
+        "DetRe": float(np.mean(tp / max(num_gt, 1.0))),
+        "DetPr": float(np.mean(tp / max(num_pred, 1.0))),
+        "AssRe": float(np.mean(raw["ass_re_sum"] / np.maximum(tp, 1.0))),
+        "AssPr": float(np.mean(raw["ass_pr_sum"] / np.maximum(tp, 1.0))),
+        "LocA": float(np.mean(np.where(tp > 0, raw["loc_sum"] / np.maximum(tp, _EPS), 1.0))),
+        "MOTA": 1.0 - (raw["fn"] + raw["fp"] + raw["idsw"]) / max(num_gt, 1.0),
+        "MOTP": raw["motp_sum"] / max(clear_tp, 1.0),
+        "IDSW": int(raw["idsw"]),
+        "IDF1": 2.0 * raw["idtp"] / max(num_gt + num_pred, 1.0),
+        "IDP": raw["idtp"] / max(num_pred, 1.0),
+        "IDR": raw["idtp"] / max(num_gt, 1.0),
+        "GT_Dets": int(num_gt),
+        "Dets": int(num_pred),
+    }
+
+
+def _load(source: MOTSource) -> np.ndarray:
+    return read_mot_file(source) if isinstance(source, (str, Path)) else np.asarray(source, dtype=float)
+
+
+def _evaluate_item(name: str, gt: MOTSource, pred: MOTSource, iou_threshold: float) -> Tuple[str, Dict[str, Any]]:
+    return name, evaluate_sequence(_load(gt), _load(pred), iou_threshold)
+
+
+def evaluate_sequences(
+    sequences: Dict[str, Tuple[MOTSource, MOTSource]], config: MOTMetricsConfig | None = None
+) -> Dict[str, Any]:
+    """Evaluate ``{name: (gt, pred)}`` (arrays or MOT file paths) across a process pool.
+
+    Returns per-sequence summaries and a ``combined`` summary over all sequences.
+    ``workers=0`` evaluates inline.
+    """
+    cfg = config or MOTMetricsConfig()
+    items = [(name, gt, pred, cfg.iou_threshold) for name, (gt, pred) in sequences.items()]
+    if cfg.workers <= 0 or len(items) <= 1:
+        results = [_evaluate_item(*item) for item in items]
+    else:
+        with ProcessPoolExecutor(max_workers=min(cfg.workers, len(items))) as pool:
+            results = list(pool.map(_evaluate_item, *zip(*items)))
+    raws = dict(results)
+    return {
+        "sequences": {name: summarize(raw) for name, raw in raws.items()},
+        "combined": summarize(combine(list(raws.values()))) if raws else {},
+    }
+
+
+def discover_sequences(gt_dir: str, pred_dir: str) -> Dict[str, Tuple[str, str]]:
+    """Pair ``<pred_dir>/<seq>.txt`` with ``<gt_dir>/<seq>/gt/gt.txt`` (MOTChallenge) or ``<gt_dir>/<seq>.txt``."""
+    pairs = {}
+    for pred in sorted(Path(pred_dir).glob("*.txt")):
+        for gt in (Path(gt_dir) / pred.stem / "gt" / "gt.txt", Path(gt_dir) / pred.name):
+            if gt.exists():
+                pairs[pred.stem] = (str(gt), str(pred))
+                break
+    return pairs
+
+
+def build_mot_metrics_config(config_dict: Optional[Dict[str, Any]] = None) -> MOTMetricsConfig:
+    return MOTMetricsConfig(**(config_dict or {}))
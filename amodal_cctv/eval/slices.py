@@ -1,14 +1,164 @@
 """Occlusion-aware evaluation slice helpers."""
 from __future__ import annotations
 
-from typing import Dict, List
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .tao_amodal_metrics import VisibilityAPAccumulator, VisibilityAPConfig
+
+
+@dataclass
+class SliceConfig:
+    """Slice definitions over a columnar ground-truth table.
+
+    ``occlusion_only`` keeps rows with ``visibility < occlusion_threshold``;
+    ``out_of_fov`` keeps rows whose amodal box has more than ``fov_margin`` of its area
+    outside the image (from ``width``/``height`` columns, or an explicit ``in_fov`` flag).
+    """
+
+    occlusion_threshold: float = 0.8
+    fov_margin: float = 0.0
+    cache_dir: Optional[str] = None
 
 
 def available_slices() -> List[str]:
     return ["full", "occlusion_only", "out_of_fov"]
 
 
-def filter_by_slice(data: Dict[str, object], slice_name: str) -> Dict[str, object]:
+def _is_table(data: Any) -> bool:
+    return isinstance(data, dict) and "boxes" in data and "visibility" in data
+
+
+def outside_fraction(boxes: np.ndarray, width: np.ndarray, height: np.ndarray) -> np.ndarray:
+    """Fraction of each ``xyxy`` box's area lying outside ``[0, width] x [0, height]``."""
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 4)
+    area = np.maximum(boxes[:, 2] - boxes[:, 0], 0) * np.maximum(boxes[:, 3] - boxes[:, 1], 0)
+    iw = np.maximum(np.minimum(boxes[:, 2], width) - np.maximum(boxes[:, 0], 0), 0)
+    ih = np.maximum(np.minimum(boxes[:, 3], height) - np.maximum(boxes[:, 1], 0), 0)
+    out = np.zeros_like(area)
+    np.divide(area - iw * ih, area, out=out, where=area > 0)
+    return out
+
+
+def slice_masks(table: Dict[str, Any], config: SliceConfig | None = None) -> Dict[str, np.ndarray]:
+    """Boolean row masks for every slice in :func:`available_slices`."""
+    cfg = config or SliceConfig()
+    visibility = np.asarray(table["visibility"], dtype=float).reshape(-1)
+    if "in_fov" in table:
+        out_of_fov = ~np.asarray(table["in_fov"], dtype=bool).reshape(-1)
+    elif "width" in table and "height" in table:
+        fraction = outside_fraction(table["boxes"], np.asarray(table["width"]), np.asarray(table["height"]))
+        out_of_fov = fraction > cfg.fov_margin
+    else:
+        out_of_fov = np.zeros(visibility.shape, dtype=bool)
+    return {
+        "full": np.ones(visibility.shape, dtype=bool),
+        "occlusion_only": visibility < cfg.occlusion_threshold,
+        "out_of_fov": out_of_fov,
+    }
+
+
+def table_digest(table: Dict[str, Any], config: SliceConfig) -> str:
+    """Content hash of the columns slices depend on, plus the slice definitions."""
+    digest = hashlib.sha1(json.dumps({k: v for k, v in asdict(config).items() if k != "cache_dir"}).encode("utf-8"))
+    for name in ("boxes", "visibility", "in_fov", "width", "height"):
+        if name in table:
+            column = np.ascontiguousarray(np.asarray(table[name]))
+            digest.update(name.encode("utf-8") + str(column.dtype).encode("utf-8") + column.tobytes())
+    return digest.hexdigest()[:16]
+
+
+class SliceIndex:
+    """Per-sequence slice masks, built once and cached as ``<cache_dir>/<sequence>-<digest>.npz``.
+
+    The digest covers the ground-truth columns and :class:`SliceConfig`, so edited
+    annotations or slice thresholds never reuse stale masks. Without ``cache_dir`` the
+    masks are only memoised in memory.
+    """
+
+    def __init__(self, config: SliceConfig | None = None) -> None:
+        self.config = config or SliceConfig()
+        self._memory: Dict[str, Dict[str, np.ndarray]] = {}
+        self.root = Path(self.config.cache_dir) if self.config.cache_dir else None
+        if self.root is not None:
+            self.root.mkdir(parents=True, exist_ok=True)
+
+    def masks(self, sequence: str, table: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        key = f"{re.sub(r'[^A-Za-z0-9._-]+', '_', sequence)}-{table_digest(table, self.config)}"
+        if key in self._memory:
+            return self._memory[key]
+        path = self.root / f"{key}.npz" if self.root is not None else None
+        if path is not None and path.exists():
+            with np.load(path) as stored:
+                masks = {name: stored[name] for name in stored.files}
+        else:
+            masks = slice_masks(table, self.config)
+            if path is not None:
+                tmp = path.with_suffix(f".{os.getpid()}.tmp.npz")
+                np.savez_compressed(tmp, **masks)
+                os.replace(tmp, path)
+        self._memory[key] = masks
+        return masks
+
+
+def _select(table: Dict[str, Any], mask: np.ndarray) -> Dict[str, Any]:
+    rows = mask.size
+    return {
+        name: np.asarray(column)[mask] if np.ndim(column) and np.shape(column)[0] == rows else column
+        for name, column in table.items()
+    }
+
+
+def filter_by_slice(data: Dict[str, object], slice_name: str, config: SliceConfig | None = None) -> Dict[str, object]:
+    """Rows of a ground-truth table (or ``{sequence: table}``) in ``slice_name``.
+
+    Anything that is not a ground-truth table (for example predictions) passes through.
+    """
     if slice_name not in available_slices():
         raise ValueError(f"Unknown slice: {slice_name}")
-    return data
+    if slice_name == "full":
+        return data
+    if _is_table(data):
+        return _select(data, slice_masks(data, config)[slice_name])
+    return {
+        name: _select(value, slice_masks(value, config)[slice_name]) if _is_table(value) else value
+        for name, value in data.items()
+    }
+
+
+def evaluate_slices(
+    ground_truth: Dict[str, Dict[str, Any]],
+    predictions: Dict[str, Dict[str, Any]],
+    index: SliceIndex | None = None,
+    ap_config: VisibilityAPConfig | None = None,
+) -> Dict[str, Any]:
+    """AP for every slice (and visibility bin) from one matching pass per sequence.
+
+    Each sequence is matched once by :class:`VisibilityAPAccumulator`; slices are
+    applied afterwards as masks over the accumulated ground-truth rows, so adding a
+    slice costs a cumulative-sum pass instead of a full re-evaluation.
+    """
+    index = index or SliceIndex()
+    accumulator = VisibilityAPAccumulator(ap_config)
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name in available_slices()}
+    empty = {"image_id": [], "category_id": [], "boxes": np.empty((0, 4)), "scores": []}
+    for sequence, table in ground_truth.items():
+        accumulator.update(table, predictions.get(sequence, empty))
+        for name, mask in index.masks(sequence, table).items():
+            parts[name].append(mask)
+    masks = {name: np.concatenate(chunks) if chunks else np.zeros(0, bool) for name, chunks in parts.items()}
+    bins = accumulator.bin_masks()
+    bins.pop("all")
+    scores = accumulator.summarize_masks({**masks, **bins})
+    return {
+        "slices": {name: scores[name] for name in masks},
+        "visibility": {name: scores[name] for name in bins},
+        "counts": {name: int(mask.sum()) for name, mask in masks.items()},
+    }
@@ -1,13 +1,240 @@
 """TAO-Amodal specific evaluation helpers."""
 from __future__ import annotations
 
-from typing import Dict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 
-def compute_visibility_binned_ap(predictions: Dict[str, object], ground_truth: Dict[str, object]) -> Dict[str, float]:
-    """Return placeholder AP metrics bucketed by visibility."""
-    return {
-        "visible": 0.0,
-        "partially_occluded": 0.0,
-        "heavily_occluded": 0.0,
-    }
+COCO_IOU_THRESHOLDS = tuple(np.round(np.arange(0.5, 0.96, 0.05), 2).tolist())
+RECALL_THRESHOLDS = np.linspace(0.0, 1.0, 101)
+# Visibility = visible area / amodal area; bins are [low, high).
+VISIBILITY_BINS: Dict[str, Tuple[float, float]] = {
+    "visible": (0.8, np.inf),
+    "partially_occluded": (0.1, 0.8),
+    "heavily_occluded": (-np.inf, 0.1),
+}
+
+
+@dataclass
+class VisibilityAPConfig:
+    iou_thresholds: Tuple[float, ...] = COCO_IOU_THRESHOLDS
+    max_detections: int = 300
+    bins: Dict[str, Tuple[float, float]] = field(default_factory=lambda: dict(VISIBILITY_BINS))
+
+
+def _column(data: Dict[str, Any], name: str, dtype: Any, shape: Tuple[int, ...] = (-1,)) -> np.ndarray:
+    """Required column ``name``; a missing one raises ``KeyError`` naming it."""
+    if name not in data:
+        raise KeyError(f"Table is missing required column {name!r} (has {sorted(data)})")
+    return np.asarray(data[name], dtype=dtype).reshape(shape)
+
+
+def _paired_iou(boxes: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """IoU of ``boxes[i]`` against each of ``candidates[i, j]``; shapes ``(A, 4)`` and ``(A, G, 4)``."""
+    b = boxes[:, None, :]
+    iw = np.maximum(np.minimum(b[..., 2], candidates[..., 2]) - np.maximum(b[..., 0], candidates[..., 0]), 0)
+    ih = np.maximum(np.minimum(b[..., 3], candidates[..., 3]) - np.maximum(b[..., 1], candidates[..., 1]), 0)
+    inter = iw * ih
+    area_b = np.maximum(b[..., 2] - b[..., 0], 0) * np.maximum(b[..., 3] - b[..., 1], 0)
+    area_c = np.maximum(candidates[..., 2] - candidates[..., 0], 0) * np.maximum(
+        candidates[..., 3] - candidates[..., 1], 0
+    )
+    union = area_b + area_c - inter
+    out = np.zeros_like(inter)
+    np.divide(inter, union, out=out, where=union > 0)
+    return out
+
+
+def _ranks(groups: np.ndarray) -> np.ndarray:
+    """Position of each element within its run of equal, already-sorted ``groups``."""
+    if groups.size == 0:
+        return np.empty((0,), dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    counts = np.diff(np.r_[starts, groups.size])
+    return np.arange(groups.size) - np.repeat(starts, counts)
+
+
+def match_detections(
+    gt: Dict[str, Any], predictions: Dict[str, Any], iou_thresholds: Tuple[float, ...], max_detections: int = 300
+) -> Dict[str, np.ndarray]:
+    """Greedy COCO matching for a batch of complete images, vectorized across images.
+
+    Predictions are processed by rank within their (image, category) group: step ``r``
+    matches every group's ``r``-th highest-scoring prediction at once, for all IoU
+    thresholds, against that group's still-unmatched ground truth (highest IoU wins).
+    Only the top ``max_detections`` predictions per image are kept. Returns the kept
+    predictions' ``category``, ``score`` and ``match`` (``(P, T)`` ground-truth row, -1
+    when unmatched).
+    """
+    gt_image = _column(gt, "image_id", np.int64)
+    gt_cat = _column(gt, "category_id", np.int64)
+    gt_box = _column(gt, "boxes", float, (-1, 4))
+    image = _column(predictions, "image_id", np.int64)
+    cat = _column(predictions, "category_id", np.int64)
+    box = _column(predictions, "boxes", float, (-1, 4))
+    score = _column(predictions, "scores", float)
+    thresholds = np.asarray(iou_thresholds, dtype=float)
+
+    order = np.lexsort((-score, image))
+    keep = order[_ranks(image[order]) < max_detections]
+    image, cat, box, score = image[keep], cat[keep], box[keep], score[keep]
+    match = np.full((image.size, thresholds.size), -1, dtype=np.int64)
+    if image.size == 0 or gt_image.size == 0:
+        return {"category": cat, "score": score, "match": match}
+
+    # Dense (image, category) group ids shared by ground truth and predictions.
+    pairs = np.stack([np.r_[gt_image, image], np.r_[gt_cat, cat]], axis=1)
+    _, group = np.unique(pairs, axis=0, return_inverse=True)
+    group = group.reshape(-1)
+    gt_group, pred_group = group[: gt_image.size], group[gt_image.size :]
+
+    gt_order = np.argsort(gt_group, kind="stable")
+    gt_slot = _ranks(gt_group[gt_order])
+    n_groups, width = int(group.max()) + 1, int(gt_slot.max()) + 1
+    padded = np.zeros((n_groups, width, 4))
+    rows = np.full((n_groups, width), -1, dtype=np.int64)
+    padded[gt_group[gt_order], gt_slot] = gt_box[gt_order]
+    rows[gt_group[gt_order], gt_slot] = gt_order
+    taken = np.zeros((thresholds.size, n_groups, width), dtype=bool)
+
+    pred_order = np.lexsort((-score, pred_group))
+    pred_rank = np.empty_like(pred_order)
+    pred_rank[pred_order] = _ranks(pred_group[pred_order])
+    by_rank = np.argsort(pred_rank, kind="stable")
+    bounds = np.searchsorted(pred_rank[by_rank], np.arange(int(pred_rank.max()) + 2))
+    for r in range(bounds.size - 1):
+        active = by_rank[bounds[r] : bounds[r + 1]]
+        g = pred_group[active]
+        iou = np.where(rows[g] >= 0, _paired_iou(box[active], padded[g]), -1.0)
+        # (T, A, G): candidates above each threshold that are still free.
+        free = (iou[None] >= thresholds[:, None, None] - 1e-10) & ~taken[:, g, :]
+        best = np.where(free, iou[None], -1.0).argmax(axis=2)
+        ok = np.take_along_axis(free, best[..., None], axis=2)[..., 0]
+        t_idx, a_idx = np.nonzero(ok)
+        slot = best[t_idx, a_idx]
+        taken[t_idx, g[a_idx], slot] = True
+        match[active[a_idx], t_idx] = rows[g[a_idx], slot]
+    return {"category": cat, "score": score, "match": match}
+
+
+def _segment_ap(category: np.ndarray, tp: np.ndarray, fp: np.ndarray, npos: np.ndarray) -> np.ndarray:
+    """101-point interpolated AP per category; inputs are sorted by (category, -score).
+
+    Every category is processed in one pass: offsetting each category's values by
+    ``2 * segment`` keeps segmented cumulative maxima and recall lookups global.
+    """
+    n_cat = npos.size
+    if category.size == 0:
+        return np.zeros(n_cat)
+    starts = np.searchsorted(category, np.arange(n_cat))
+    ends = np.searchsorted(category, np.arange(n_cat), side="right")
+    # Segmented cumulative sums: global running totals minus the total before each segment.
+    ctp, cfp = np.cumsum(tp), np.cumsum(fp)
+    ctp = ctp - np.r_[0.0, ctp][starts][category]
+    cfp = cfp - np.r_[0.0, cfp][starts][category]
+    recall = ctp / np.maximum(npos[category], 1)
+    precision = ctp / np.maximum(ctp + cfp, np.finfo(float).eps)
+    # Precision envelope: running max from the right, per category.
+    offset = 2.0 * (n_cat - 1 - category)
+    envelope = np.maximum.accumulate((precision + offset)[::-1])[::-1] - offset
+    queries = RECALL_THRESHOLDS[None, :] + 2.0 * np.arange(n_cat)[:, None]
+    idx = np.searchsorted(recall + 2.0 * category, queries, side="left")
+    valid = idx < ends[:, None]
+    return np.where(valid, envelope[np.minimum(idx, category.size - 1)], 0.0).mean(axis=1)
+
+
+class VisibilityAPAccumulator:
+    """Streaming AP accumulator bucketed by ground-truth visibility.
+
+    :meth:`update` takes ground truth and predictions for a batch of *complete* images
+    (any number of images per call), matches them once with :func:`match_detections`
+    and keeps only compact per-prediction results plus per-ground-truth attributes, so
+    memory grows with the number of boxes rather than with images or IoU work.
+
+    Binning is applied at :meth:`summarize` time: a prediction matched to ground truth
+    in the bin is a true positive, one matched to ground truth outside the bin is
+    ignored, and an unmatched prediction is a false positive in every bin. AP is the
+    mean over categories with ground truth in the bin and over IoU thresholds.
+    """
+
+    def __init__(self, config: VisibilityAPConfig | None = None) -> None:
+        self.config = config or VisibilityAPConfig()
+        self._gt: Dict[str, List[np.ndarray]] = {"category": [], "visibility": []}
+        self._pred: Dict[str, List[np.ndarray]] = {"category": [], "score": [], "match": []}
+        self.num_gt = 0
+        self.num_images = 0
+
+    def update(self, gt: Dict[str, Any], predictions: Dict[str, Any]) -> None:
+        result = match_detections(gt, predictions, self.config.iou_thresholds, self.config.max_detections)
+        gt_cat = _column(gt, "category_id", np.int64)
+        visibility = _column(gt, "visibility", np.float32) if "visibility" in gt else np.ones(gt_cat.size, np.float32)
+        result["match"][result["match"] >= 0] += self.num_gt
+        result["match"] = result["match"].astype(np.int32)
+        self._gt["category"].append(gt_cat)
+        self._gt["visibility"].append(visibility)
+        for name in self._pred:
+            self._pred[name].append(result[name])
+        self.num_gt += gt_cat.size
+        images = np.r_[_column(gt, "image_id", np.int64), _column(predictions, "image_id", np.int64)]
+        self.num_images += np.unique(images).size
+
+    def _columns(self) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        t = len(self.config.iou_thresholds)
+        empty = {"category": np.empty(0, np.int64), "visibility": np.empty(0, np.float32), "score": np.empty(0)}
+        gt = {name: np.concatenate(parts) if parts else empty[name] for name, parts in self._gt.items()}
+        pred = {
+            name: np.concatenate(parts) if parts else (np.empty((0, t), np.int32) if name == "match" else empty[name])
+            for name, parts in self._pred.items()
+        }
+        return gt, pred
+
+    def summarize_masks(self, masks: Dict[str, np.ndarray]) -> Dict[str, float]:
+        """AP for arbitrary ground-truth subsets, given as boolean masks over accumulated rows."""
+        gt, pred = self._columns()
+        categories, gt_cat = np.unique(gt["category"], return_inverse=True)
+        # Predictions for categories without any ground truth cannot affect AP.
+        known = np.flatnonzero(np.isin(pred["category"], categories))
+        pred_cat = np.searchsorted(categories, pred["category"])
+        order = known[np.lexsort((-pred["score"][known], pred_cat[known]))]
+        sorted_cat, match = pred_cat[order], pred["match"][order]
+        results = {}
+        for name, mask in masks.items():
+            npos = np.bincount(gt_cat[mask], minlength=categories.size)
+            present = npos > 0
+            if not present.any():
+                results[name] = float("nan")
+                continue
+            per_threshold = []
+            for t in range(match.shape[1]):
+                matched = match[:, t] >= 0
+                in_slice = np.zeros(matched.shape, dtype=bool)
+                in_slice[matched] = mask[match[matched, t]]
+                ap = _segment_ap(sorted_cat, in_slice.astype(float), (~matched).astype(float), npos)
+                per_threshold.append(ap[present].mean())
+            results[name] = float(np.mean(per_threshold))
+        return results
+
+    def bin_masks(self) -> Dict[str, np.ndarray]:
+        visibility = self._columns()[0]["visibility"]
+        masks = {"all": np.ones(visibility.shape, dtype=bool)}
+        for name, (low, high) in self.config.bins.items():
+            masks[name] = (visibility >= low) & (visibility < high)
+        return masks
+
+    def summarize(self) -> Dict[str, float]:
+        return self.summarize_masks(self.bin_masks())
+
+
+def compute_visibility_binned_ap(
+    predictions: Dict[str, object], ground_truth: Dict[str, object], config: Optional[VisibilityAPConfig] = None
+) -> Dict[str, float]:
+    """AP bucketed by visibility over columnar inputs.
+
+    ``ground_truth`` has ``image_id``, ``category_id``, ``boxes`` (amodal, xyxy) and
+    ``visibility``; ``predictions`` has ``image_id``, ``category_id``, ``boxes`` and
+    ``scores``. Bins without ground truth report ``nan``.
+    """
+    accumulator = VisibilityAPAccumulator(config)
+    accumulator.update(ground_truth, predictions)
+    return accumulator.summarize()
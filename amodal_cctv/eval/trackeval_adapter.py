@@ -2,17 +2,109 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# MOTChallenge columns: frame, id, x, y, w, h, conf, then three unused world coordinates.
+MOT_COLUMNS = 10
+_MOT_FORMAT = ["%d", "%d", "%.2f", "%.2f", "%.2f", "%.2f", "%.4f", "%d", "%d", "%d"]
 
 
 @dataclass
 class TrackEvalConfig:
     eval_dir: str = "outputs/trackeval"
+    tracker_name: str = "amodal_cctv"
+    flush_every: int = 64
+
+
+def tracks_to_mot_rows(frame: int, tracks: Any, confirmed_only: bool = True) -> np.ndarray:
+    """MOTChallenge rows for one frame of tracker output (``frame`` is 1-based)."""
+    keep = np.ones(len(tracks), dtype=bool)
+    if confirmed_only and len(tracks):
+        keep = np.asarray(tracks.is_confirmed, dtype=bool) & (np.asarray(tracks.time_since_update) == 0)
+    boxes = np.asarray(tracks.box, dtype=float).reshape(-1, 4)[keep]
+    rows = np.full((boxes.shape[0], MOT_COLUMNS), -1.0)
+    rows[:, 0] = frame
+    rows[:, 1] = np.asarray(tracks.track_id)[keep]
+    rows[:, 2:4] = boxes[:, :2]
+    rows[:, 4:6] = boxes[:, 2:] - boxes[:, :2]
+    rows[:, 6] = np.asarray(tracks.score, dtype=float)[keep]
+    return rows
+
+
+class MOTWriter:
+    """Append MOTChallenge rows to ``path`` as frames finish.
+
+    Rows are buffered for ``flush_every`` frames and then written as one block, so
+    memory stays bounded by the flush window rather than the sequence length.
+    """
+
+    def __init__(self, path: str, flush_every: int = 64, confirmed_only: bool = True) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = max(int(flush_every), 1)
+        self.confirmed_only = confirmed_only
+        self._handle = self.path.open("w")
+        self._pending: List[np.ndarray] = []
+        self.frames = 0
+        self.rows = 0
+
+    def write(self, frame: int, tracks: Any) -> None:
+        self._pending.append(tracks_to_mot_rows(frame, tracks, self.confirmed_only))
+        self.frames += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        block = np.concatenate(self._pending)
+        self._pending = []
+        if block.size:
+            np.savetxt(self._handle, block, fmt=_MOT_FORMAT, delimiter=",")
+            self.rows += block.shape[0]
+        self._handle.flush()
+
+    def close(self) -> None:
+        if not self._handle.closed:
+            self.flush()
+            self._handle.close()
+
+    def __enter__(self) -> "MOTWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def read_mot_file(path: str) -> np.ndarray:
+    """Load a MOTChallenge text file as an ``(N, >=7)`` float array (empty files give ``(0, 10)``)."""
+    rows = np.loadtxt(path, delimiter=",", ndmin=2) if Path(path).stat().st_size else np.empty((0, MOT_COLUMNS))
+    return rows.reshape(-1, rows.shape[1] if rows.size else MOT_COLUMNS)
+
+
+def sequence_path(config: TrackEvalConfig, sequence: str) -> Path:
+    """``<eval_dir>/<tracker_name>/data/<sequence>.txt``, the layout TrackEval expects."""
+    return Path(config.eval_dir) / config.tracker_name / "data" / f"{sequence}.txt"
 
 
-def format_for_trackeval(seqs: Dict[str, object], config: TrackEvalConfig | None = None) -> Dict[str, object]:
+def format_for_trackeval(
+    seqs: Dict[str, Optional[Iterable[Tuple[int, Any]]]], config: TrackEvalConfig | None = None
+) -> Dict[str, object]:
+    """Stream each sequence's ``(frame, tracks)`` pairs into TrackEval's tracker layout."""
     cfg = config or TrackEvalConfig()
+    files = {}
+    for name, frames in seqs.items():
+        if frames is None:
+            continue
+        with MOTWriter(str(sequence_path(cfg, name)), flush_every=cfg.flush_every) as writer:
+            for frame, tracks in frames:
+                writer.write(frame, tracks)
+        files[name] = str(writer.path)
     return {
         "eval_dir": cfg.eval_dir,
         "sequences": list(seqs.keys()),
+        "files": files,
     }
@@ -2,6 +2,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
 
 
 @dataclass
@@ -9,6 +12,7 @@ class ExistenceConfig:
     alpha_decay: float = 0.94
     boost_on_detection: float = 0.2
     min_probability: float = 0.01
+    retire_probability: float = 0.05
 
 
 class ExistenceFilter:
@@ -25,3 +29,62 @@ class ExistenceFilter:
     def boost(self) -> float:
         self.probability = min(1.0, self.probability + self.config.boost_on_detection)
         return self.probability
+
+
+class ExistenceBank:
+    """Existence probabilities for every track in one array.
+
+    Row ``i`` belongs to the caller's ``i``-th live track; :meth:`add` appends and
+    :meth:`remove` compacts stably so the bank stays aligned with a columnar track store.
+    """
+
+    def __init__(self, config: ExistenceConfig | None = None, capacity: int = 64) -> None:
+        self.config = config or ExistenceConfig()
+        self._probability = np.ones((max(int(capacity), 1),), dtype=float)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def probability(self) -> np.ndarray:
+        return self._probability[: self._size]
+
+    def add(self, count: int, initial: float = 1.0) -> np.ndarray:
+        needed = self._size + count
+        if needed > self._probability.shape[0]:
+            grown = np.ones((max(needed, 2 * self._probability.shape[0]),), dtype=float)
+            grown[: self._size] = self._probability[: self._size]
+            self._probability = grown
+        rows = np.arange(self._size, needed)
+        self._probability[rows] = initial
+        self._size = needed
+        return rows
+
+    def remove(self, mask: np.ndarray) -> None:
+        keep = np.flatnonzero(~np.asarray(mask, dtype=bool))
+        self._probability[: keep.size] = self._probability[keep]
+        self._size = keep.size
+
+    def decay(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        probability = self.probability
+        target = slice(None) if mask is None else np.asarray(mask, dtype=bool)
+        probability[target] = np.maximum(self.config.min_probability, probability[target] * self.config.alpha_decay)
+        return probability
+
+    def boost(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        probability = self.probability
+        target = slice(None) if mask is None else np.asarray(mask, dtype=bool)
+        probability[target] = np.minimum(1.0, probability[target] + self.config.boost_on_detection)
+        return probability
+
+    def step(self, detected: np.ndarray) -> np.ndarray:
+        """Boost detected tracks, decay the rest, and return rows below ``retire_probability``."""
+        detected = np.asarray(detected, dtype=bool)
+        probability = self.probability
+        probability[:] = np.where(
+            detected,
+            np.minimum(1.0, probability + self.config.boost_on_detection),
+            np.maximum(self.config.min_probability, probability * self.config.alpha_decay),
+        )
+        return np.flatnonzero(probability < self.config.retire_probability)
@@ -22,3 +22,61 @@ def mahalanobis_gate(residual: np.ndarray, covariance: np.ndarray, dt: int, conf
         "threshold": threshold,
         "accepted": distance <= threshold,
     }
+
+
+def gate_thresholds(dt: np.ndarray | float, config: GatingConfig) -> np.ndarray:
+    """Squared gate radius per track, widened linearly with frames since the last update."""
+    return (config.base_sigma + config.time_widen_coeff * np.asarray(dt, dtype=float)) ** 2
+
+
+def whitening_factors(covariances: np.ndarray) -> np.ndarray:
+    """Return ``W`` per track with ``W^T W = S^-1`` so that ``|W r|^2`` is the Mahalanobis distance.
+
+    Uses the inverse Cholesky factor; if any covariance is not positive definite the
+    batch falls back to an eigen-decomposition pseudo-inverse square root, which
+    matches ``pinv`` on the degenerate directions.
+    """
+    covariances = np.asarray(covariances, dtype=float)
+    try:
+        return np.linalg.inv(np.linalg.cholesky(covariances))
+    except np.linalg.LinAlgError:
+        eigvals, eigvecs = np.linalg.eigh(covariances)
+        cutoff = eigvals.max(axis=-1, keepdims=True) * covariances.shape[-1] * np.finfo(float).eps
+        inv_sqrt = np.zeros_like(eigvals)
+        positive = eigvals > cutoff
+        inv_sqrt[positive] = 1.0 / np.sqrt(eigvals[positive])
+        return inv_sqrt[..., :, None] * np.swapaxes(eigvecs, -1, -2)
+
+
+def pairwise_residuals(track_means: np.ndarray, measurements: np.ndarray) -> np.ndarray:
+    """``(N, M, d)`` residuals of every detection measurement against every track mean."""
+    return np.asarray(measurements, dtype=float)[None, :, :] - np.asarray(track_means, dtype=float)[:, None, :]
+
+
+def mahalanobis_gate_batch(
+    residuals: np.ndarray,
+    dt: np.ndarray | float,
+    config: GatingConfig,
+    covariances: np.ndarray | None = None,
+    factors: np.ndarray | None = None,
+) -> Dict[str, np.ndarray]:
+    """Gate an ``(N, M, d)`` residual tensor against N track covariances in one call.
+
+    Pass ``factors`` from :func:`whitening_factors` to reuse them across several gating
+    calls in the same frame; otherwise they are computed once from ``covariances``.
+    Returns the ``(N, M)`` squared distances, the per-track ``(N,)`` thresholds and
+    the ``(N, M)`` acceptance mask.
+    """
+    residuals = np.asarray(residuals, dtype=float)
+    if factors is None:
+        if covariances is None:
+            raise ValueError("Either covariances or precomputed factors are required.")
+        factors = whitening_factors(covariances)
+    whitened = np.einsum("nij,nmj->nmi", factors, residuals)
+    distance = np.einsum("nmi,nmi->nm", whitened, whitened)
+    threshold = np.broadcast_to(gate_thresholds(dt, config), (residuals.shape[0],))
+    return {
+        "distance": distance,
+        "threshold": threshold,
+        "accepted": distance <= threshold[:, None],
+    }
@@ -1,8 +1,13 @@
 """Occlusion interval logging utilities."""
 from __future__ import annotations
 
+import json
+import os
 from dataclasses import dataclass, field
-from typing import List
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
 
 
 @dataclass
@@ -13,18 +18,172 @@ class OcclusionInterval:
     cause: str | None = None
 
 
+@dataclass
+class _IntervalShard:
+    """Closed intervals sorted by start frame, held in memory or memory-mapped from disk."""
+
+    records: np.ndarray
+    min_start: int
+    max_end: int
+    max_length: int
+
+    @classmethod
+    def from_columns(cls, track_ids: List[int], starts: List[int], ends: List[int], causes: List[str]) -> "_IntervalShard":
+        width = max([1] + [len(c) for c in causes])
+        records = np.empty(
+            len(starts), dtype=[("track_id", np.int64), ("start", np.int64), ("end", np.int64), ("cause", f"U{width}")]
+        )
+        records["track_id"], records["start"], records["end"], records["cause"] = track_ids, starts, ends, causes
+        records.sort(order="start", kind="stable")
+        return cls(
+            records=records,
+            min_start=int(records["start"][0]),
+            max_end=int(records["end"].max()),
+            max_length=int((records["end"] - records["start"]).max()),
+        )
+
+    def overlapping(self, first: int, last: int) -> np.ndarray:
+        """Rows whose ``[start, end]`` intersects ``[first, last]``."""
+        if self.max_end < first or self.min_start > last:
+            return self.records[:0]
+        starts = self.records["start"]
+        # Only intervals starting within max_length of ``first`` can still be open at ``first``.
+        lo = np.searchsorted(starts, first - self.max_length, side="left")
+        hi = np.searchsorted(starts, last, side="right")
+        window = self.records[lo:hi]
+        return window[window["end"] >= first]
+
+
 @dataclass
 class IntervalLogger:
-    intervals: List[OcclusionInterval] = field(default_factory=list)
+    """Streaming occlusion interval log with O(1) start/end.
+
+    Open intervals are indexed by track id. Closed intervals are buffered in columns
+    and, once ``chunk_size`` accumulate, sorted into a shard. With ``sink_dir`` set,
+    shards are written as memory-mapped ``.npy`` files listed in ``index.jsonl``, so
+    resident memory stays bounded on day-long runs; otherwise they stay in memory.
+    :meth:`close` (or leaving a ``with`` block) seals the buffer and saves still-open
+    intervals to ``open.json``; reopening the same ``sink_dir`` resumes both.
+    """
+
+    sink_dir: Optional[str] = None
+    chunk_size: int = 4096
+    _open: Dict[int, OcclusionInterval] = field(default_factory=dict, init=False, repr=False)
+    _buffer: Dict[str, list] = field(default_factory=lambda: _empty_buffer(), init=False, repr=False)
+    _shards: List[_IntervalShard] = field(default_factory=list, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.sink_dir is None:
+            return
+        sink = Path(self.sink_dir)
+        sink.mkdir(parents=True, exist_ok=True)
+        manifest = sink / "index.jsonl"
+        if manifest.exists():
+            for line in manifest.read_text().splitlines():
+                entry = json.loads(line)
+                records = np.load(sink / entry["file"], mmap_mode="r")
+                self._shards.append(
+                    _IntervalShard(records, entry["min_start"], entry["max_end"], entry["max_length"])
+                )
+        pending = sink / "open.json"
+        if pending.exists():
+            for entry in json.loads(pending.read_text()):
+                self._open[entry["track_id"]] = OcclusionInterval(**entry)
+            # Consumed: the next close() rewrites it, so a crash cannot resurrect intervals ended since.
+            pending.unlink()
+
+    def __enter__(self) -> "IntervalLogger":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
     def start(self, track_id: int, frame: int, cause: str | None = None) -> None:
-        self.intervals.append(OcclusionInterval(track_id=track_id, start_frame=frame, cause=cause))
+        """Open an interval; a track that is already occluded keeps its current interval."""
+        if track_id not in self._open:
+            self._open[track_id] = OcclusionInterval(track_id=track_id, start_frame=frame, cause=cause)
 
     def end(self, track_id: int, frame: int) -> None:
-        for interval in reversed(self.intervals):
-            if interval.track_id == track_id and interval.end_frame is None:
-                interval.end_frame = frame
-                break
+        interval = self._open.pop(track_id, None)
+        if interval is None:
+            return
+        self._buffer["track_id"].append(interval.track_id)
+        self._buffer["start"].append(interval.start_frame)
+        self._buffer["end"].append(frame)
+        self._buffer["cause"].append(interval.cause or "")
+        if len(self._buffer["start"]) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Seal buffered closed intervals into a shard (and write it when a sink is set)."""
+        if not self._buffer["start"]:
+            return
+        shard = _IntervalShard.from_columns(
+            self._buffer["track_id"], self._buffer["start"], self._buffer["end"], self._buffer["cause"]
+        )
+        self._buffer = _empty_buffer()
+        if self.sink_dir is not None:
+            sink = Path(self.sink_dir)
+            name = f"intervals_{len(self._shards):06d}.npy"
+            np.save(sink / name, shard.records)
+            entry = {
+                "file": name,
+                "count": int(shard.records.shape[0]),
+                "min_start": shard.min_start,
+                "max_end": shard.max_end,
+                "max_length": shard.max_length,
+            }
+            with (sink / "index.jsonl").open("a") as handle:
+                handle.write(json.dumps(entry) + "\n")
+            shard.records = np.load(sink / name, mmap_mode="r")
+        self._shards.append(shard)
+
+    def close(self) -> None:
+        """Seal buffered intervals and, with a sink, persist the open ones for the next run."""
+        self.flush()
+        if self.sink_dir is None or not self._open:
+            return
+        target = Path(self.sink_dir) / "open.json"
+        temporary = target.with_suffix(".json.tmp")
+        temporary.write_text(json.dumps([interval.__dict__ for interval in self._open.values()]))
+        os.replace(temporary, target)
+
+    def open_intervals(self) -> List[OcclusionInterval]:
+        return list(self._open.values())
+
+    def _all_shards(self) -> List[_IntervalShard]:
+        """Sealed shards plus a transient one over the unsealed buffer (not persisted)."""
+        if not self._buffer["start"]:
+            return self._shards
+        pending = _IntervalShard.from_columns(
+            self._buffer["track_id"], self._buffer["start"], self._buffer["end"], self._buffer["cause"]
+        )
+        return self._shards + [pending]
+
+    def query(self, first_frame: int, last_frame: int) -> List[OcclusionInterval]:
+        """Intervals overlapping frames ``[first_frame, last_frame]``, still-open ones included."""
+        found: List[OcclusionInterval] = []
+        for shard in self._all_shards():
+            found.extend(_to_intervals(shard.overlapping(first_frame, last_frame)))
+        found.extend(interval for interval in self._open.values() if interval.start_frame <= last_frame)
+        found.sort(key=lambda interval: (interval.start_frame, interval.track_id))
+        return found
 
     def to_serializable(self) -> List[dict]:
-        return [interval.__dict__ for interval in self.intervals]
+        intervals: List[OcclusionInterval] = []
+        for shard in self._all_shards():
+            intervals.extend(_to_intervals(shard.records))
+        intervals.extend(self._open.values())
+        intervals.sort(key=lambda interval: (interval.start_frame, interval.track_id))
+        return [interval.__dict__ for interval in intervals]
+
+
+def _empty_buffer() -> Dict[str, list]:
+    return {"track_id": [], "start": [], "end": [], "cause": []}
+
+
+def _to_intervals(records: np.ndarray) -> List[OcclusionInterval]:
+    return [
+        OcclusionInterval(track_id=int(t), start_frame=int(s), end_frame=int(e), cause=str(c) or None)
+        for t, s, e, c in zip(records["track_id"], records["start"], records["end"], records["cause"])
+    ]
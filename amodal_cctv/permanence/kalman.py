@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Tuple
+from typing import Dict, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
@@ -16,24 +16,64 @@ class KalmanConfig:
     covariance_inflation: float = 1.05
 
 
+def _transition(dt: np.ndarray, position_dim: int) -> np.ndarray:
+    """Stacked constant-velocity transition matrices, one per entry of ``dt``."""
+    dim = 2 * position_dim
+    transition = np.broadcast_to(np.eye(dim), (dt.shape[0], dim, dim)).copy()
+    idx = np.arange(position_dim)
+    transition[:, idx, idx + position_dim] = dt[:, None]
+    return transition
+
+
+def _process_noise(dt: np.ndarray, position_dim: int, scale: float) -> np.ndarray:
+    """Discrete white-noise-acceleration covariance per axis, stacked over ``dt``."""
+    dim = 2 * position_dim
+    noise = np.zeros((dt.shape[0], dim, dim))
+    idx = np.arange(position_dim)
+    dt = dt[:, None]
+    noise[:, idx, idx] = scale * dt**4 / 4.0
+    noise[:, idx, idx + position_dim] = scale * dt**3 / 2.0
+    noise[:, idx + position_dim, idx] = scale * dt**3 / 2.0
+    noise[:, idx + position_dim, idx + position_dim] = scale * dt**2
+    return noise
+
+
 class KalmanPermanenceFilter:
-    """Simple constant-velocity Kalman filter stub."""
+    """Single-track constant-velocity Kalman filter.
+
+    The state stacks ``position_dim`` measured coordinates with their velocities.
+    Covariance is inflated before the motion step while the track is occluded so that
+    gates widen the longer an object stays hidden.
+    """
 
     def __init__(self, config: KalmanConfig) -> None:
+        if config.position_dim != config.velocity_dim:
+            raise ValueError("Constant-velocity model needs one velocity per position coordinate.")
         self.config = config
         dim = config.position_dim + config.velocity_dim
         self.state = np.zeros((dim, 1))
         self.covariance = np.eye(dim)
 
-    def predict(self) -> Tuple[np.ndarray, np.ndarray]:
-        self.covariance *= self.config.covariance_inflation
+    def predict(self, dt: float = 1.0, occluded: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        dt_arr = np.array([float(dt)])
+        transition = _transition(dt_arr, self.config.position_dim)[0]
+        if occluded:
+            self.covariance *= self.config.covariance_inflation
+        self.state = transition @ self.state
+        self.covariance = (
+            transition @ self.covariance @ transition.T
+            + _process_noise(dt_arr, self.config.position_dim, self.config.process_noise)[0]
+        )
         return self.state, self.covariance
 
     def update(self, measurement: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
-        self.state[: self.config.position_dim] = measurement.reshape(-1, 1)
-        self.covariance[: self.config.position_dim, : self.config.position_dim] = (
-            np.eye(self.config.position_dim) * self.config.measurement_noise
-        )
+        p = self.config.position_dim
+        residual = measurement.reshape(-1, 1) - self.state[:p]
+        innovation = self.covariance[:p, :p] + np.eye(p) * self.config.measurement_noise
+        gain = np.linalg.solve(innovation, self.covariance[:p, :]).T
+        self.state = self.state + gain @ residual
+        self.covariance = self.covariance - gain @ self.covariance[:p, :]
+        self.covariance = 0.5 * (self.covariance + self.covariance.T)
         return self.state, self.covariance
 
     def to_dict(self) -> Dict[str, float]:
@@ -44,6 +84,152 @@ class KalmanPermanenceFilter:
         }
 
 
+class BatchedKalmanFilter:
+    """Constant-velocity Kalman engine holding every track in stacked arrays.
+
+    States live in an ``(N, 8)`` array and covariances in ``(N, 8, 8)``; predict and
+    update are single batched ``matmul``/``einsum`` calls. Rows are compacted on
+    removal and ``track_id`` gives the owning track of each row.
+    """
+
+    def __init__(self, config: KalmanConfig, capacity: int = 64) -> None:
+        if config.position_dim != config.velocity_dim:
+            raise ValueError("Constant-velocity model needs one velocity per position coordinate.")
+        self.config = config
+        self.dim = config.position_dim + config.velocity_dim
+        capacity = max(int(capacity), 1)
+        self._state = np.zeros((capacity, self.dim))
+        self._covariance = np.zeros((capacity, self.dim, self.dim))
+        self._track_id = np.zeros((capacity,), dtype=np.int64)
+        self._row_of: Dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def state(self) -> np.ndarray:
+        return self._state[: self._size]
+
+    @property
+    def covariance(self) -> np.ndarray:
+        return self._covariance[: self._size]
+
+    @property
+    def track_id(self) -> np.ndarray:
+        return self._track_id[: self._size]
+
+    def rows_of(self, track_ids: Sequence[int]) -> np.ndarray:
+        return np.fromiter((self._row_of[int(t)] for t in track_ids), dtype=np.int64, count=len(track_ids))
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= self._state.shape[0]:
+            return
+        capacity = max(needed, 2 * self._state.shape[0])
+        for name in ("_state", "_covariance", "_track_id"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity, *old.shape[1:]), dtype=old.dtype)
+            grown[: self._size] = old[: self._size]
+            setattr(self, name, grown)
+
+    def add(self, track_ids: Sequence[int], measurements: np.ndarray) -> np.ndarray:
+        """Start filters at ``measurements`` with zero velocity; return their rows."""
+        measurements = np.asarray(measurements, dtype=float).reshape(-1, self.config.position_dim)
+        count = measurements.shape[0]
+        self._reserve(count)
+        rows = np.arange(self._size, self._size + count)
+        self._state[rows] = 0.0
+        self._state[rows, : self.config.position_dim] = measurements
+        self._covariance[rows] = np.eye(self.dim)
+        self._track_id[rows] = np.asarray(track_ids, dtype=np.int64)
+        for row, track_id in zip(rows.tolist(), self._track_id[rows].tolist()):
+            self._row_of[track_id] = row
+        self._size += count
+        return rows
+
+    def remove(self, mask: np.ndarray) -> None:
+        """Drop rows selected by ``mask`` and compact the remainder in order."""
+        mask = np.asarray(mask, dtype=bool)
+        if not mask.any():
+            return
+        keep = np.flatnonzero(~mask)
+        for array in (self._state, self._covariance, self._track_id):
+            array[: keep.size] = array[keep]
+        self._size = keep.size
+        self._row_of = {int(t): row for row, t in enumerate(self._track_id[: self._size].tolist())}
+
+    def predict(
+        self,
+        dt: Union[float, np.ndarray] = 1.0,
+        occluded: Optional[np.ndarray] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance every track (or only ``rows``) by its own ``dt``; inflate covariance where ``occluded``.
+
+        ``occluded=None`` inflates every track, matching the single-track default.
+        """
+        if rows is None:
+            state, covariance = self.state, self.covariance
+        else:
+            rows = np.asarray(rows, dtype=np.int64)
+            state, covariance = self._state[rows], self._covariance[rows]
+        n = state.shape[0]
+        dt_arr = np.broadcast_to(np.asarray(dt, dtype=float), (n,))
+        if occluded is None:
+            covariance *= self.config.covariance_inflation
+        else:
+            covariance[np.asarray(occluded, dtype=bool)] *= self.config.covariance_inflation
+        # F = [[I, dt I], [0, I]], so F P F^T expands blockwise without 8x8 matmuls.
+        p = self.config.position_dim
+        step = dt_arr[:, None]
+        state[:, :p] += step * state[:, p:]
+        pos_vel = covariance[:, :p, p:]
+        vel_vel = covariance[:, p:, p:]
+        dt3 = dt_arr[:, None, None]
+        covariance[:, :p, :p] += dt3 * (pos_vel + covariance[:, p:, :p]) + dt3**2 * vel_vel
+        covariance[:, :p, p:] += dt3 * vel_vel
+        covariance[:, p:, :p] += dt3 * vel_vel
+        covariance += _process_noise(dt_arr, p, self.config.process_noise)
+        if rows is not None:
+            self._state[rows] = state
+            self._covariance[rows] = covariance
+        return state, covariance
+
+    def project(self, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Measurement-space mean ``(K, p)`` and innovation covariance ``(K, p, p)``."""
+        p = self.config.position_dim
+        rows = np.arange(self._size) if rows is None else np.asarray(rows, dtype=np.int64)
+        innovation = self._covariance[rows, :p, :p] + np.eye(p) * self.config.measurement_noise
+        return self._state[rows, :p], innovation
+
+    def update(self, rows: np.ndarray, measurements: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Correct ``rows`` with their matched ``measurements`` in one batched solve."""
+        rows = np.asarray(rows, dtype=np.int64)
+        p = self.config.position_dim
+        if rows.size == 0:
+            return self._state[rows], self._covariance[rows]
+        measurements = np.asarray(measurements, dtype=float).reshape(-1, p)
+        state, covariance = self._state[rows], self._covariance[rows]
+        mean, innovation = self.project(rows)
+        residual = measurements - mean
+        # K = P H^T S^-1, computed as (S^-1 H P)^T since S is symmetric.
+        gain = np.linalg.solve(innovation, covariance[:, :p, :]).transpose(0, 2, 1)
+        state = state + np.einsum("nij,nj->ni", gain, residual)
+        covariance = covariance - gain @ covariance[:, :p, :]
+        covariance = 0.5 * (covariance + covariance.transpose(0, 2, 1))
+        self._state[rows] = state
+        self._covariance[rows] = covariance
+        return state, covariance
+
+
 def build_kalman_filter(config_dict: Dict[str, float] | None = None) -> KalmanPermanenceFilter:
     config = KalmanConfig(**(config_dict or {}))
     return KalmanPermanenceFilter(config)
+
+
+def build_batched_kalman_filter(
+    config_dict: Dict[str, float] | None = None, capacity: int = 64
+) -> BatchedKalmanFilter:
+    config = KalmanConfig(**(config_dict or {}))
+    return BatchedKalmanFilter(config, capacity=capacity)
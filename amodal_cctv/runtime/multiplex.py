@@ -0,0 +1,373 @@
+"""Multi-camera stream multiplexer with shared detector batches and sharded trackers."""
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+import traceback
+import zlib
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from ..data.toy_examples import ToyAmodalSequence
+
+SOURCE_KINDS = ("file", "images", "rtsp", "webcam", "toy")
+_IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+@dataclass
+class CameraSourceConfig:
+    """One camera feed. ``frame_offset`` skips leading frames, ``loop`` replays files forever."""
+
+    camera_id: str
+    kind: str = "file"
+    path: Optional[str] = None
+    webcam_index: int = 0
+    frame_offset: int = 0
+    max_frames: Optional[int] = None
+    loop: bool = False
+
+    def __post_init__(self) -> None:
+        if self.kind not in SOURCE_KINDS:
+            raise ValueError(f"Unknown source kind {self.kind!r}; choose from {SOURCE_KINDS}")
+
+
+@dataclass
+class MuxConfig:
+    """``poll_interval`` bounds how long the parent waits on a shard before checking it is alive."""
+
+    batch_size: int = 16
+    shard_workers: int = 4
+    queue_size: int = 64
+    start_method: Optional[str] = None
+    poll_interval: float = 0.5
+
+
+def _video_frames(target: Any) -> Iterator[Any]:
+    try:
+        import cv2  # type: ignore
+    except ImportError as exc:  # pragma: no cover - dependency enforcement
+        raise ImportError("OpenCV is required for video sources. Install via `pip install opencv-python`.") from exc
+    capture = cv2.VideoCapture(target)
+    if not capture.isOpened():
+        raise FileNotFoundError(f"Unable to open video source {target!r}.")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+def _image_frames(directory: str) -> Iterator[Any]:
+    try:
+        import cv2  # type: ignore
+    except ImportError as exc:  # pragma: no cover - dependency enforcement
+        raise ImportError("OpenCV is required for image-folder sources. Install via `pip install opencv-python`.") from exc
+    for path in sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in _IMAGE_SUFFIXES):
+        yield cv2.imread(str(path))
+
+
+def _raw_frames(config: CameraSourceConfig) -> Iterator[Any]:
+    if config.kind == "toy":
+        return ToyAmodalSequence(num_frames=config.max_frames or 5).frames()
+    if config.kind == "webcam":
+        return _video_frames(config.webcam_index)
+    if config.path is None:
+        raise ValueError(f"Camera {config.camera_id} of kind {config.kind!r} needs a path.")
+    if config.kind == "images":
+        return _image_frames(config.path)
+    return _video_frames(config.path)
+
+
+def open_source(config: CameraSourceConfig) -> Iterator[Any]:
+    """Yield decoded frames for one camera, honouring offset, looping and frame limits."""
+
+    def frames() -> Iterator[Any]:
+        skip = config.frame_offset
+        while True:
+            produced = False
+            for frame in _raw_frames(config):
+                if skip > 0:
+                    skip -= 1
+                    continue
+                produced = True
+                yield frame
+            if not (config.loop and produced) or config.kind in ("rtsp", "webcam"):
+                return
+
+    return islice(frames(), config.max_frames)
+
+
+def simulate_cameras(
+    count: int,
+    path: Optional[str] = None,
+    kind: str = "file",
+    stagger: int = 7,
+    max_frames: Optional[int] = None,
+) -> List[CameraSourceConfig]:
+    """Stand in for ``count`` cameras by replaying one local file with staggered offsets."""
+    if path is None:
+        kind = "toy"
+    return [
+        CameraSourceConfig(
+            camera_id=f"cam{idx:03d}",
+            kind=kind,
+            path=path,
+            frame_offset=(idx * stagger) if kind != "toy" else 0,
+            max_frames=max_frames,
+            loop=kind != "toy",
+        )
+        for idx in range(count)
+    ]
+
+
+def shard_of(camera_id: str, shards: int) -> int:
+    """Stable camera -> shard assignment (independent of Python's hash seed)."""
+    return zlib.crc32(camera_id.encode("utf-8")) % max(shards, 1)
+
+
+_STOP = None
+
+
+def _copy_tracks(tracks: Any) -> Any:
+    return tracks.copy() if hasattr(tracks, "copy") else list(tracks)
+
+
+def _shard_worker(
+    factory: Callable[..., Any],
+    tracker_config: Optional[Dict[str, Any]],
+    inbox: "mp.Queue[Any]",
+    outbox: "mp.Queue[Any]",
+    shard: int,
+) -> None:
+    trackers: Dict[str, Any] = {}
+    busy = 0.0
+    updates = 0
+    error: Optional[str] = None
+    try:
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                break
+            camera_id, frame_index, timestamp, detections = item
+            tracker = trackers.get(camera_id)
+            if tracker is None:
+                tracker = trackers[camera_id] = factory(tracker_config)
+            start = time.perf_counter()
+            tracks = _copy_tracks(tracker.update(detections, timestamp=timestamp))
+            busy += time.perf_counter() - start
+            updates += 1
+            outbox.put((camera_id, frame_index, tracks))
+    except BaseException:
+        error = traceback.format_exc()
+    finally:
+        # Always report, so the parent never waits on a shard that has already died.
+        summary = {"updates": updates, "busy_s": busy, "cameras": len(trackers), "error": error}
+        outbox.put(("__shard_done__", shard, summary))
+
+
+class ShardFailed(RuntimeError):
+    """A tracker shard worker raised or exited before finishing its cameras."""
+
+
+class MultiCameraMux:
+    """Ingest many cameras through one detector and per-camera tracker shards.
+
+    Frames are pulled round-robin from every live source and grouped into detector
+    batches of ``batch_size`` (``infer_batch`` when the detector has it), so there is a
+    single model copy per node. Each camera owns a tracker built by
+    ``tracker_factory(tracker_config)``; cameras are pinned to one of
+    ``shard_workers`` processes by :func:`shard_of`, which keeps per-camera order.
+    ``shard_workers=0`` runs the trackers in-process.
+    """
+
+    def __init__(
+        self,
+        detector: Any,
+        tracker_factory: Callable[..., Any],
+        tracker_config: Optional[Dict[str, Any]] = None,
+        config: MuxConfig | None = None,
+        sink: Optional[Callable[[str, int, Any], None]] = None,
+    ) -> None:
+        self.detector = detector
+        self.tracker_factory = tracker_factory
+        self.tracker_config = tracker_config
+        self.config = config or MuxConfig()
+        self.sink = sink
+
+    def _detect(self, frames: Sequence[Any]) -> List[Dict[str, Any]]:
+        if hasattr(self.detector, "infer_batch"):
+            return self.detector.infer_batch(frames)
+        return [self.detector.infer(frame) for frame in frames]
+
+    def _batches(self, sources: Sequence[CameraSourceConfig]) -> Iterator[List[Tuple[str, int, Any]]]:
+        live: List[Tuple[str, Iterator[Any]]] = [(src.camera_id, open_source(src)) for src in sources]
+        counters = {camera_id: 0 for camera_id, _ in live}
+        batch: List[Tuple[str, int, Any]] = []
+        while live:
+            still_live = []
+            for camera_id, frames in live:
+                try:
+                    frame = next(frames)
+                except StopIteration:
+                    continue
+                still_live.append((camera_id, frames))
+                batch.append((camera_id, counters[camera_id], frame))
+                counters[camera_id] += 1
+                if len(batch) >= self.config.batch_size:
+                    yield batch
+                    batch = []
+            live = still_live
+        if batch:
+            yield batch
+
+    def run(self, sources: Sequence[CameraSourceConfig]) -> Dict[str, Any]:
+        ids = [src.camera_id for src in sources]
+        if len(set(ids)) != len(ids):
+            raise ValueError("camera_id values must be unique.")
+        stats: Dict[str, Any] = {"frames": 0, "batches": 0, "detect_s": 0.0, "per_camera": {cid: 0 for cid in ids}}
+        wall_start = time.perf_counter()
+        if self.config.shard_workers <= 0:
+            self._run_inline(sources, stats)
+        else:
+            self._run_sharded(sources, stats)
+        wall = time.perf_counter() - wall_start
+        stats["wall_s"] = wall
+        stats["throughput_fps"] = stats["frames"] / wall if wall > 0 else 0.0
+        return stats
+
+    def _emit(self, camera_id: str, frame_index: int, tracks: Any, stats: Dict[str, Any]) -> None:
+        stats["per_camera"][camera_id] += 1
+        if self.sink is not None:
+            self.sink(camera_id, frame_index, tracks)
+
+    def _run_inline(self, sources: Sequence[CameraSourceConfig], stats: Dict[str, Any]) -> None:
+        trackers: Dict[str, Any] = {}
+        for batch in self._batches(sources):
+            start = time.perf_counter()
+            detections = self._detect([frame for _, _, frame in batch])
+            stats["detect_s"] += time.perf_counter() - start
+            stats["batches"] += 1
+            for (camera_id, frame_index, _), dets in zip(batch, detections):
+                tracker = trackers.get(camera_id)
+                if tracker is None:
+                    tracker = trackers[camera_id] = self.tracker_factory(self.tracker_config)
+                tracks = _copy_tracks(tracker.update(dets, timestamp=frame_index))
+                stats["frames"] += 1
+                self._emit(camera_id, frame_index, tracks, stats)
+
+    def _run_sharded(self, sources: Sequence[CameraSourceConfig], stats: Dict[str, Any]) -> None:
+        context = mp.get_context(self.config.start_method)
+        shards = self.config.shard_workers
+        poll = self.config.poll_interval
+        inboxes = [context.Queue(maxsize=self.config.queue_size) for _ in range(shards)]
+        outbox = context.Queue()
+        workers = [
+            context.Process(
+                target=_shard_worker,
+                args=(self.tracker_factory, self.tracker_config, inboxes[idx], outbox, idx),
+                daemon=True,
+            )
+            for idx in range(shards)
+        ]
+        for worker in workers:
+            worker.start()
+
+        shard_stats: Dict[int, Dict[str, Any]] = {}
+        errors: List[BaseException] = []
+
+        def dead_shards() -> List[int]:
+            return [idx for idx, worker in enumerate(workers) if idx not in shard_stats and not worker.is_alive()]
+
+        def collect() -> None:
+            suspects: List[int] = []
+            try:
+                while len(shard_stats) < shards:
+                    try:
+                        camera_id, frame_index, tracks = outbox.get(timeout=poll)
+                    except queue.Empty:
+                        # A worker's final message can still be in flight when it exits, so
+                        # only give up on shards that stay silent for a second poll.
+                        for idx in dead_shards():
+                            if idx in suspects:
+                                code = workers[idx].exitcode
+                                shard_stats[idx] = {"error": f"exited with code {code} without reporting"}
+                                errors.append(ShardFailed(f"Shard worker {idx} exited with code {code} without reporting."))
+                        suspects = dead_shards()
+                        continue
+                    if camera_id == "__shard_done__":
+                        shard_stats[frame_index] = tracks
+                        if tracks["error"] is not None:
+                            errors.append(ShardFailed(f"Shard worker {frame_index} failed:\n{tracks['error']}"))
+                        continue
+                    stats["frames"] += 1
+                    self._emit(camera_id, frame_index, tracks, stats)
+            except BaseException as exc:  # surface sink failures to the caller
+                errors.append(exc)
+
+        def send(shard: int, item: Any) -> None:
+            """Put ``item`` on a shard inbox, giving up once that shard has finished or died."""
+            while shard not in shard_stats and workers[shard].is_alive():
+                try:
+                    inboxes[shard].put(item, timeout=poll)
+                    return
+                except queue.Full:
+                    continue
+
+        collector = threading.Thread(target=collect, name="mux-collector", daemon=True)
+        collector.start()
+        try:
+            for batch in self._batches(sources):
+                if errors:
+                    break
+                start = time.perf_counter()
+                detections = self._detect([frame for _, _, frame in batch])
+                stats["detect_s"] += time.perf_counter() - start
+                stats["batches"] += 1
+                for (camera_id, frame_index, _), dets in zip(batch, detections):
+                    send(shard_of(camera_id, shards), (camera_id, frame_index, frame_index, dets))
+        finally:
+            for idx in range(shards):
+                send(idx, _STOP)
+            if errors:
+                # Stop waiting on healthy shards once the run has already failed.
+                for worker in workers:
+                    worker.join(timeout=poll)
+                    if worker.is_alive():
+                        worker.terminate()
+            collector.join()
+            for worker in workers:
+                worker.join()
+        if errors:
+            raise errors[0]
+        stats["shards"] = [shard_stats[idx] for idx in sorted(shard_stats)]
+
+
+def build_mux_config(config_dict: Dict[str, Any] | None = None) -> MuxConfig:
+    return MuxConfig(**(config_dict or {}))
+
+
+def sources_from_config(config: Dict[str, Any]) -> List[CameraSourceConfig]:
+    """Build camera sources from a ``multicam`` config section (explicit list or simulation)."""
+    sources = [CameraSourceConfig(**entry) for entry in config.get("sources") or []]
+    simulate = config.get("simulate") or {}
+    if simulate.get("cameras"):
+        path = simulate.get("path")
+        if path is not None and "{{PLACEHOLDER" in str(path):
+            path = None
+        sources.extend(
+            simulate_cameras(
+                int(simulate["cameras"]),
+                path=path,
+                kind=simulate.get("kind", "file"),
+                stagger=int(simulate.get("stagger", 7)),
+                max_frames=simulate.get("max_frames"),
+            )
+        )
+    return sources
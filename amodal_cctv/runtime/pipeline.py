@@ -0,0 +1,321 @@
+"""Pipelined decode -> detect -> track -> sink runner with bounded queues."""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DROP_POLICIES = ("block", "drop_oldest", "drop_newest")
+EXECUTORS = ("thread", "process")
+
+_SENTINEL = object()
+_POLL_SECONDS = 0.05
+
+
+@dataclass
+class PipelineConfig:
+    """Runtime knobs for :class:`PipelinedRunner`.
+
+    ``drop_policy`` decides what happens when decoded frames arrive faster than the
+    detector drains them: ``block`` applies back-pressure to the source, ``drop_newest``
+    skips the incoming frame and ``drop_oldest`` evicts the stalest queued frame.
+    ``detect_workers`` defaults to 2 when every worker gets its own detector (process
+    pool or a ``detector_factory``) or the shared one declares ``reentrant = True``,
+    and to 1 otherwise.
+    """
+
+    queue_size: int = 8
+    detect_workers: Optional[int] = None
+    drop_policy: str = "block"
+    executor: str = "thread"
+    latency_window: int = 10000
+
+    def __post_init__(self) -> None:
+        if self.drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop_policy {self.drop_policy!r}; choose from {DROP_POLICIES}")
+        if self.executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor {self.executor!r}; choose from {EXECUTORS}")
+
+
+class StageStats:
+    """Latency samples (bounded window) and busy time for one pipeline stage."""
+
+    def __init__(self, name: str, window: int = 10000) -> None:
+        self.name = name
+        self.count = 0
+        self.busy_seconds = 0.0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.busy_seconds += seconds
+        self._latencies.append(seconds)
+
+    def summary(self, wall_seconds: float) -> Dict[str, float]:
+        samples = np.asarray(self._latencies, dtype=float) * 1e3
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if samples.size else (0.0, 0.0, 0.0)
+        return {
+            "count": self.count,
+            "busy_s": self.busy_seconds,
+            "throughput_fps": self.count / wall_seconds if wall_seconds > 0 else 0.0,
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        }
+
+
+_WORKER_DETECTOR: Any = None
+
+
+def _init_worker(factory: Callable[..., Any], config_dict: Optional[Dict[str, Any]]) -> None:
+    global _WORKER_DETECTOR
+    _WORKER_DETECTOR = factory(config_dict)
+
+
+def _timed_infer(detector: Any, frame: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    detections = detector.infer(frame)
+    return detections, time.perf_counter() - start
+
+
+def _worker_infer(frame: Any) -> Tuple[Any, float]:
+    return _timed_infer(_WORKER_DETECTOR, frame)
+
+
+def _frame_timestamp(frame: Any, seq: int) -> Any:
+    if isinstance(frame, dict):
+        return frame.get("timestamp", frame.get("frame_id", seq))
+    return seq
+
+
+class PipelinedRunner:
+    """Overlap detection and tracking across frames.
+
+    Stages run on their own threads: ``decode`` pulls frames from the source, ``detect``
+    fans frames out to a thread or process pool, ``track`` consumes detector futures in
+    submission order (so tracking is always sequential and ordered), and ``sink``
+    hands copied tracker output to the callback. Each worker builds its own detector
+    from ``detector_factory(detector_config)`` when a factory is given (required for
+    ``executor="process"``). Otherwise thread workers share ``detector``, and calls are
+    serialised unless it declares ``reentrant = True``. Trackers that
+    set ``uses_image`` (appearance-based ones) also receive the frame as ``image``.
+    An ``amodal_stage`` (see :mod:`amodal_cctv.amodal.expansion`) expands the copied
+    tracks in place before the sink and is reported as its own ``amodal`` stage.
+    """
+
+    def __init__(
+        self,
+        detector: Any,
+        tracker: Any,
+        config: PipelineConfig | None = None,
+        sink: Optional[Callable[[Any, Any], None]] = None,
+        detector_factory: Optional[Callable[..., Any]] = None,
+        detector_config: Optional[Dict[str, Any]] = None,
+        amodal_stage: Optional[Any] = None,
+    ) -> None:
+        self.detector = detector
+        self.tracker = tracker
+        self.config = config or PipelineConfig()
+        self.sink = sink
+        self.detector_factory = detector_factory
+        self.detector_config = detector_config
+        self.amodal_stage = amodal_stage
+        if self.config.executor == "process" and detector_factory is None:
+            raise ValueError("executor='process' requires a picklable detector_factory.")
+        self._local = threading.local()
+        self._infer_lock = threading.Lock()
+
+    @property
+    def detect_workers(self) -> int:
+        if self.config.detect_workers is not None:
+            return self.config.detect_workers
+        independent = self.detector_factory is not None or getattr(self.detector, "reentrant", False)
+        return 2 if independent else 1
+
+    def _make_executor(self) -> Executor:
+        if self.config.executor == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.detect_workers,
+                initializer=_init_worker,
+                initargs=(self.detector_factory, self.detector_config),
+            )
+        return ThreadPoolExecutor(max_workers=self.detect_workers, thread_name_prefix="detect")
+
+    def _thread_infer(self, frame: Any) -> Tuple[Any, float]:
+        if self.detector_factory is not None:
+            detector = getattr(self._local, "detector", None)
+            if detector is None:
+                detector = self._local.detector = self.detector_factory(self.detector_config)
+            return _timed_infer(detector, frame)
+        if getattr(self.detector, "reentrant", False):
+            return _timed_infer(self.detector, frame)
+        with self._infer_lock:
+            return _timed_infer(self.detector, frame)
+
+    def _submit(self, executor: Executor, frame: Any) -> Future:
+        if self.config.executor == "process":
+            return executor.submit(_worker_infer, frame)
+        return executor.submit(self._thread_infer, frame)
+
+    @staticmethod
+    def _put(target: "queue.Queue[Any]", item: Any, stop: threading.Event) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(source: "queue.Queue[Any]", stop: threading.Event) -> Any:
+        while not stop.is_set():
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _SENTINEL
+
+    def _offer(self, target: "queue.Queue[Any]", item: Any, stop: threading.Event) -> int:
+        """Enqueue a decoded frame under the drop policy; return how many frames were dropped."""
+        policy = self.config.drop_policy
+        if policy == "block":
+            self._put(target, item, stop)
+            return 0
+        if policy == "drop_newest":
+            try:
+                target.put_nowait(item)
+                return 0
+            except queue.Full:
+                return 1
+        dropped = 0
+        while True:
+            try:
+                target.put_nowait(item)
+                return dropped
+            except queue.Full:
+                try:
+                    target.get_nowait()
+                    dropped += 1
+                except queue.Empty:
+                    continue
+
+    def run(self, frames: Iterable[Any]) -> Dict[str, Any]:
+        cfg = self.config
+        names = ("decode", "detect", "track", "amodal", "sink") if self.amodal_stage else ("decode", "detect", "track", "sink")
+        stats = {name: StageStats(name, cfg.latency_window) for name in names}
+        end_to_end = StageStats("end_to_end", cfg.latency_window)
+        decoded: "queue.Queue[Any]" = queue.Queue(maxsize=cfg.queue_size)
+        in_flight: "queue.Queue[Any]" = queue.Queue(maxsize=cfg.queue_size)
+        tracked: "queue.Queue[Any]" = queue.Queue(maxsize=cfg.queue_size)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+        counters = {"dropped": 0}
+
+        def guarded(fn: Callable[[], None]) -> Callable[[], None]:
+            def body() -> None:
+                try:
+                    fn()
+                except BaseException as exc:  # propagate to the caller after shutdown
+                    errors.append(exc)
+                    stop.set()
+
+            return body
+
+        def decode() -> None:
+            iterator = iter(frames)
+            seq = 0
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    frame = next(iterator)
+                except StopIteration:
+                    break
+                now = time.perf_counter()
+                stats["decode"].record(now - start)
+                counters["dropped"] += self._offer(decoded, (seq, now, frame), stop)
+                seq += 1
+            self._put(decoded, _SENTINEL, stop)
+
+        def dispatch() -> None:
+            while True:
+                item = self._get(decoded, stop)
+                if item is _SENTINEL:
+                    break
+                seq, born, frame = item
+                self._put(in_flight, (seq, born, frame, self._submit(executor, frame)), stop)
+            self._put(in_flight, _SENTINEL, stop)
+
+        def sink() -> None:
+            while True:
+                item = self._get(tracked, stop)
+                if item is _SENTINEL:
+                    break
+                born, frame, tracks = item
+                start = time.perf_counter()
+                if self.sink is not None:
+                    self.sink(frame, tracks)
+                now = time.perf_counter()
+                stats["sink"].record(now - start)
+                end_to_end.record(now - born)
+
+        executor = self._make_executor()
+        threads = [
+            threading.Thread(target=guarded(body), name=f"pipeline-{body.__name__}", daemon=True)
+            for body in (decode, dispatch, sink)
+        ]
+        wall_start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(in_flight, stop)
+                if item is _SENTINEL:
+                    break
+                seq, born, frame, future = item
+                detections, detect_seconds = future.result()
+                stats["detect"].record(detect_seconds)
+                start = time.perf_counter()
+                timestamp = _frame_timestamp(frame, seq)
+                if getattr(self.tracker, "uses_image", False):
+                    tracks = self.tracker.update(detections, timestamp=timestamp, image=frame)
+                else:
+                    tracks = self.tracker.update(detections, timestamp=timestamp)
+                # Tracker output may be a view into its store; the sink sees a stable copy.
+                tracks = tracks.copy() if hasattr(tracks, "copy") else list(tracks)
+                stats["track"].record(time.perf_counter() - start)
+                if self.amodal_stage is not None:
+                    start = time.perf_counter()
+                    self.amodal_stage.expand(tracks)
+                    stats["amodal"].record(time.perf_counter() - start)
+                self._put(tracked, (born, frame, tracks), stop)
+            self._put(tracked, _SENTINEL, stop)
+        except BaseException as exc:
+            errors.append(exc)
+            stop.set()
+        finally:
+            for thread in threads:
+                thread.join()
+            executor.shutdown(wait=True, cancel_futures=True)
+        if errors:
+            raise errors[0]
+
+        wall = time.perf_counter() - wall_start
+        return {
+            "frames": stats["track"].count,
+            "dropped": counters["dropped"],
+            "wall_s": wall,
+            "throughput_fps": stats["track"].count / wall if wall > 0 else 0.0,
+            "stages": {name: stage.summary(wall) for name, stage in stats.items()},
+            "end_to_end": end_to_end.summary(wall),
+        }
+
+
+def build_pipeline_config(config_dict: Dict[str, Any] | None = None) -> PipelineConfig:
+    return PipelineConfig(**(config_dict or {}))
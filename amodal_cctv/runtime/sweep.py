@@ -0,0 +1,337 @@
+"""Parallel, resumable executor for the ablation grid."""
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import os
+import time
+import traceback
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from ..data.datasets import build_dataset
+from ..detectors.cache import DetectionCache, cached_or_run, detector_cache_key
+from ..detectors.registry import build_detector
+from ..trackers.registry import build_tracker
+
+# Axes that change detector outputs; cells that differ only elsewhere share detections.
+DETECTION_AXES = ("detector", "pno")
+
+
+@dataclass
+class SweepConfig:
+    workers: int = 4
+    results_path: str = "outputs/ablation/results.jsonl"
+    dataset: str = "toy"
+    dataset_kwargs: Dict[str, Any] = field(default_factory=dict)
+    chunk_size: int = 8
+    detection_cache: Optional[str] = None
+
+
+def _is_on(value: Any) -> bool:
+    # YAML 1.1 parses bare on/off as booleans.
+    return value is True or str(value).lower() in ("on", "true", "1")
+
+
+def expand_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Cartesian product of every axis, in the axis order given by the config."""
+    axes = list(grid)
+    return [dict(zip(axes, values)) for values in itertools.product(*(grid[axis] for axis in axes))]
+
+
+def cell_key(cell: Dict[str, Any]) -> str:
+    """Stable identifier of a grid cell, independent of axis order."""
+    return hashlib.sha1(json.dumps(cell, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _usable(path: Any) -> bool:
+    return bool(path) and "{{PLACEHOLDER" not in str(path)
+
+
+def effective_cell(cell: Dict[str, Any], shared: Dict[str, Any]) -> Dict[str, Any]:
+    """``cell`` without the axes that cannot change its result.
+
+    ``alpha_decay`` only reaches ByteTrack and ``gate_growth``/``reid`` only StrongSORT;
+    ``reid`` also needs ``reid_weights``, ``pno`` needs ``<detector>_pno`` weights and
+    ``amodal_head`` needs ``amodal_head_weights`` in ``shared``. ``calibration`` is
+    always inert until a calibration step exists. Cells that differ only in inert axes
+    collapse to the same effective cell and are run once.
+    """
+    tracker = cell.get("tracker", "bytetrack")
+    weights = shared.get("weights") or {}
+    inert = {"calibration"}
+    if tracker != "bytetrack":
+        inert.add("alpha_decay")
+    if tracker != "strongsort":
+        inert.update(("gate_growth", "reid"))
+    if not _usable(shared.get("reid_weights")):
+        inert.add("reid")
+    if not _usable(weights.get(f"{cell.get('detector', 'yolov10')}_pno")):
+        inert.add("pno")
+    if not _usable(shared.get("amodal_head_weights")):
+        inert.add("amodal_head")
+    return {axis: value for axis, value in cell.items() if axis not in inert}
+
+
+def detection_key(cell: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(cell.get(axis) for axis in DETECTION_AXES)
+
+
+def cell_configs(cell: Dict[str, Any], shared: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate grid axes into component configs.
+
+    ``tmax_gap`` bounds how long every tracker coasts; ``alpha_decay`` drives ByteTrack's
+    existence filter and ``gate_growth`` StrongSORT's gate widening (the other trackers
+    ignore them); ``reid`` toggles StrongSORT's Re-ID, embedding frame crops with
+    ``shared.reid_weights``. A ``pno: on`` cell uses the ``<detector>_pno`` weights when
+    ``shared.weights`` lists them, and ``amodal_head: on`` loads
+    ``shared.amodal_head_weights``. ``calibration`` is not translated yet.
+    """
+    weights = shared.get("weights") or {}
+    detector = cell.get("detector", "yolov10")
+    detector_weights = weights.get(f"{detector}_pno") if _is_on(cell.get("pno")) else None
+    detector_weights = detector_weights or weights.get(detector)
+    tracker = cell.get("tracker", "bytetrack")
+    gap = int(cell.get("tmax_gap", 30))
+    if tracker == "bytetrack":
+        tracker_config = {"buffer_size": gap, "existence_config": {"alpha_decay": float(cell.get("alpha_decay", 0.94))}}
+    elif tracker == "strongsort":
+        tracker_config = {
+            "max_age": gap,
+            "reid_enabled": _is_on(cell.get("reid")),
+            "gating_config": {"time_widen_coeff": float(cell.get("gate_growth", 0.2))},
+        }
+    else:
+        tracker_config = {"max_age": gap}
+    return {
+        "detector": {"name": detector, "config": {"weights_path": detector_weights} if detector_weights else {}},
+        "tracker": {"name": tracker, "config": tracker_config},
+        "reid": {"weights_path": shared.get("reid_weights")} if tracker_config.get("reid_enabled") else None,
+        "amodal_head": {"enabled": _is_on(cell.get("amodal_head")), "weights": shared.get("amodal_head_weights")},
+    }
+
+
+def run_cell(cell: Dict[str, Any], shared: Dict[str, Any], frames: List[Any], detections: List[Any]) -> Dict[str, Any]:
+    """Default cell runner: track the shared detections and report identity statistics."""
+    from ..amodal.expansion import build_amodal_stage
+    from ..trackers.reid_backbones import build_reid_model
+
+    configs = cell_configs(cell, shared)
+    extras = {"reid_model": build_reid_model(configs["reid"])} if configs["reid"] else {}
+    tracker = build_tracker(configs["tracker"]["name"], configs["tracker"]["config"], **extras)
+    stage = build_amodal_stage(configs["amodal_head"]) if configs["amodal_head"]["enabled"] else None
+    lengths: Dict[int, int] = defaultdict(int)
+    start = time.perf_counter()
+    for idx, dets in enumerate(detections):
+        if getattr(tracker, "uses_image", False):
+            tracks = tracker.update(dets, timestamp=idx, image=frames[idx])
+        else:
+            tracks = tracker.update(dets, timestamp=idx)
+        if stage is not None:
+            tracks = tracks.copy()
+            stage.expand(tracks)
+        for track_id in tracks.track_id[tracks.tracked].tolist():
+            lengths[track_id] += 1
+    seconds = time.perf_counter() - start
+    return {
+        "frames": len(detections),
+        "tracks": len(lengths),
+        "mean_track_length": sum(lengths.values()) / len(lengths) if lengths else 0.0,
+        "track_fps": len(detections) / seconds if seconds > 0 else 0.0,
+    }
+
+
+class ResultsStore:
+    """Append-only JSONL log of finished cells; one fsync'd line per cell."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def records(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        records = []
+        for line in self.path.read_text().splitlines():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:  # torn last line from an interrupted write
+                continue
+        return records
+
+    def completed(self) -> Set[str]:
+        return {record["key"] for record in self.records() if record.get("status") == "ok"}
+
+    def append(self, record: Dict[str, Any]) -> None:
+        with self.path.open("a") as handle:
+            handle.write(json.dumps(record, default=str) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+
+_DETECTION_MEMO: "OrderedDict[Tuple[Any, ...], Tuple[List[Any], List[Any]]]" = OrderedDict()
+_MEMO_SIZE = 2
+
+
+def dataset_sequence(sweep: Dict[str, Any]) -> str:
+    """Detection-cache sequence name for the sweep's dataset and its arguments."""
+    kwargs = json.dumps(sweep.get("dataset_kwargs") or {}, sort_keys=True, default=str)
+    return f"{sweep['dataset']}-{hashlib.sha1(kwargs.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _frames_and_detections(
+    cell: Dict[str, Any], shared: Dict[str, Any], sweep: Dict[str, Any], detector_factory: Callable[..., Any]
+) -> Tuple[List[Any], List[Any], str]:
+    """Detections for ``cell``'s detector axes and where they came from.
+
+    Reused across cells within this process; with ``detection_cache`` set they are also
+    replayed from (or written to) the on-disk :class:`DetectionCache`, so other workers
+    and later sweeps skip the detector entirely.
+    """
+    key = detection_key(cell)
+    if key in _DETECTION_MEMO:
+        _DETECTION_MEMO.move_to_end(key)
+        frames, detections = _DETECTION_MEMO[key]
+        return frames, detections, "reused"
+    frames = list(build_dataset(sweep["dataset"], **sweep["dataset_kwargs"]).frames())
+    detector_config = cell_configs(cell, shared)["detector"]
+    detector = detector_factory(detector_config["name"], detector_config["config"])
+    if sweep.get("detection_cache"):
+        cache_key = detector_cache_key(detector_config["name"], getattr(detector, "config", detector_config["config"]))
+        detections, hit = cached_or_run(
+            DetectionCache(sweep["detection_cache"]),
+            cache_key,
+            dataset_sequence(sweep),
+            detector,
+            frames,
+            meta={"detector": detector_config["name"]},
+        )
+        source = "cached" if hit else "computed"
+    elif hasattr(detector, "infer_batch"):
+        detections, source = list(detector.infer_batch(frames)), "computed"
+    else:
+        detections, source = [detector.infer(frame) for frame in frames], "computed"
+    _DETECTION_MEMO[key] = (frames, detections)
+    while len(_DETECTION_MEMO) > _MEMO_SIZE:
+        _DETECTION_MEMO.popitem(last=False)
+    return frames, detections, source
+
+
+def _run_chunk(
+    cells: List[Dict[str, Any]],
+    shared: Dict[str, Any],
+    sweep: Dict[str, Any],
+    cell_runner: Callable[..., Dict[str, Any]],
+    detector_factory: Callable[..., Any],
+) -> List[Dict[str, Any]]:
+    records = []
+    for cell in cells:
+        record: Dict[str, Any] = {"key": cell_key(cell), "cell": cell, "pid": os.getpid()}
+        start = time.perf_counter()
+        try:
+            frames, detections, record["detections"] = _frames_and_detections(cell, shared, sweep, detector_factory)
+            record["metrics"] = cell_runner(cell, shared, frames, detections)
+            record["status"] = "ok"
+        except Exception as exc:  # one broken cell must not stop the sweep
+            record["status"] = "error"
+            record["error"] = f"{type(exc).__name__}: {exc}"
+            record["traceback"] = traceback.format_exc(limit=5)
+        record["seconds"] = time.perf_counter() - start
+        records.append(record)
+    return records
+
+
+class SweepExecutor:
+    """Run every grid cell on a process pool, skipping cells already in the results store.
+
+    Pending cells are grouped by :data:`DETECTION_AXES` and submitted in chunks of
+    ``chunk_size``, so each worker computes a detector's outputs once and reuses them
+    for every tracker/permanence variant it receives. Finished cells are appended to
+    the results store as chunks complete; cells that errored are retried on resume.
+    ``detection_cache`` persists detections across workers and sweeps.
+    ``workers=0`` runs inline.
+    """
+
+    def __init__(
+        self,
+        grid: Dict[str, Sequence[Any]],
+        shared: Optional[Dict[str, Any]] = None,
+        config: SweepConfig | None = None,
+        cell_runner: Callable[..., Dict[str, Any]] = run_cell,
+        detector_factory: Callable[..., Any] = build_detector,
+    ) -> None:
+        self.grid = grid
+        self.shared = shared or {}
+        self.config = config or SweepConfig()
+        self.cell_runner = cell_runner
+        self.detector_factory = detector_factory
+        self.store = ResultsStore(self.config.results_path)
+
+    def cells(self) -> List[Dict[str, Any]]:
+        """Distinct effective cells of the grid (see :func:`effective_cell`), in grid order."""
+        unique: Dict[str, Dict[str, Any]] = {}
+        for cell in expand_grid(self.grid):
+            cell = effective_cell(cell, self.shared)
+            unique.setdefault(cell_key(cell), cell)
+        return list(unique.values())
+
+    def pending(self) -> List[Dict[str, Any]]:
+        done = self.store.completed()
+        return [cell for cell in self.cells() if cell_key(cell) not in done]
+
+    def _chunks(self, cells: Iterable[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        groups: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = defaultdict(list)
+        for cell in cells:
+            groups[detection_key(cell)].append(cell)
+        size = max(self.config.chunk_size, 1)
+        return [group[i : i + size] for group in groups.values() for i in range(0, len(group), size)]
+
+    def run(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        total = len(self.cells())
+        pending = self.pending()
+        skipped = total - len(pending)
+        collapsed = len(expand_grid(self.grid)) - total
+        if limit is not None:
+            pending = pending[:limit]
+        chunks = self._chunks(pending)
+        sweep = asdict(self.config)
+        counts = {"ok": 0, "error": 0}
+        start = time.perf_counter()
+
+        def record(records: List[Dict[str, Any]]) -> None:
+            for entry in records:
+                self.store.append(entry)
+                counts[entry["status"]] += 1
+
+        if self.config.workers <= 0:
+            for chunk in chunks:
+                record(_run_chunk(chunk, self.shared, sweep, self.cell_runner, self.detector_factory))
+        else:
+            with ProcessPoolExecutor(max_workers=self.config.workers) as pool:
+                futures = [
+                    pool.submit(_run_chunk, chunk, self.shared, sweep, self.cell_runner, self.detector_factory)
+                    for chunk in chunks
+                ]
+                try:
+                    for future in as_completed(futures):
+                        record(future.result())
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        return {
+            "cells": total,
+            "collapsed": collapsed,
+            "skipped": skipped,
+            "completed": counts["ok"],
+            "failed": counts["error"],
+            "wall_s": time.perf_counter() - start,
+        }
+
+
+def build_sweep_config(config_dict: Dict[str, Any] | None = None) -> SweepConfig:
+    return SweepConfig(**(config_dict or {}))
@@ -1,30 +1,54 @@
-"""CLI entry point for running ablation sweeps (declaration only)."""
+"""CLI entry point for running ablation sweeps."""
 from __future__ import annotations
 
 import argparse
-from typing import List
+import json
+from typing import Any, Dict, List, Optional
+
+from ..runtime.sweep import SweepExecutor, build_sweep_config, expand_grid
+from .run_infer import load_config
 
 
 def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Declare ablation sweep parameters")
-    parser.add_argument("--detectors", nargs="*", default=["yolov10", "rtdetrv2"])
-    parser.add_argument("--pno", nargs="*", default=["on", "off"])
-    parser.add_argument("--reid", nargs="*", default=["off", "on"])
+    parser = argparse.ArgumentParser(description="Run the ablation sweep over the configured grid")
+    parser.add_argument("--config", type=str, default="configs/ablation.yaml")
+    parser.add_argument("--detectors", nargs="*", default=None, help="Restrict the detector axis")
+    parser.add_argument("--pno", nargs="*", default=None, help="Restrict the pno axis")
+    parser.add_argument("--reid", nargs="*", default=None, help="Restrict the reid axis")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--results", type=str, default=None, help="JSONL results store (resumed if present)")
+    parser.add_argument("--limit", type=int, default=None, help="Run at most N pending cells")
+    parser.add_argument("--dry-run", action="store_true", help="Only report grid size and pending cells")
     return parser.parse_args()
 
 
 def enumerate_grid(detectors: List[str], pno: List[str], reid: List[str]) -> List[dict]:
-    grid = []
-    for det in detectors:
-        for p in pno:
-            for r in reid:
-                grid.append({"detector": det, "pno": p, "reid": r})
-    return grid
+    return expand_grid({"detector": detectors, "pno": pno, "reid": reid})
+
+
+def build_executor(config: Dict[str, Any], overrides: Optional[Dict[str, List[str]]] = None) -> SweepExecutor:
+    grid = dict(config.get("grid") or {})
+    for axis, values in (overrides or {}).items():
+        if values:
+            grid[axis] = values
+    return SweepExecutor(grid, config.get("shared"), build_sweep_config(config.get("sweep")))
 
 
 def main() -> None:
     args = parse_args()
-    _ = enumerate_grid(args.detectors, args.pno, args.reid)
+    config = load_config(args.config)
+    sweep = dict(config.get("sweep") or {})
+    if args.workers is not None:
+        sweep["workers"] = args.workers
+    if args.results is not None:
+        sweep["results_path"] = args.results
+    config["sweep"] = sweep
+    executor = build_executor(config, {"detector": args.detectors, "pno": args.pno, "reid": args.reid})
+    if args.dry_run:
+        grid = len(expand_grid(executor.grid))
+        print(json.dumps({"grid": grid, "cells": len(executor.cells()), "pending": len(executor.pending())}))
+        return
+    print(json.dumps(executor.run(limit=args.limit), indent=2))
 
 
 if __name__ == "__main__":
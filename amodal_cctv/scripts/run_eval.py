@@ -2,24 +2,81 @@
 from __future__ import annotations
 
 import argparse
+import json
+from typing import Any, Dict, Optional
 
+import numpy as np
+
+from ..detectors.cache import DetectionCache
 from ..eval import slices
+from ..eval.mot_metrics import MOTMetricsConfig, discover_sequences, evaluate_sequences
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Evaluate amodal CCTV metrics")
     parser.add_argument("--slices", type=str, default="full")
+    parser.add_argument("--detection-cache", type=str, default=None, help="Detection cache directory to replay")
+    parser.add_argument("--cache-key", type=str, default=None, help="Detector cache key (see detector_cache_key)")
+    parser.add_argument("--mot-gt", type=str, default=None, help="Ground-truth MOTChallenge directory")
+    parser.add_argument("--mot-pred", type=str, default=None, help="Directory of <sequence>.txt tracker outputs")
+    parser.add_argument("--workers", type=int, default=4, help="Sequences scored in parallel")
+    parser.add_argument("--gt-table", type=str, default=None, help="Columnar ground truth (.npz) for sliced AP")
+    parser.add_argument("--pred-table", type=str, default=None, help="Columnar predictions (.npz) for sliced AP")
+    parser.add_argument("--slice-cache", type=str, default=None, help="Directory caching per-sequence slice masks")
     return parser.parse_args()
 
 
-def run(slice_name: str) -> None:
-    data = {"dummy": []}
-    _ = slices.filter_by_slice(data, slice_name)
+def load_cached_detections(root: str, key: str) -> Dict[str, Any]:
+    """Memory-mapped detections for every cached sequence under ``key``."""
+    cache = DetectionCache(root)
+    return {entry["sequence"]: cache.read(key, entry["sequence"]) for entry in cache.entries() if entry["key"] == key}
+
+
+def run(slice_name: str, detection_cache: Optional[str] = None, cache_key: Optional[str] = None) -> Dict[str, Any]:
+    data: Dict[str, Any] = {"dummy": []}
+    if detection_cache and cache_key:
+        data = load_cached_detections(detection_cache, cache_key)
+    selected = slices.filter_by_slice(data, slice_name)
+    return {
+        "slice": slice_name,
+        "sequences": {name: len(frames) for name, frames in selected.items()},
+    }
+
+
+def load_table(path: str) -> Dict[str, Dict[str, np.ndarray]]:
+    """Load a columnar ``.npz`` table, split by its ``sequence`` column when present."""
+    with np.load(path, allow_pickle=False) as stored:
+        table = {name: stored[name] for name in stored.files}
+    if "sequence" not in table:
+        return {"all": table}
+    sequences = table.pop("sequence")
+    rows = sequences.shape[0]
+    return {
+        str(name): {key: value[sequences == name] if value.shape[:1] == (rows,) else value for key, value in table.items()}
+        for name in np.unique(sequences)
+    }
+
+
+def run_slices(gt_path: str, pred_path: str, slice_cache: Optional[str] = None) -> Dict[str, Any]:
+    """AP for every slice and visibility bin in one matching pass."""
+    index = slices.SliceIndex(slices.SliceConfig(cache_dir=slice_cache))
+    return slices.evaluate_slices(load_table(gt_path), load_table(pred_path), index)
+
+
+def run_mot(gt_dir: str, pred_dir: str, workers: int = 4) -> Dict[str, Any]:
+    """HOTA/MOTA/IDF1 for every prediction file that has matching ground truth."""
+    return evaluate_sequences(discover_sequences(gt_dir, pred_dir), MOTMetricsConfig(workers=workers))
 
 
 def main() -> None:
     args = parse_args()
-    run(args.slices)
+    if args.mot_gt and args.mot_pred:
+        print(json.dumps(run_mot(args.mot_gt, args.mot_pred, args.workers), indent=2))
+        return
+    if args.gt_table and args.pred_table:
+        print(json.dumps(run_slices(args.gt_table, args.pred_table, args.slice_cache), indent=2))
+        return
+    run(args.slices, detection_cache=args.detection_cache, cache_key=args.cache_key)
 
 
 if __name__ == "__main__":
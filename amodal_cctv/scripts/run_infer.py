@@ -2,38 +2,118 @@
 from __future__ import annotations
 
 import argparse
-from typing import Dict
+import json
+from dataclasses import fields
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 
-from ..detectors.yolo_v10 import build_yolov10_detector
-from ..trackers.bytetrack import build_bytetrack_tracker
+import yaml
+
+from ..detectors.cache import DetectionCache, RecordingDetector, ReplayDetector, detector_cache_key
+from ..detectors.yolo_v10 import YOLOv10Config, build_yolov10_detector
+from ..eval.trackeval_adapter import MOTWriter
+from ..trackers.registry import build_tracker
 from ..data.toy_examples import ToyAmodalSequence
+from ..runtime.pipeline import PipelinedRunner, build_pipeline_config
+from ..amodal.expansion import build_amodal_stage
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run amodal CCTV inference")
     parser.add_argument("--config", type=str, required=False, default="configs/speed_yolov10.yaml")
+    parser.add_argument("--stats-out", type=str, default=None, help="Optional JSON path for stage latency stats")
+    parser.add_argument(
+        "--detection-cache", type=str, default=None, help="Directory to replay detections from (written on a miss)"
+    )
+    parser.add_argument(
+        "--mot-out", type=str, default=None, help="Stream tracks to this MOTChallenge file instead of keeping them"
+    )
     return parser.parse_args()
 
 
-def run(config_path: str) -> Dict[str, object]:
-    detector = build_yolov10_detector()
-    tracker = build_bytetrack_tracker()
+def load_config(config_path: str) -> Dict[str, Any]:
+    """Read a YAML config if present; missing files fall back to factory defaults."""
+    path = Path(config_path)
+    if not path.exists():
+        return {}
+    return yaml.safe_load(path.read_text()) or {}
+
+
+def detector_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """YOLOv10 options from the ``detector`` section; ``weights`` maps to ``weights_path``."""
+    section = dict(config.get("detector") or {})
+    name = section.pop("name", "yolov10")
+    if name != "yolov10":
+        raise ValueError(f"Inference runs YOLOv10; the config names detector {name!r}.")
+    if "weights" in section:
+        section["weights_path"] = section.pop("weights")
+    known = {field.name for field in fields(YOLOv10Config)}
+    return {key: value for key, value in section.items() if key in known}
+
+
+def tracker_options(config: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    """Registered tracker name and its options from the ``tracker`` section."""
+    section = dict(config.get("tracker") or {})
+    return section.pop("name", "bytetrack"), section
+
+
+def run(config_path: str, detection_cache: Optional[str] = None, mot_out: Optional[str] = None) -> Dict[str, object]:
+    config = load_config(config_path)
+    detector = build_yolov10_detector(detector_options(config))
+    tracker = build_tracker(*tracker_options(config))
     dataset = ToyAmodalSequence()
+    cache_root = detection_cache or (config.get("detection_cache") or {}).get("root")
+    cache = DetectionCache(cache_root) if cache_root else None
+    cache_key = detector_cache_key("yolov10", detector.config)
+    sequence = "toy"
+    pipeline_config = build_pipeline_config(config.get("pipeline"))
+    cache_hit = cache is not None and cache.contains(cache_key, sequence)
+    if cache_hit:
+        detector = ReplayDetector(cache.read(cache_key, sequence))
+    elif cache is not None and pipeline_config.drop_policy == "block":
+        # Only a lossless run is recorded; dropped frames would be cached as empty.
+        detector = RecordingDetector(detector)
 
     predictions = []
-    for frame in dataset.frames():
-        dets = detector.infer(frame)
-        tracks = tracker.track(dets)
-        predictions.append({"frame": frame["frame_id"], "tracks": tracks})
+    writer = MOTWriter(mot_out) if mot_out else None
+
+    def collect(frame: Dict[str, Any], tracks: Any) -> None:
+        if writer is not None:
+            writer.write(frame["frame_id"] + 1, tracks)
+        else:
+            predictions.append({"frame": frame["frame_id"], "tracks": tracks})
+
+    runner = PipelinedRunner(
+        detector,
+        tracker,
+        pipeline_config,
+        sink=collect,
+        amodal_stage=build_amodal_stage(config.get("amodal_head")),
+    )
+    try:
+        stats = runner.run(dataset.frames())
+    finally:
+        if writer is not None:
+            writer.close()
+    if isinstance(detector, RecordingDetector):
+        detector.save(cache, cache_key, sequence, meta={"detector": "yolov10"}, num_frames=dataset.num_frames)
+    if cache is None:
+        cache_status = None
+    else:
+        cache_status = "hit" if cache_hit else ("written" if isinstance(detector, RecordingDetector) else "skipped")
     return {
         "config": config_path,
-        "predictions": predictions,
+        "detection_cache": cache_status,
+        "predictions": predictions if writer is None else mot_out,
+        "stats": stats,
     }
 
 
 def main() -> None:
     args = parse_args()
-    _ = run(args.config)
+    result = run(args.config, detection_cache=args.detection_cache, mot_out=args.mot_out)
+    if args.stats_out:
+        Path(args.stats_out).write_text(json.dumps(result["stats"], indent=2))
 
 
 if __name__ == "__main__":
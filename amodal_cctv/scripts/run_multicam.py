@@ -0,0 +1,60 @@
+"""CLI entry point for multi-camera inference through the stream multiplexer."""
+from __future__ import annotations
+
+import argparse
+import json
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict
+
+from ..detectors.yolo_v10 import build_yolov10_detector
+from ..runtime.multiplex import MultiCameraMux, build_mux_config, simulate_cameras, sources_from_config
+from ..trackers.registry import build_tracker
+from .run_infer import detector_options, load_config, tracker_options
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run amodal CCTV inference over many cameras")
+    parser.add_argument("--config", type=str, required=False, default="configs/default.yaml")
+    parser.add_argument("--simulate", type=int, default=None, help="Simulate N cameras from one local file")
+    parser.add_argument("--source", type=str, default=None, help="Local video replayed by simulated cameras")
+    parser.add_argument("--max-frames", type=int, default=None, help="Frames per simulated camera")
+    parser.add_argument("--stats-out", type=str, default=None, help="Optional JSON path for multiplexer stats")
+    return parser.parse_args()
+
+
+def run(config_path: str, simulate: int | None = None, source: str | None = None, max_frames: int | None = None) -> Dict[str, Any]:
+    config = load_config(config_path)
+    section = dict(config.get("multicam") or {})
+    if simulate:
+        sources = simulate_cameras(simulate, path=source, max_frames=max_frames)
+    else:
+        sources = sources_from_config(section)
+    mux_config = build_mux_config({k: v for k, v in section.items() if k not in ("sources", "simulate")})
+
+    counts: Dict[str, int] = {}
+
+    def collect(camera_id: str, frame_index: int, tracks: Any) -> None:
+        counts[camera_id] = counts.get(camera_id, 0) + 1
+
+    tracker_name, tracker_config = tracker_options(config)
+    mux = MultiCameraMux(
+        build_yolov10_detector(detector_options(config)),
+        partial(build_tracker, tracker_name),
+        tracker_config=tracker_config,
+        config=mux_config,
+        sink=collect,
+    )
+    stats = mux.run(sources)
+    return {"config": config_path, "cameras": len(sources), "stats": stats}
+
+
+def main() -> None:
+    args = parse_args()
+    result = run(args.config, args.simulate, args.source, args.max_frames)
+    if args.stats_out:
+        Path(args.stats_out).write_text(json.dumps(result["stats"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
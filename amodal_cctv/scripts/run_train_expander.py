@@ -0,0 +1,66 @@
+"""CLI entry point for dumping ROI shards and training the amodal expander head."""
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, Dict
+
+from ..amodal.train_expander import build_train_config, dump_roi_shards, roi_samples, train_expander
+from .run_eval import load_cached_detections, load_table
+from .run_infer import load_config
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Train the amodal expander head from precomputed ROI features")
+    sub = parser.add_subparsers(dest="command", required=True)
+    dump = sub.add_parser("dump", help="Write ROI features and amodal-delta targets to shards")
+    dump.add_argument("--detection-cache", type=str, required=True, help="Detection cache written with detector roi_features on")
+    dump.add_argument("--cache-key", type=str, required=True, help="Detector cache key (see detector_cache_key)")
+    dump.add_argument("--gt-table", type=str, required=True, help="Columnar ground truth (.npz) with visible_boxes")
+    dump.add_argument("--out", type=str, default="outputs/roi_shards")
+    dump.add_argument("--shard-size", type=int, default=65536)
+    dump.add_argument("--iou-threshold", type=float, default=0.5)
+    dump.add_argument("--dtype", type=str, default="float32", choices=["float32", "float16"])
+    train = sub.add_parser("train", help="Train the head from ROI shards (resumes from the checkpoint)")
+    train.add_argument("--config", type=str, default=None, help="YAML with an expander_training section")
+    train.add_argument("--shards", type=str, default=None)
+    train.add_argument("--checkpoint", type=str, default=None)
+    train.add_argument("--steps", type=int, default=None)
+    train.add_argument("--workers", type=int, default=None)
+    train.add_argument("--no-resume", action="store_true")
+    return parser.parse_args()
+
+
+def dump(args: argparse.Namespace) -> Dict[str, Any]:
+    detections = load_cached_detections(args.detection_cache, args.cache_key)
+    tables = load_table(args.gt_table)
+    samples = (
+        sample
+        for sequence, frames in detections.items()
+        if sequence in tables or "all" in tables
+        for sample in roi_samples(frames, tables.get(sequence, tables.get("all")), args.iou_threshold)
+    )
+    return dump_roi_shards(samples, args.out, shard_size=args.shard_size, dtype=args.dtype)
+
+
+def train(args: argparse.Namespace) -> Dict[str, Any]:
+    section = dict((load_config(args.config).get("expander_training") or {}) if args.config else {})
+    overrides = {
+        "shard_dir": args.shards,
+        "checkpoint_path": args.checkpoint,
+        "total_steps": args.steps,
+        "num_workers": args.workers,
+    }
+    section.update({key: value for key, value in overrides.items() if value is not None})
+    if args.no_resume:
+        section["resume"] = False
+    return train_expander(build_train_config(section))
+
+
+def main() -> None:
+    args = parse_args()
+    print(json.dumps(dump(args) if args.command == "dump" else train(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Sparse candidate generation and assignment shared by the trackers."""
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+except ImportError:  # pragma: no cover - fallback when SciPy unavailable
+    linear_sum_assignment = None
+    coo_matrix = None
+    connected_components = None
+
+from .box_ops import overlap_matrix
+
+_EMPTY = np.empty((0,), dtype=np.int64)
+# Below this many cells a single dense solve beats building the component graph.
+_DENSE_SOLVE_LIMIT = 4096
+
+
+def should_solve_sparse(n: int, m: int) -> bool:
+    """Whether an ``n`` x ``m`` frame is large enough for grid pruning to pay off."""
+    return n * m > _DENSE_SOLVE_LIMIT
+
+
+def _grid_cells(boxes: np.ndarray, cell_size: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Expand every box into the grid cells its extent touches; return (box_index, cell_key)."""
+    lo = np.floor(boxes[:, :2] / cell_size).astype(np.int64)
+    hi = np.floor(np.maximum(boxes[:, 2:], boxes[:, :2]) / cell_size).astype(np.int64)
+    span = hi - lo + 1
+    counts = span[:, 0] * span[:, 1]
+    owner = np.repeat(np.arange(boxes.shape[0], dtype=np.int64), counts)
+    offset = np.arange(counts.sum(), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = lo[owner, 0] + offset % span[owner, 0]
+    cy = lo[owner, 1] + offset // span[owner, 0]
+    # Pack (cx, cy) into a single int64 key so the join is a 1-D sort/search.
+    return owner, (cx << 32) ^ (cy & 0xFFFFFFFF)
+
+
+def candidate_pairs(
+    track_boxes: np.ndarray, det_boxes: np.ndarray, cell_size: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (track, detection) index pairs whose boxes share at least one grid cell.
+
+    Boxes that overlap always share a cell, so any pair with positive IoU survives.
+    The default cell size is twice the median box extent, which keeps the number of
+    cells per box small while the pair count grows with local density only. When most
+    boxes are degenerate (zero median extent) the largest extent is used instead, so
+    normal-size boxes in the same call do not fan out over thousands of cells.
+    """
+    n, m = track_boxes.shape[0], det_boxes.shape[0]
+    if n == 0 or m == 0:
+        return _EMPTY, _EMPTY
+    if cell_size is None:
+        extents = np.concatenate([track_boxes[:, 2:] - track_boxes[:, :2], det_boxes[:, 2:] - det_boxes[:, :2]])
+        extents = np.maximum(extents, 0)
+        cell_size = 2.0 * float(np.median(extents))
+        if not np.isfinite(cell_size) or cell_size <= 0:
+            cell_size = float(extents.max())
+    if not np.isfinite(cell_size) or cell_size <= 0:
+        cell_size = 1.0
+
+    t_owner, t_keys = _grid_cells(track_boxes, cell_size)
+    d_owner, d_keys = _grid_cells(det_boxes, cell_size)
+    order = np.argsort(d_keys, kind="stable")
+    d_keys, d_owner = d_keys[order], d_owner[order]
+    left = np.searchsorted(d_keys, t_keys, side="left")
+    right = np.searchsorted(d_keys, t_keys, side="right")
+    counts = right - left
+    rows = np.repeat(t_owner, counts)
+    starts = np.repeat(left - (np.cumsum(counts) - counts), counts)
+    cols = d_owner[starts + np.arange(counts.sum(), dtype=np.int64)]
+    pair_keys = np.unique(rows * m + cols)
+    return pair_keys // m, pair_keys % m
+
+
+def paired_overlap(track_boxes: np.ndarray, det_boxes: np.ndarray, metric: str = "iou") -> np.ndarray:
+    """Overlap of aligned box pairs; bit-identical to the matching dense-matrix entries."""
+    if track_boxes.shape[0] == 0:
+        return np.empty((0,), dtype=float)
+    return overlap_matrix(track_boxes[:, None, :], det_boxes[:, None, :], metric)[:, 0, 0]
+
+
+def _greedy_assignment(rows: np.ndarray, cols: np.ndarray, costs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    taken_rows, taken_cols = set(), set()
+    matched_rows, matched_cols = [], []
+    for idx in np.argsort(costs, kind="stable"):
+        r, c = int(rows[idx]), int(cols[idx])
+        if r in taken_rows or c in taken_cols:
+            continue
+        taken_rows.add(r)
+        taken_cols.add(c)
+        matched_rows.append(r)
+        matched_cols.append(c)
+    return np.asarray(matched_rows, dtype=np.int64), np.asarray(matched_cols, dtype=np.int64)
+
+
+def _solve_dense(rows: np.ndarray, cols: np.ndarray, costs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve one edge set densely over its own rows/columns; non-edges are never matched."""
+    g_rows, row_index = np.unique(rows, return_inverse=True)
+    g_cols, col_index = np.unique(cols, return_inverse=True)
+    valid = np.zeros((g_rows.size, g_cols.size), dtype=bool)
+    valid[row_index, col_index] = True
+    dense = np.full(valid.shape, costs.max() + 1e6)
+    dense[row_index, col_index] = costs
+    r, c = linear_sum_assignment(dense)
+    keep = valid[r, c]
+    return g_rows[r[keep]], g_cols[c[keep]]
+
+
+def sparse_linear_assignment(
+    rows: np.ndarray, cols: np.ndarray, costs: np.ndarray, n_rows: int, n_cols: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Minimum-cost matching restricted to the given candidate edges.
+
+    The bipartite candidate graph is split into connected components. Components made
+    of a single edge are matched directly; larger ones are solved with a dense
+    ``linear_sum_assignment`` over just their own rows and columns, so solve time
+    follows the size of local clusters instead of the whole frame.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    costs = np.asarray(costs, dtype=float)
+    if rows.size == 0:
+        return _EMPTY, _EMPTY
+    if linear_sum_assignment is None or connected_components is None:  # pragma: no cover
+        return _greedy_assignment(rows, cols, costs)
+    if not should_solve_sparse(n_rows, n_cols):
+        return _solve_dense(rows, cols, costs)
+
+    graph = coo_matrix((np.ones(rows.size), (rows, n_rows + cols)), shape=(n_rows + n_cols, n_rows + n_cols))
+    _, labels = connected_components(graph, directed=False)
+    edge_labels = labels[rows]
+    edges_per_label = np.bincount(edge_labels)
+
+    single = edges_per_label[edge_labels] == 1
+    matched_rows, matched_cols = [rows[single]], [cols[single]]
+
+    multi = np.flatnonzero(~single)
+    if multi.size:
+        multi = multi[np.argsort(edge_labels[multi], kind="stable")]
+        bounds = np.flatnonzero(np.diff(edge_labels[multi])) + 1
+        for group in np.split(multi, bounds):
+            g_rows, g_cols = _solve_dense(rows[group], cols[group], costs[group])
+            matched_rows.append(g_rows)
+            matched_cols.append(g_cols)
+    return np.concatenate(matched_rows), np.concatenate(matched_cols)
+
+
+def associate_boxes(
+    track_boxes: np.ndarray,
+    det_boxes: np.ndarray,
+    min_overlap: float,
+    metric: str = "iou",
+    sparse: bool = True,
+    cell_size: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Match tracks to detections maximising overlap, keeping pairs with overlap >= ``min_overlap``.
+
+    With ``sparse=True`` pairs that cannot reach ``min_overlap`` are dropped before the
+    solve. Non-overlapping boxes never exceed an overlap of zero under IoU, GIoU or
+    DIoU, so pruning is exact whenever ``min_overlap > 0``; otherwise, and for small
+    frames where the grid costs more than it saves, the dense path is used.
+    """
+    n, m = track_boxes.shape[0], det_boxes.shape[0]
+    if n == 0 or m == 0:
+        return _EMPTY, _EMPTY
+    if sparse and min_overlap > 0 and should_solve_sparse(n, m):
+        rows, cols = candidate_pairs(track_boxes, det_boxes, cell_size)
+        scores = paired_overlap(track_boxes[rows], det_boxes[cols], metric)
+    else:
+        scores = overlap_matrix(track_boxes, det_boxes, metric)
+        rows, cols = np.indices(scores.shape).reshape(2, -1)
+        scores = scores.ravel()
+    keep = scores >= min_overlap
+    return sparse_linear_assignment(rows[keep], cols[keep], 1.0 - scores[keep], n, m)
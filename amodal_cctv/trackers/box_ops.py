@@ -0,0 +1,84 @@
+"""Broadcast box-overlap kernels shared by the trackers.
+
+All boxes are ``(x1, y1, x2, y2)``. Pairwise kernels accept track boxes of shape
+``(..., N, 4)`` and detection boxes of shape ``(..., M, 4)`` and return a
+``(..., N, M)`` matrix, so a whole frame or a stack of frames is scored in one call.
+"""
+from __future__ import annotations
+
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+
+def _as_boxes(boxes: np.ndarray) -> np.ndarray:
+    boxes = np.asarray(boxes, dtype=float)
+    if boxes.shape[-1:] != (4,):
+        raise ValueError(f"Expected boxes with trailing dimension 4, got shape {boxes.shape}")
+    return boxes
+
+
+def _pairwise_terms(
+    track_boxes: np.ndarray, det_boxes: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, Tuple[np.ndarray, ...], Tuple[np.ndarray, ...]]:
+    """Return intersection, union and the broadcast coordinates of both box sets."""
+    t = _as_boxes(track_boxes)[..., :, None, :]
+    d = _as_boxes(det_boxes)[..., None, :, :]
+    tx1, ty1, tx2, ty2 = t[..., 0], t[..., 1], t[..., 2], t[..., 3]
+    dx1, dy1, dx2, dy2 = d[..., 0], d[..., 1], d[..., 2], d[..., 3]
+
+    # Same operation order as the scalar reference so results are bit-identical.
+    t_area = np.maximum(tx2 - tx1, 0) * np.maximum(ty2 - ty1, 0)
+    d_area = np.maximum(dx2 - dx1, 0) * np.maximum(dy2 - dy1, 0)
+    iw = np.maximum(np.minimum(tx2, dx2) - np.maximum(tx1, dx1), 0)
+    ih = np.maximum(np.minimum(ty2, dy2) - np.maximum(ty1, dy1), 0)
+    inter = iw * ih
+    union = t_area + d_area - inter
+    return inter, union, (tx1, ty1, tx2, ty2), (dx1, dy1, dx2, dy2)
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    out = np.zeros(np.broadcast(numerator, denominator).shape, dtype=float)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def iou_matrix(track_boxes: np.ndarray, det_boxes: np.ndarray) -> np.ndarray:
+    """Pairwise intersection-over-union; degenerate pairs score 0."""
+    inter, union, _, _ = _pairwise_terms(track_boxes, det_boxes)
+    return _safe_ratio(inter, union)
+
+
+def giou_matrix(track_boxes: np.ndarray, det_boxes: np.ndarray) -> np.ndarray:
+    """Pairwise generalized IoU in ``[-1, 1]``."""
+    inter, union, (tx1, ty1, tx2, ty2), (dx1, dy1, dx2, dy2) = _pairwise_terms(track_boxes, det_boxes)
+    iou = _safe_ratio(inter, union)
+    cw = np.maximum(tx2, dx2) - np.minimum(tx1, dx1)
+    ch = np.maximum(ty2, dy2) - np.minimum(ty1, dy1)
+    enclosing = np.maximum(cw, 0) * np.maximum(ch, 0)
+    return iou - _safe_ratio(enclosing - union, enclosing)
+
+
+def diou_matrix(track_boxes: np.ndarray, det_boxes: np.ndarray) -> np.ndarray:
+    """Pairwise distance IoU: IoU minus normalised squared centre distance."""
+    inter, union, (tx1, ty1, tx2, ty2), (dx1, dy1, dx2, dy2) = _pairwise_terms(track_boxes, det_boxes)
+    iou = _safe_ratio(inter, union)
+    center_dist = ((tx1 + tx2) - (dx1 + dx2)) ** 2 / 4.0 + ((ty1 + ty2) - (dy1 + dy2)) ** 2 / 4.0
+    cw = np.maximum(tx2, dx2) - np.minimum(tx1, dx1)
+    ch = np.maximum(ty2, dy2) - np.minimum(ty1, dy1)
+    diagonal = cw**2 + ch**2
+    return iou - _safe_ratio(center_dist, diagonal)
+
+
+OVERLAP_METRICS: Dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    "iou": iou_matrix,
+    "giou": giou_matrix,
+    "diou": diou_matrix,
+}
+
+
+def overlap_matrix(track_boxes: np.ndarray, det_boxes: np.ndarray, metric: str = "iou") -> np.ndarray:
+    """Dispatch to the pairwise kernel named by ``metric``."""
+    if metric not in OVERLAP_METRICS:
+        raise ValueError(f"Unknown overlap metric: {metric}")
+    return OVERLAP_METRICS[metric](track_boxes, det_boxes)
@@ -1,25 +1,269 @@
-"""OC-SORT placeholder implementation."""
+"""OC-SORT tracker with observation-centric re-update and recovery."""
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..permanence.kalman import BatchedKalmanFilter, KalmanConfig
+from .association import associate_boxes, candidate_pairs, paired_overlap, should_solve_sparse, sparse_linear_assignment
+from .box_ops import OVERLAP_METRICS
+from .track_store import TrackBatch, TrackStore, gather_features
+
+_NO_FRAME = np.iinfo(np.int64).min // 2
 
 
 @dataclass
 class OCSortConfig:
+    """Configurables for OC-SORT.
+
+    ``match_thresh`` is the minimum overlap for a match in every round. ``inertia``
+    weights the velocity-direction consistency term, where directions are measured
+    between observations up to ``delta_t`` frames apart. Tracks unmatched for more
+    than ``max_age`` frames are retired. ``use_byte`` adds ByteTrack's low-score
+    rescue round between the main and the last-observation recovery rounds.
+    """
+
     track_thresh: float = 0.5
     match_thresh: float = 0.7
     delta_t: int = 3
+    inertia: float = 0.2
+    max_age: int = 30
+    iou_metric: str = "iou"
+    use_byte: bool = False
+    low_thresh: float = 0.1
+    sparse_assignment: bool = True
+    grid_cell_size: Optional[float] = None
+    initial_capacity: int = 256
+    kalman_config: Optional[Dict[str, float]] = None
+
+    def __post_init__(self) -> None:
+        if self.iou_metric not in OVERLAP_METRICS:
+            raise ValueError(f"Unknown iou_metric {self.iou_metric!r}; choose from {sorted(OVERLAP_METRICS)}")
+        if self.delta_t < 1:
+            raise ValueError("delta_t must be at least 1.")
+
+
+def _centers(boxes: np.ndarray) -> np.ndarray:
+    return 0.5 * (boxes[..., :2] + boxes[..., 2:])
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norm, 1e-6)
+
+
+def direction_consistency(
+    directions: np.ndarray, previous_obs: np.ndarray, det_boxes: np.ndarray, det_scores: np.ndarray
+) -> np.ndarray:
+    """Velocity-direction consistency for aligned (track, detection) pairs.
+
+    ``directions`` are the tracks' unit motion directions, ``previous_obs`` their
+    observation ``delta_t`` frames back. The score is ``(pi/2 - |angle|) / pi`` between
+    the track direction and the direction from that observation to the detection,
+    scaled by detection confidence; tracks without a direction score zero.
+    """
+    to_det = _unit(_centers(det_boxes) - _centers(previous_obs))
+    cosine = np.clip(np.sum(directions * to_det, axis=-1), -1.0, 1.0)
+    score = (0.5 * np.pi - np.abs(np.arccos(cosine))) / np.pi
+    has_direction = np.any(directions != 0, axis=-1)
+    return np.where(has_direction, score, 0.0) * det_scores
 
 
 class OCSortTracker:
-    """Simplified OC-SORT tracker returning empty track list."""
+    """OC-SORT on top of the shared track store and batched Kalman engine.
+
+    Every track owns a row in the :class:`TrackStore` and the matching row in a
+    :class:`BatchedKalmanFilter`; both compact stably on retirement so rows stay
+    aligned. Each frame runs: Kalman prediction, association on overlap plus
+    velocity-direction consistency, optional low-score rescue, observation-centric
+    recovery (unmatched tracks' last observations vs leftover detections), and
+    observation-centric re-update, which replays a linear virtual trajectory through
+    the filter for tracks returning after a gap.
+    """
 
     def __init__(self, config: OCSortConfig) -> None:
         self.config = config
+        delta_t = config.delta_t
+        self._kalman = BatchedKalmanFilter(KalmanConfig(**(config.kalman_config or {})), config.initial_capacity)
+        dim = self._kalman.dim
+        self._store = TrackStore(
+            capacity=config.initial_capacity,
+            extra_columns={
+                "last_obs": ((4,), float),
+                "direction": ((2,), float),
+                "obs_history": ((delta_t, 4), float),
+                "obs_frame": ((delta_t,), np.int64),
+                "frozen_state": ((dim,), float),
+                "frozen_covariance": ((dim, dim), float),
+            },
+        )
+        self._frame = 0
+
+    @property
+    def store(self) -> TrackStore:
+        return self._store
+
+    @property
+    def kalman(self) -> BatchedKalmanFilter:
+        return self._kalman
+
+    def _previous_observation(self) -> np.ndarray:
+        """Oldest stored observation at most ``delta_t`` frames back, else the last one."""
+        store = self._store
+        frames = store.column("obs_frame")
+        in_window = (self._frame - frames) <= self.config.delta_t
+        oldest = np.argmin(np.where(in_window, frames, np.iinfo(np.int64).max), axis=1)
+        rows = np.arange(frames.shape[0])
+        previous = store.column("obs_history")[rows, oldest]
+        return np.where(in_window[rows, oldest][:, None], previous, store.column("last_obs"))
+
+    def _candidates(self, n: int, m: int, track_boxes: np.ndarray, det_boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.config.sparse_assignment and self.config.match_thresh > 0 and should_solve_sparse(n, m):
+            return candidate_pairs(track_boxes, det_boxes, self.config.grid_cell_size)
+        return np.indices((n, m)).reshape(2, -1)
+
+    def _associate(
+        self,
+        track_boxes: np.ndarray,
+        det_boxes: np.ndarray,
+        det_scores: np.ndarray,
+        previous_obs: np.ndarray,
+        directions: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Maximise overlap plus weighted direction consistency over pairs passing ``match_thresh``."""
+        n, m = track_boxes.shape[0], det_boxes.shape[0]
+        if n == 0 or m == 0:
+            return np.empty((0,), dtype=np.int64), np.empty((0,), dtype=np.int64)
+        rows, cols = self._candidates(n, m, track_boxes, det_boxes)
+        overlap = paired_overlap(track_boxes[rows], det_boxes[cols], self.config.iou_metric)
+        keep = overlap >= self.config.match_thresh
+        rows, cols, overlap = rows[keep], cols[keep], overlap[keep]
+        consistency = direction_consistency(directions[rows], previous_obs[rows], det_boxes[cols], det_scores[cols])
+        return sparse_linear_assignment(rows, cols, -(overlap + self.config.inertia * consistency), n, m)
+
+    def _match_boxes(self, track_boxes: np.ndarray, det_boxes: np.ndarray, min_overlap: float) -> Tuple[np.ndarray, np.ndarray]:
+        return associate_boxes(
+            track_boxes,
+            det_boxes,
+            min_overlap,
+            metric=self.config.iou_metric,
+            sparse=self.config.sparse_assignment,
+            cell_size=self.config.grid_cell_size,
+        )
+
+    def _reupdate(self, rows: np.ndarray, gaps: np.ndarray, observations: np.ndarray) -> None:
+        """Observation-centric re-update: rewind to the last observation and replay a virtual path.
+
+        Leaves each row predicted up to the current frame, ready for the real update.
+        """
+        store, kalman = self._store, self._kalman
+        kalman.state[rows] = store.column("frozen_state")[rows]
+        kalman.covariance[rows] = store.column("frozen_covariance")[rows]
+        start = store.column("last_obs")[rows]
+        step = (observations - start) / gaps[:, None]
+        for k in range(1, int(gaps.max())):
+            active = gaps > k
+            kalman.predict(1.0, occluded=np.zeros(int(active.sum()), dtype=bool), rows=rows[active])
+            kalman.update(rows[active], start[active] + k * step[active])
+        kalman.predict(1.0, occluded=np.zeros(rows.size, dtype=bool), rows=rows)
+
+    def _observe(self, rows: np.ndarray, observations: np.ndarray, previous_obs: np.ndarray) -> None:
+        """Record observations: direction, history ring, last observation and the frozen filter state."""
+        store = self._store
+        delta = _centers(observations) - _centers(previous_obs)
+        moved = np.any(delta != 0, axis=1)
+        store.column("direction")[rows[moved]] = _unit(delta[moved])
+        slot = self._frame % self.config.delta_t
+        store.column("obs_history")[rows, slot] = observations
+        store.column("obs_frame")[rows, slot] = self._frame
+        store.column("last_obs")[rows] = observations
+        store.column("frozen_state")[rows] = self._kalman.state[rows]
+        store.column("frozen_covariance")[rows] = self._kalman.covariance[rows]
+
+    def update(self, detections: Dict[str, Any], timestamp: Optional[float] = None) -> TrackBatch:
+        """Associate one frame of detections and return a view of all live tracks."""
+        boxes = np.asarray(detections.get("boxes", []), dtype=float)
+        scores = np.asarray(detections.get("scores", []), dtype=float)
+        classes = np.asarray(detections.get("classes", []), dtype=int)
+        features = detections.get("features")
+
+        if boxes.ndim == 1:
+            boxes = boxes.reshape(-1, 4)
+        if boxes.size == 0:
+            boxes = np.empty((0, 4), dtype=float)
+        if scores.size == 0:
+            scores = np.zeros((boxes.shape[0],), dtype=float)
+        if classes.size == 0:
+            classes = np.zeros((boxes.shape[0],), dtype=int)
+
+        self._frame += 1
+        store, kalman = self._store, self._kalman
+        store.mark_missed()
+        # time_since_update > 1 means the track was already unobserved last frame.
+        kalman.predict(1.0, occluded=store.column("time_since_update") > 1)
+        track_boxes = store.column("box")
+        track_boxes[:] = kalman.state[:, :4]
+        previous_obs = self._previous_observation()
+        track_matched = np.zeros(len(store), dtype=bool)
+        det_matched = np.zeros(boxes.shape[0], dtype=bool)
+
+        # Round 1: predicted boxes vs high-score detections, with direction consistency.
+        high_idx = np.flatnonzero(scores >= self.config.track_thresh)
+        rows, cols = self._associate(
+            track_boxes, boxes[high_idx], scores[high_idx], previous_obs, store.column("direction")
+        )
+        matched_tracks, matched_dets = [rows], [high_idx[cols]]
+        track_matched[rows] = True
+        det_matched[high_idx[cols]] = True
+
+        # Optional round 2: leftover tracks vs low-score detections.
+        if self.config.use_byte:
+            low_idx = np.flatnonzero((scores >= self.config.low_thresh) & (scores < self.config.track_thresh))
+            leftover = np.flatnonzero(~track_matched)
+            rows, cols = self._match_boxes(track_boxes[leftover], boxes[low_idx], self.config.match_thresh)
+            matched_tracks.append(leftover[rows])
+            matched_dets.append(low_idx[cols])
+            track_matched[leftover[rows]] = True
+            det_matched[low_idx[cols]] = True
+
+        # Round 3 (OCR): last observations of leftover tracks vs leftover high-score detections.
+        leftover = np.flatnonzero(~track_matched)
+        spare = high_idx[~det_matched[high_idx]]
+        rows, cols = self._match_boxes(store.column("last_obs")[leftover], boxes[spare], self.config.match_thresh)
+        matched_tracks.append(leftover[rows])
+        matched_dets.append(spare[cols])
+        det_matched[spare[cols]] = True
+
+        track_rows, det_rows = np.concatenate(matched_tracks), np.concatenate(matched_dets)
+        track_matched[track_rows] = True
+        observations = boxes[det_rows]
+        gaps = store.column("time_since_update")[track_rows]
+        returning = gaps > 1
+        if returning.any():
+            self._reupdate(track_rows[returning], gaps[returning], observations[returning])
+        kalman.update(track_rows, observations)
+        self._observe(track_rows, observations, previous_obs[track_rows])
+        store.update(track_rows, observations, scores[det_rows], classes[det_rows], *gather_features(features, det_rows))
+
+        expired = ~track_matched & (store.column("time_since_update") > self.config.max_age)
+        kalman.remove(expired)
+        store.retire(expired)
+
+        # Spawn tracks for unmatched high-score detections; they take the last rows.
+        spawn = high_idx[~det_matched[high_idx]]
+        ids = store.add(boxes[spawn], scores[spawn], classes[spawn], *gather_features(features, spawn))
+        if ids.size:
+            kalman.add(ids, boxes[spawn])
+            new_rows = np.arange(len(store) - ids.size, len(store))
+            store.column("obs_frame")[new_rows] = _NO_FRAME
+            self._observe(new_rows, boxes[spawn], boxes[spawn])
+        return store.snapshot(timestamp)
 
-    def track(self, detections: Dict[str, Any]) -> List[Dict[str, Any]]:
-        return []
+    def track(self, detections: Dict[str, Any], timestamp: Optional[float] = None) -> TrackBatch:
+        """Compatibility alias for previous API."""
+        return self.update(detections, timestamp=timestamp)
 
 
 def build_ocsort_tracker(config_dict: Dict[str, Any] | None = None) -> OCSortTracker:
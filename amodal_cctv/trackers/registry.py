@@ -0,0 +1,20 @@
+"""Tracker registry used by config-driven runners."""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+from .bytetrack import build_bytetrack_tracker
+from .ocsort import build_ocsort_tracker
+from .strongsort import build_strongsort_tracker
+
+TRACKER_REGISTRY: Dict[str, Callable[..., Any]] = {
+    "bytetrack": build_bytetrack_tracker,
+    "ocsort": build_ocsort_tracker,
+    "strongsort": build_strongsort_tracker,
+}
+
+
+def build_tracker(name: str, config_dict: Dict[str, Any] | None = None, **kwargs: Any) -> Any:
+    if name not in TRACKER_REGISTRY:
+        raise KeyError(f"Tracker {name} not registered")
+    return TRACKER_REGISTRY[name](config_dict, **kwargs)
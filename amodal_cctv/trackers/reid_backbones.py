@@ -1,25 +1,133 @@
-"""Lightweight Re-ID backbone placeholders."""
+"""Lightweight Re-ID backbones with batched ROI embedding."""
 from __future__ import annotations
 
+import warnings
 from dataclasses import dataclass
-from typing import Any
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+try:
+    import torch
+    import torch.nn as nn
+    import torch.nn.functional as F
+except ImportError:  # pragma: no cover - optional dependency in scaffolding stage
+    torch = None
+    nn = None
+    F = None
+
+_MEAN = (0.485, 0.456, 0.406)
+_STD = (0.229, 0.224, 0.225)
+
+
+def _is_placeholder(value: Optional[str]) -> bool:
+    return value is not None and "{{PLACEHOLDER" in value
 
 
 @dataclass
 class ReIDConfig:
     model_name: str = "osnet_x0_25"
     device: str = "cuda"
+    weights_path: Optional[str] = None
+    embedding_dim: int = 128
+    crop_size: Tuple[int, int] = (128, 64)
+
+
+class _ReIDNet(nn.Module if nn is not None else object):
+    """Small conv encoder: four strided blocks, global pooling and a linear projection."""
+
+    def __init__(self, embedding_dim: int) -> None:
+        super().__init__()  # type: ignore[misc]
+        channels = (3, 32, 64, 96, 128)
+        blocks = []
+        for c_in, c_out in zip(channels[:-1], channels[1:]):
+            blocks += [nn.Conv2d(c_in, c_out, 3, stride=2, padding=1, bias=False), nn.BatchNorm2d(c_out), nn.ReLU(inplace=True)]
+        self.features = nn.Sequential(*blocks)
+        self.project = nn.Linear(channels[-1], embedding_dim)
+
+    def forward(self, crops: "torch.Tensor") -> "torch.Tensor":
+        pooled = self.features(crops).mean(dim=(2, 3))
+        return F.normalize(self.project(pooled), dim=1)
+
+
+def crop_grid(boxes: "torch.Tensor", height: int, width: int, crop_size: Tuple[int, int]) -> "torch.Tensor":
+    """Sampling grid that resamples every box to ``crop_size`` in one ``grid_sample`` call.
+
+    Crops are stacked along the output height, giving a ``(1, K * crop_h, crop_w, 2)``
+    grid in normalised ``[-1, 1]`` image coordinates.
+    """
+    crop_h, crop_w = crop_size
+    ys = (torch.arange(crop_h, dtype=boxes.dtype, device=boxes.device) + 0.5) / crop_h
+    xs = (torch.arange(crop_w, dtype=boxes.dtype, device=boxes.device) + 0.5) / crop_w
+    x = boxes[:, None, 0:1] + (boxes[:, None, 2:3] - boxes[:, None, 0:1]) * xs[None, None, :]
+    y = boxes[:, 1:2, None] + (boxes[:, 3:4, None] - boxes[:, 1:2, None]) * ys[None, :, None]
+    gx = (2.0 * x / width - 1.0).expand(-1, crop_h, crop_w)
+    gy = (2.0 * y / height - 1.0).expand(-1, crop_h, crop_w)
+    return torch.stack([gx, gy], dim=-1).reshape(1, -1, crop_w, 2)
 
 
 class BaseReIDModel:
-    """Base interface for Re-ID models."""
+    """Re-ID embedder: crops every box of a frame and embeds them in one forward pass."""
 
     def __init__(self, config: ReIDConfig) -> None:
         self.config = config
+        self._net = None
+        self._device = None
 
     def describe(self, box: Any) -> str:
         return f"embedding@{self.config.model_name}"
 
+    def _ensure_net(self):
+        if self._net is not None:
+            return self._net
+        if torch is None:
+            raise ImportError("PyTorch is required for Re-ID embeddings. Install via `pip install torch`.")
+        device = self.config.device
+        if device.startswith("cuda") and not torch.cuda.is_available():
+            device = "cpu"
+        net = _ReIDNet(self.config.embedding_dim)
+        weights = self.config.weights_path
+        if weights and not _is_placeholder(weights):
+            resolved = Path(weights).expanduser()
+            if not resolved.exists():
+                raise FileNotFoundError(f"Re-ID weights not found at {resolved}. See placeholders.md.")
+            net.load_state_dict(torch.load(resolved, map_location="cpu"))
+        else:
+            warnings.warn(
+                "Re-ID weights_path is not set; embeddings come from randomly initialised weights "
+                "and carry no identity information.",
+                RuntimeWarning,
+                stacklevel=3,
+            )
+        self._device = torch.device(device)
+        self._net = net.to(self._device).eval()
+        return self._net
+
+    def embed(self, image: Any, boxes: np.ndarray) -> np.ndarray:
+        """Return L2-normalised ``(K, embedding_dim)`` embeddings for ``(K, 4)`` xyxy pixel boxes.
+
+        ``image`` is an ``(H, W, 3)`` array (uint8 or float) or an equivalent tensor.
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        if boxes.shape[0] == 0:
+            return np.empty((0, self.config.embedding_dim), dtype=np.float32)
+        net = self._ensure_net()
+        with torch.inference_mode():
+            frame = torch.as_tensor(np.ascontiguousarray(image), device=self._device)
+            frame = frame.permute(2, 0, 1)[None].float()
+            if frame.max() > 1.0:
+                frame = frame / 255.0
+            mean = torch.tensor(_MEAN, device=self._device).view(1, 3, 1, 1)
+            std = torch.tensor(_STD, device=self._device).view(1, 3, 1, 1)
+            frame = (frame - mean) / std
+            height, width = frame.shape[-2:]
+            grid = crop_grid(torch.as_tensor(boxes, device=self._device), height, width, self.config.crop_size)
+            crops = F.grid_sample(frame, grid, mode="bilinear", padding_mode="zeros", align_corners=False)
+            crop_h, crop_w = self.config.crop_size
+            crops = crops.view(3, boxes.shape[0], crop_h, crop_w).transpose(0, 1)
+            return net(crops).cpu().numpy()
+
 
 def build_reid_model(config_dict: dict | None = None) -> BaseReIDModel:
     config = ReIDConfig(**(config_dict or {}))
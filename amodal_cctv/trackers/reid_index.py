@@ -0,0 +1,271 @@
+"""Retired-track embedding store with an IVF approximate nearest-neighbour index."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .track_store import TrackBatch
+
+
+@dataclass
+class ReIDIndexConfig:
+    """IVF parameters and retention for retired-track embeddings.
+
+    Below ``train_size`` entries, and while the store holds at most ``exact_below``
+    entries (where one dense product is faster than probing lists), queries are exact.
+    Once trained, entries are bucketed
+    into ``n_lists`` k-means cells and each query scans its ``n_probe`` closest cells;
+    the quantiser is retrained when the store grows ``retrain_growth``-fold. Entries
+    retired more than ``window`` time units before the newest one are evicted, and
+    ``max_items`` caps the store: once it is exceeded the oldest entries are dropped
+    down to ``evict_to * max_items``, so eviction runs once per batch of retirements
+    rather than on every add.
+    """
+
+    n_lists: int = 64
+    n_probe: int = 8
+    train_size: int = 2048
+    exact_below: int = 8192
+    retrain_growth: float = 4.0
+    kmeans_iters: int = 10
+    window: Optional[float] = None
+    max_items: Optional[int] = None
+    evict_to: float = 0.9
+    seed: int = 0
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+def _topk(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-``k`` of ``scores`` sorted by descending score: (indices, values)."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0), dtype=scores.dtype)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    values = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-values, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+
+def cosine_topk(queries: np.ndarray, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-``k`` cosine search of L2-normalised ``queries`` against ``vectors``."""
+    return _topk(queries @ vectors.T, k)
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids maximising cosine similarity to their members."""
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, vectors.shape[0])
+    centroids = vectors[rng.choice(vectors.shape[0], n_clusters, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = ~np.any(sums != 0, axis=1)
+        sums[empty] = vectors[rng.choice(vectors.shape[0], int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+class RetiredTrackIndex:
+    """Store of retired-track embeddings with batched approximate top-k.
+
+    Entries live in growable parallel arrays (vector, track id, retire time, camera).
+    After training, a packed prefix is sorted by inverted list so each list is one
+    contiguous slice and a batched query runs one matrix product per probed list.
+    Entries added since the last pack form a short tail that is scanned exactly; it is
+    folded into the packed prefix once it outgrows ``max(256, 10%)`` of the store.
+    """
+
+    _TAIL_MIN = 256
+
+    def __init__(self, config: ReIDIndexConfig | None = None, capacity: int = 1024) -> None:
+        self.config = config or ReIDIndexConfig()
+        self._capacity = max(int(capacity), 1)
+        self._vectors: Optional[np.ndarray] = None
+        self._track_id = np.zeros((self._capacity,), dtype=np.int64)
+        self._retired_at = np.zeros((self._capacity,), dtype=float)
+        self._camera = np.empty((self._capacity,), dtype=object)
+        self._list_id = np.zeros((self._capacity,), dtype=np.int64)
+        self._size = 0
+        self._packed_size = 0
+        self._centroids: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._trained_size = 0
+        self._clock = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def _columns(self) -> Tuple[str, ...]:
+        return ("_vectors", "_track_id", "_retired_at", "_camera", "_list_id")
+
+    def _reserve(self, extra: int, dim: int) -> None:
+        if self._vectors is None:
+            self._vectors = np.zeros((self._capacity, dim), dtype=np.float32)
+        needed = self._size + extra
+        if needed <= self._capacity:
+            return
+        self._capacity = max(needed, 2 * self._capacity)
+        for name in self._columns():
+            old = getattr(self, name)
+            grown = np.empty((self._capacity, *old.shape[1:]), dtype=old.dtype)
+            grown[: self._size] = old[: self._size]
+            setattr(self, name, grown)
+
+    def add(
+        self,
+        features: np.ndarray,
+        track_ids: np.ndarray,
+        timestamp: Optional[float] = None,
+        camera: str = "",
+    ) -> None:
+        """Store embeddings of tracks retired at ``timestamp`` (``None`` reuses the latest time)."""
+        features = _normalize(np.atleast_2d(features))
+        count = features.shape[0]
+        if count == 0:
+            return
+        if timestamp is not None:
+            self._clock = max(self._clock, float(timestamp))
+        self._reserve(count, features.shape[1])
+        rows = slice(self._size, self._size + count)
+        self._vectors[rows] = features
+        self._track_id[rows] = np.asarray(track_ids, dtype=np.int64).reshape(count)
+        self._retired_at[rows] = self._clock
+        self._camera[rows] = camera
+        self._list_id[rows] = np.argmax(features @ self._centroids.T, axis=1) if self.is_trained else 0
+        self._size += count
+        self._evict()
+        self._maybe_train()
+
+    def add_tracks(self, tracks: TrackBatch, timestamp: Optional[float] = None, camera: str = "") -> None:
+        """Store the embeddings of retired tracks that carry one."""
+        if tracks.feature is None or len(tracks) == 0:
+            return
+        keep = np.asarray(tracks.has_feature, dtype=bool)
+        if keep.any():
+            self.add(tracks.feature[keep], tracks.track_id[keep], timestamp, camera)
+
+    def evict_before(self, timestamp: float) -> int:
+        """Drop entries retired before ``timestamp``; return how many were removed."""
+        return self._drop(self._retired_at[: self._size] < timestamp)
+
+    def _evict(self) -> None:
+        if self.config.window is not None:
+            self.evict_before(self._clock - self.config.window)
+        cap = self.config.max_items
+        if cap is not None and self._size > cap:
+            excess = self._size - min(int(cap * self.config.evict_to), cap)
+            oldest = np.argpartition(self._retired_at[: self._size], excess - 1)[:excess]
+            mask = np.zeros(self._size, dtype=bool)
+            mask[oldest] = True
+            self._drop(mask)
+
+    def _drop(self, mask: np.ndarray) -> int:
+        """Stable compaction; the packed prefix stays sorted by list, so only offsets change."""
+        removed = int(mask.sum())
+        if removed:
+            keep = np.flatnonzero(~mask)
+            for name in self._columns():
+                array = getattr(self, name)
+                array[: keep.size] = array[keep]
+            self._packed_size -= int(mask[: self._packed_size].sum())
+            self._size = keep.size
+            self._refresh_offsets()
+        return removed
+
+    def _refresh_offsets(self) -> None:
+        if self.is_trained:
+            counts = np.bincount(self._list_id[: self._packed_size], minlength=self._centroids.shape[0])
+            self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def _maybe_train(self) -> None:
+        if self._size < self.config.train_size:
+            return
+        if self.is_trained and self._size < self.config.retrain_growth * self._trained_size:
+            return
+        self.train()
+
+    def train(self) -> None:
+        """(Re)build the coarse quantiser over the current entries and repack."""
+        if self._size == 0:
+            return
+        vectors = self._vectors[: self._size]
+        self._centroids = spherical_kmeans(vectors, self.config.n_lists, self.config.kmeans_iters, self.config.seed)
+        self._list_id[: self._size] = np.argmax(vectors @ self._centroids.T, axis=1)
+        self._trained_size = self._size
+        self._pack()
+
+    def _pack(self) -> None:
+        """Sort all entries by inverted list so every list is one contiguous slice."""
+        order = np.argsort(self._list_id[: self._size], kind="stable")
+        for name in self._columns():
+            array = getattr(self, name)
+            array[: self._size] = array[order]
+        self._packed_size = self._size
+        self._refresh_offsets()
+
+    def search(self, queries: np.ndarray, k: int = 10, exact: bool = False) -> Dict[str, np.ndarray]:
+        """Batched top-``k`` cosine search.
+
+        Returns ``(Q, k)`` arrays ``track_id``, ``similarity``, ``retired_at`` and
+        ``camera``; missing results have ``track_id == -1`` and ``-inf`` similarity.
+        """
+        queries = _normalize(np.atleast_2d(queries))
+        q = queries.shape[0]
+        rows = np.full((q, k), -1, dtype=np.int64)
+        sims = np.full((q, k), -np.inf, dtype=np.float32)
+        if self._size and q:
+            if exact or not self.is_trained or self._size <= self.config.exact_below:
+                idx, val = cosine_topk(queries, self._vectors[: self._size], k)
+            else:
+                if self._size - self._packed_size > max(self._TAIL_MIN, self._packed_size // 10):
+                    self._pack()
+                idx, val = self._search_ivf(queries, k)
+            rows[:, : idx.shape[1]] = idx
+            sims[:, : val.shape[1]] = val
+        found = rows >= 0
+        safe = np.where(found, rows, 0)
+        return {
+            "track_id": np.where(found, self._track_id[safe], -1),
+            "similarity": sims,
+            "retired_at": np.where(found, self._retired_at[safe], np.nan),
+            "camera": np.where(found, self._camera[safe], None),
+        }
+
+    def _search_ivf(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        q = queries.shape[0]
+        n_probe = min(self.config.n_probe, self._centroids.shape[0])
+        probes, _ = _topk(queries @ self._centroids.T, n_probe)
+        # One slot per probed list plus one for the unpacked tail.
+        cand_idx = np.full((q, n_probe + 1, k), -1, dtype=np.int64)
+        cand_val = np.full((q, n_probe + 1, k), -np.inf, dtype=np.float32)
+        for cell in np.unique(probes):
+            start, end = self._offsets[cell], self._offsets[cell + 1]
+            if start == end:
+                continue
+            q_rows, slots = np.nonzero(probes == cell)
+            local, values = _topk(queries[q_rows] @ self._vectors[start:end].T, k)
+            cand_idx[q_rows, slots, : local.shape[1]] = local + start
+            cand_val[q_rows, slots, : values.shape[1]] = values
+        if self._size > self._packed_size:
+            local, values = cosine_topk(queries, self._vectors[self._packed_size : self._size], k)
+            cand_idx[:, n_probe, : local.shape[1]] = local + self._packed_size
+            cand_val[:, n_probe, : values.shape[1]] = values
+        best, values = _topk(cand_val.reshape(q, -1), k)
+        picked = np.take_along_axis(cand_idx.reshape(q, -1), best, axis=1)
+        return np.where(np.isfinite(values), picked, -1), values
+
+
+def build_reid_index(config_dict: Dict[str, float] | None = None) -> RetiredTrackIndex:
+    config = ReIDIndexConfig(**(config_dict or {}))
+    return RetiredTrackIndex(config)
@@ -1,37 +1,249 @@
-"""StrongSORT placeholder with optional Re-ID support."""
+"""StrongSORT tracker with batched Re-ID embeddings and per-track galleries."""
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..permanence.gating import GatingConfig, mahalanobis_gate_batch, pairwise_residuals, whitening_factors
+from ..permanence.kalman import BatchedKalmanFilter, KalmanConfig
+from .association import associate_boxes, sparse_linear_assignment
+from .reid_index import ReIDIndexConfig, RetiredTrackIndex
+from .track_store import TrackBatch, TrackStore, gather_features
+
+GALLERY_MODES = ("ema", "ring")
 
 
 @dataclass
 class StrongSortConfig:
+    """Configurables for StrongSORT.
+
+    Confirmed tracks are matched on ``appearance_weight * cosine distance +
+    motion_weight * gated Mahalanobis distance``; pairs outside the motion gate or
+    beyond ``appearance_threshold`` are never matched. Tentative tracks and tracks
+    missed for one frame then get an IoU round with ``match_thresh`` as minimum
+    overlap. Each track keeps an EMA embedding (``ema_alpha``) and a ring buffer of
+    its last ``gallery_size`` embeddings; ``gallery_mode`` picks which one is matched.
+    ``embedding_dim`` must match the Re-ID model's output. Setting ``reid_index``
+    keeps retired tracks' EMA embeddings in a :class:`RetiredTrackIndex`.
+    """
+
     appearance_weight: float = 0.5
     motion_weight: float = 0.5
     reid_enabled: bool = False
+    track_thresh: float = 0.5
+    match_thresh: float = 0.8
+    max_age: int = 30
+    appearance_threshold: float = 0.35
+    ema_alpha: float = 0.9
+    gallery_size: int = 10
+    gallery_mode: str = "ema"
+    embedding_dim: int = 128
+    initial_capacity: int = 256
+    kalman_config: Optional[Dict[str, float]] = None
+    gating_config: Optional[Dict[str, float]] = None
+    reid_index: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self) -> None:
+        if self.gallery_mode not in GALLERY_MODES:
+            raise ValueError(f"Unknown gallery_mode {self.gallery_mode!r}; choose from {GALLERY_MODES}")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
 
 
 class StrongSortTracker:
-    """Mock StrongSORT tracker that merges detection metadata."""
+    """Appearance-plus-motion tracker on the shared track store and batched Kalman engine.
+
+    With ``reid_enabled`` detection embeddings come from ``detections["features"]`` when
+    present, otherwise from ``reid_model.embed(image, boxes)`` over the whole frame in
+    one batch; with it off the tracker matches on motion alone. Track rows in the store and the Kalman filter stay aligned.
+    """
+
+    uses_image = True
 
     def __init__(self, config: StrongSortConfig, reid_model: Optional[Any] = None) -> None:
         self.config = config
         self.reid_model = reid_model
+        size, dim = config.gallery_size, config.embedding_dim
+        self._store = TrackStore(
+            capacity=config.initial_capacity,
+            extra_columns={
+                "gallery": ((size, dim), float),
+                "gallery_count": ((), np.int64),
+            },
+        )
+        self._kalman = BatchedKalmanFilter(KalmanConfig(**(config.kalman_config or {})), config.initial_capacity)
+        self._gating = GatingConfig(**(config.gating_config or {}))
+        self._retired_index: Optional[RetiredTrackIndex] = None
+        if config.reid_index is not None:
+            self._retired_index = RetiredTrackIndex(ReIDIndexConfig(**config.reid_index))
+
+    @property
+    def store(self) -> TrackStore:
+        return self._store
+
+    @property
+    def kalman(self) -> BatchedKalmanFilter:
+        return self._kalman
+
+    @property
+    def retired_index(self) -> Optional[RetiredTrackIndex]:
+        return self._retired_index
+
+    def _detection_features(
+        self, detections: Dict[str, Any], keep: np.ndarray, boxes: np.ndarray, image: Any
+    ) -> Optional[np.ndarray]:
+        if not self.config.reid_enabled:
+            return None
+        features = detections.get("features")
+        if features is not None:
+            return self._checked(np.asarray(features, dtype=float)[keep], "detection features")
+        if isinstance(image, dict):
+            image = image.get("image")
+        if self.reid_model is None or image is None or boxes.shape[0] == 0:
+            return None
+        return self._checked(np.asarray(self.reid_model.embed(image, boxes), dtype=float), "Re-ID embeddings")
 
-    def track(self, detections: Dict[str, Any]) -> List[Dict[str, Any]]:
-        return [
-            {
-                "track_id": idx,
-                "box": box,
-                "score": score,
-                "appearance": self.reid_model.describe(box) if self.reid_model else None,
-            }
-            for idx, (box, score) in enumerate(
-                zip(detections.get("boxes", []), detections.get("scores", [])),
-                start=1,
+    def _checked(self, features: np.ndarray, source: str) -> np.ndarray:
+        """Normalised ``features``; their width must match the galleries' ``embedding_dim``."""
+        if features.ndim != 2 or features.shape[1] != self.config.embedding_dim:
+            raise ValueError(
+                f"{source} are {features.shape[-1]}-dim but embedding_dim is {self.config.embedding_dim}; "
+                "set embedding_dim to the Re-ID backbone's width."
             )
-        ]
+        return _normalize(features)
+
+    def appearance_distance(self, rows: np.ndarray, det_features: np.ndarray) -> np.ndarray:
+        """Cosine distance ``(len(rows), M)`` between track galleries and detection embeddings."""
+        store = self._store
+        if self.config.gallery_mode == "ema":
+            return 1.0 - store.column("feature")[rows] @ det_features.T
+        gallery = store.column("gallery")[rows]
+        n, k, d = gallery.shape
+        similarity = (gallery.reshape(n * k, d) @ det_features.T).reshape(n, k, -1)
+        filled = np.arange(k)[None, :] < store.column("gallery_count")[rows][:, None]
+        similarity = np.where(filled[:, :, None], similarity, -np.inf)
+        return 1.0 - similarity.max(axis=1)
+
+    def _match_cascade(
+        self, rows: np.ndarray, det_boxes: np.ndarray, det_features: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Match ``rows`` to detections on gated motion plus appearance cost."""
+        n, m = rows.size, det_boxes.shape[0]
+        if n == 0 or m == 0:
+            return np.empty((0,), dtype=np.int64), np.empty((0,), dtype=np.int64)
+        means, innovation = self._kalman.project(rows)
+        gate = mahalanobis_gate_batch(
+            pairwise_residuals(means, det_boxes),
+            self._store.column("time_since_update")[rows],
+            self._gating,
+            factors=whitening_factors(innovation),
+        )
+        motion = gate["distance"] / gate["threshold"][:, None]
+        valid = gate["accepted"]
+        cost = motion
+        if det_features is not None and self._store.column("feature") is not None:
+            has_feature = self._store.column("has_feature")[rows]
+            appearance = self.appearance_distance(rows, det_features)
+            weighted = self.config.appearance_weight * appearance + self.config.motion_weight * motion
+            cost = np.where(has_feature[:, None], weighted, motion)
+            valid &= ~has_feature[:, None] | (appearance <= self.config.appearance_threshold)
+        track_idx, det_idx = np.nonzero(valid)
+        matched, dets = sparse_linear_assignment(track_idx, det_idx, cost[track_idx, det_idx], n, m)
+        return rows[matched], dets
+
+    def _push_gallery(self, rows: np.ndarray, embeddings: np.ndarray) -> None:
+        """Write ``embeddings`` into each track's ring gallery, overwriting the oldest slot."""
+        count = self._store.column("gallery_count")
+        slot = count[rows] % self.config.gallery_size
+        self._store.column("gallery")[rows, slot] = embeddings
+        count[rows] += 1
+
+    def _smoothed(self, rows: np.ndarray, embeddings: np.ndarray) -> np.ndarray:
+        """EMA of the stored track embedding towards ``embeddings`` (tracks without one take it as is)."""
+        current = self._store.column("feature")
+        features = embeddings.copy()
+        if current is not None:
+            has_feature = self._store.column("has_feature")[rows]
+            alpha = self.config.ema_alpha
+            features[has_feature] = alpha * current[rows[has_feature]] + (1.0 - alpha) * embeddings[has_feature]
+        return _normalize(features)
+
+    def update(
+        self, detections: Dict[str, Any], timestamp: Optional[float] = None, image: Any = None
+    ) -> TrackBatch:
+        """Associate one frame of detections and return a view of all live tracks."""
+        boxes = np.asarray(detections.get("boxes", []), dtype=float)
+        scores = np.asarray(detections.get("scores", []), dtype=float)
+        classes = np.asarray(detections.get("classes", []), dtype=int)
+
+        if boxes.ndim == 1:
+            boxes = boxes.reshape(-1, 4)
+        if boxes.size == 0:
+            boxes = np.empty((0, 4), dtype=float)
+        if scores.size == 0:
+            scores = np.zeros((boxes.shape[0],), dtype=float)
+        if classes.size == 0:
+            classes = np.zeros((boxes.shape[0],), dtype=int)
+
+        keep = np.flatnonzero(scores >= self.config.track_thresh)
+        boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
+        features = self._detection_features(detections, keep, boxes, image) if keep.size else None
+
+        store, kalman = self._store, self._kalman
+        store.mark_missed()
+        kalman.predict(1.0, occluded=store.column("time_since_update") > 1)
+        track_boxes = store.column("box")
+        track_boxes[:] = kalman.state[:, :4]
+        track_matched = np.zeros(len(store), dtype=bool)
+        det_matched = np.zeros(boxes.shape[0], dtype=bool)
+
+        # Stage 1: confirmed tracks on appearance + gated motion.
+        confirmed = np.flatnonzero(store.column("is_confirmed"))
+        rows, cols = self._match_cascade(confirmed, boxes, features)
+        matched_tracks, matched_dets = [rows], [cols]
+        track_matched[rows] = True
+        det_matched[cols] = True
+
+        # Stage 2: tentative tracks and tracks missed for just one frame on IoU.
+        recent = np.flatnonzero(~track_matched & ((~store.column("is_confirmed")) | (store.column("time_since_update") == 1)))
+        spare = np.flatnonzero(~det_matched)
+        rows, cols = associate_boxes(track_boxes[recent], boxes[spare], self.config.match_thresh)
+        matched_tracks.append(recent[rows])
+        matched_dets.append(spare[cols])
+
+        track_rows, det_rows = np.concatenate(matched_tracks), np.concatenate(matched_dets)
+        track_matched[track_rows] = True
+        det_matched[det_rows] = True
+        kalman.update(track_rows, boxes[det_rows])
+        smoothed, valid = None, None
+        if features is not None and track_rows.size:
+            self._push_gallery(track_rows, features[det_rows])
+            smoothed, valid = self._smoothed(track_rows, features[det_rows]), np.ones(track_rows.size, dtype=bool)
+        store.update(track_rows, boxes[det_rows], scores[det_rows], classes[det_rows], smoothed, valid)
+
+        # Tentative tracks die on their first miss; confirmed ones after max_age frames.
+        tsu = store.column("time_since_update")
+        expired = ~track_matched & ((tsu > self.config.max_age) | ~store.column("is_confirmed"))
+        kalman.remove(expired)
+        retired = store.retire(expired)
+        if self._retired_index is not None:
+            self._retired_index.add_tracks(retired, timestamp)
+
+        spawn = np.flatnonzero(~det_matched)
+        ids = store.add(boxes[spawn], scores[spawn], classes[spawn], *gather_features(features, spawn))
+        if ids.size:
+            kalman.add(ids, boxes[spawn])
+            if features is not None:
+                self._push_gallery(np.arange(len(store) - ids.size, len(store)), features[spawn])
+        return store.snapshot(timestamp)
+
+    def track(self, detections: Dict[str, Any], timestamp: Optional[float] = None, image: Any = None) -> TrackBatch:
+        """Compatibility alias for previous API."""
+        return self.update(detections, timestamp=timestamp, image=image)
 
 
 def build_strongsort_tracker(
@@ -0,0 +1,306 @@
+"""Columnar (struct-of-arrays) storage for live track hypotheses."""
+from __future__ import annotations
+
+from collections.abc import Sequence as SequenceABC
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ColumnSpec = Tuple[Tuple[int, ...], Any]
+
+TRACK_COLUMNS: Dict[str, ColumnSpec] = {
+    "track_id": ((), np.int64),
+    "box": ((4,), float),
+    "velocity": ((4,), float),
+    "score": ((), float),
+    "class_id": ((), np.int64),
+    "age": ((), np.int64),
+    "hits": ((), np.int64),
+    "time_since_update": ((), np.int64),
+    "is_confirmed": ((), bool),
+    "has_feature": ((), bool),
+}
+
+CONFIRM_HITS = 3
+
+
+@dataclass(eq=False)
+class TrackBatch(SequenceABC):
+    """Per-frame tracker output as parallel arrays.
+
+    Arrays returned by :meth:`TrackStore.snapshot` are views into the store and stay
+    valid until the next tracker update; call :meth:`copy` to keep them. Indexing or
+    iterating yields the legacy per-track dicts for callers that still expect them.
+    """
+
+    track_id: np.ndarray
+    box: np.ndarray
+    score: np.ndarray
+    class_id: np.ndarray
+    age: np.ndarray
+    hits: np.ndarray
+    time_since_update: np.ndarray
+    is_confirmed: np.ndarray
+    has_feature: np.ndarray
+    feature: Optional[np.ndarray] = None
+    timestamp: Optional[float] = None
+
+    def __len__(self) -> int:
+        return int(self.track_id.shape[0])
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        tsu = int(self.time_since_update[index])
+        has_feature = self.feature is not None and bool(self.has_feature[index])
+        return {
+            "track_id": int(self.track_id[index]),
+            "box": self.box[index].copy(),
+            "score": float(self.score[index]),
+            "class_id": int(self.class_id[index]),
+            "age": int(self.age[index]),
+            "hits": int(self.hits[index]),
+            "time_since_update": tsu,
+            "is_confirmed": bool(self.is_confirmed[index]),
+            "feature": self.feature[index].copy() if has_feature else None,
+            "timestamp": self.timestamp,
+            "status": "tracked" if tsu == 0 else "tentative",
+        }
+
+    @property
+    def tracked(self) -> np.ndarray:
+        """Mask of tracks matched in the current frame."""
+        return self.time_since_update == 0
+
+    def copy(self) -> "TrackBatch":
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        return TrackBatch(**{k: v.copy() if isinstance(v, np.ndarray) else v for k, v in values.items()})
+
+    def select(self, mask: np.ndarray) -> "TrackBatch":
+        """Return a (copied) subset of tracks selected by a boolean mask or index array."""
+        values = {f.name: getattr(self, f.name) for f in fields(self)}
+        return TrackBatch(**{k: v[mask] if isinstance(v, np.ndarray) else v for k, v in values.items()})
+
+    def to_records(self) -> np.recarray:
+        """Pack the scalar columns and boxes into a NumPy record array."""
+        records = np.recarray(
+            len(self),
+            dtype=[
+                ("track_id", np.int64),
+                ("box", float, (4,)),
+                ("score", float),
+                ("class_id", np.int64),
+                ("age", np.int64),
+                ("hits", np.int64),
+                ("time_since_update", np.int64),
+                ("is_confirmed", bool),
+            ],
+        )
+        for name in records.dtype.names:
+            records[name] = getattr(self, name)
+        return records
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [self[i] for i in range(len(self))]
+
+
+class TrackStore:
+    """Growable struct-of-arrays track table.
+
+    Live tracks occupy rows ``[0, len(store))``. Track ids are issued in increasing
+    order and retirement compacts rows stably, so ``track_id`` stays sorted and
+    id -> row lookup is a binary search. Features are allocated lazily once the first
+    embedding reveals their dimension.
+    """
+
+    def __init__(self, capacity: int = 64, extra_columns: Optional[Dict[str, ColumnSpec]] = None) -> None:
+        self._spec: Dict[str, ColumnSpec] = dict(TRACK_COLUMNS)
+        self._spec.update(extra_columns or {})
+        capacity = max(int(capacity), 1)
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros((capacity, *shape), dtype=dtype) for name, (shape, dtype) in self._spec.items()
+        }
+        self._feature: Optional[np.ndarray] = None
+        self._size = 0
+        self._next_track_id = 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._columns["track_id"].shape[0]
+
+    @property
+    def next_track_id(self) -> int:
+        return self._next_track_id
+
+    def column(self, name: str) -> np.ndarray:
+        """Writable view of the live rows of ``name``."""
+        if name == "feature":
+            return self._feature[: self._size] if self._feature is not None else None  # type: ignore[return-value]
+        return self._columns[name][: self._size]
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, 2 * self.capacity)
+        for name, array in self._columns.items():
+            grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+            grown[: self._size] = array[: self._size]
+            self._columns[name] = grown
+        if self._feature is not None:
+            grown = np.zeros((capacity, self._feature.shape[1]), dtype=self._feature.dtype)
+            grown[: self._size] = self._feature[: self._size]
+            self._feature = grown
+
+    def _write_features(self, rows: np.ndarray, features: Optional[np.ndarray], valid: Optional[np.ndarray]) -> None:
+        has_feature = self._columns["has_feature"]
+        if features is None or valid is None or not valid.any():
+            has_feature[rows] = False
+            return
+        if self._feature is None:
+            self._feature = np.zeros((self.capacity, features.shape[1]), dtype=float)
+        self._feature[rows[valid]] = features[valid]
+        has_feature[rows] = valid
+
+    def rows_of(self, track_ids: Sequence[int]) -> np.ndarray:
+        """Map track ids to live row indices; raises ``KeyError`` for unknown ids."""
+        ids = np.asarray(track_ids, dtype=np.int64)
+        live = self._columns["track_id"][: self._size]
+        rows = np.searchsorted(live, ids)
+        found = rows < self._size
+        found[found] = live[rows[found]] == ids[found]
+        if not found.all():
+            raise KeyError(ids[~found].tolist())
+        return rows
+
+    def add(
+        self,
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        classes: np.ndarray,
+        features: Optional[np.ndarray] = None,
+        feature_valid: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Append new tentative tracks and return their ids."""
+        count = boxes.shape[0]
+        if count == 0:
+            return np.empty((0,), dtype=np.int64)
+        self._reserve(count)
+        rows = np.arange(self._size, self._size + count)
+        ids = np.arange(self._next_track_id, self._next_track_id + count, dtype=np.int64)
+        cols = self._columns
+        for name, (shape, dtype) in self._spec.items():
+            cols[name][rows] = np.zeros(shape, dtype=dtype)
+        cols["track_id"][rows] = ids
+        cols["box"][rows] = boxes
+        cols["score"][rows] = scores
+        cols["class_id"][rows] = classes
+        cols["age"][rows] = 1
+        cols["hits"][rows] = 1
+        self._write_features(rows, features, feature_valid)
+        self._size += count
+        self._next_track_id += count
+        return ids
+
+    def update(
+        self,
+        rows: np.ndarray,
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        classes: np.ndarray,
+        features: Optional[np.ndarray] = None,
+        feature_valid: Optional[np.ndarray] = None,
+        velocity_gain: float = 0.0,
+    ) -> None:
+        """Apply matched detections to ``rows`` in one vectorised step.
+
+        With ``velocity_gain > 0`` the per-frame velocity is corrected toward the
+        innovation ``(observation - prediction) / frames_since_update``.
+        """
+        if rows.size == 0:
+            return
+        cols = self._columns
+        if velocity_gain > 0:
+            elapsed = np.maximum(cols["time_since_update"][rows], 1)[:, None]
+            cols["velocity"][rows] += velocity_gain * (boxes - cols["box"][rows]) / elapsed
+        cols["box"][rows] = boxes
+        cols["score"][rows] = scores
+        cols["class_id"][rows] = classes
+        cols["hits"][rows] += 1
+        cols["time_since_update"][rows] = 0
+        cols["is_confirmed"][rows] |= cols["hits"][rows] >= CONFIRM_HITS
+        self._write_features(rows, features, feature_valid)
+
+    def predict(self) -> None:
+        """Advance every live box by its per-frame velocity."""
+        self._columns["box"][: self._size] += self._columns["velocity"][: self._size]
+
+    def mark_missed(self) -> None:
+        """Age every live track by one frame; matched tracks reset in :meth:`update`."""
+        self._columns["age"][: self._size] += 1
+        self._columns["time_since_update"][: self._size] += 1
+
+    def retire(self, mask: np.ndarray) -> TrackBatch:
+        """Drop the rows selected by ``mask`` (stable compaction); return them as a copied batch."""
+        mask = np.asarray(mask, dtype=bool)
+        retired = self.snapshot().select(mask)
+        if not mask.any():
+            return retired
+        keep = np.flatnonzero(~mask)
+        for array in self._columns.values():
+            array[: keep.size] = array[keep]
+        if self._feature is not None:
+            self._feature[: keep.size] = self._feature[keep]
+        self._size = keep.size
+        return retired
+
+    def snapshot(self, timestamp: Optional[float] = None) -> TrackBatch:
+        """Zero-copy view of all live tracks."""
+        return TrackBatch(
+            track_id=self.column("track_id"),
+            box=self.column("box"),
+            score=self.column("score"),
+            class_id=self.column("class_id"),
+            age=self.column("age"),
+            hits=self.column("hits"),
+            time_since_update=self.column("time_since_update"),
+            is_confirmed=self.column("is_confirmed"),
+            has_feature=self.column("has_feature"),
+            feature=self.column("feature"),
+            timestamp=timestamp,
+        )
+
+
+def gather_features(features: Any, indices: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """Collect detection embeddings for ``indices`` as ``(rows, valid_mask)``.
+
+    Accepts an ``(M, D)`` array, a single ``(D,)`` vector shared by every detection,
+    or a per-detection sequence that may be shorter than the detection list.
+    """
+    count = indices.shape[0]
+    if features is None or count == 0:
+        return None, None
+    if isinstance(features, np.ndarray):
+        if features.ndim == 1:
+            return np.broadcast_to(features.astype(float), (count, features.shape[0])), np.ones(count, dtype=bool)
+        valid = indices < features.shape[0]
+        out = np.zeros((count, features.shape[1]), dtype=float)
+        out[valid] = features[indices[valid]]
+        return out, valid
+    if isinstance(features, Sequence):
+        valid = indices < len(features)
+        picked = [np.asarray(features[i], dtype=float) for i in indices[valid]]
+        if not picked:
+            return None, None
+        out = np.zeros((count, picked[0].shape[-1]), dtype=float)
+        out[valid] = np.stack(picked)
+        return out, valid
+    return None, None
@@ -0,0 +1 @@
+"""Micro and end-to-end benchmarks for the amodal CCTV pipeline."""
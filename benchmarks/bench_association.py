@@ -0,0 +1,63 @@
+"""Benchmark: ByteTrack per-frame latency as crowd density grows.
+
+Compares the grid-pruned sparse cascade against dense assignment. Run with
+``python -m benchmarks.bench_association``; :func:`case` is the ``association``
+suite case.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+from amodal_cctv.data.synthetic_crowd import SyntheticCrowd
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker
+
+from .harness import WARMUP_FRAMES, Recorder, crowd
+
+
+def time_tracker(num_objects: int, frames: int, sparse: bool) -> float:
+    tracker = build_bytetrack_tracker({"match_thresh": 0.3, "sparse_assignment": sparse})
+    stream = list(SyntheticCrowd(num_objects=num_objects, num_frames=frames + 3).detections())
+    for dets in stream[:3]:  # warm up so tracks exist
+        tracker.update(dets)
+    start = time.perf_counter()
+    for dets in stream[3:]:
+        tracker.update(dets)
+    return 1e3 * (time.perf_counter() - start) / frames
+
+
+def run(crowds: List[int], frames: int, dense_limit: int) -> List[dict]:
+    rows = []
+    for count in crowds:
+        row = {"objects": count, "sparse_ms": time_tracker(count, frames, sparse=True)}
+        if count <= dense_limit:
+            row["dense_ms"] = time_tracker(count, frames, sparse=False)
+        rows.append(row)
+    return rows
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    tracker = build_bytetrack_tracker({"match_thresh": 0.3, "sparse_assignment": params.get("sparse", True)})
+    for index, detections in enumerate(crowd(params["objects"], params["frames"]).detections()):
+        if index == WARMUP_FRAMES:
+            recorder.start()
+        with recorder.stage("update"):
+            tracker.update(detections)
+        recorder.count("frames")
+        recorder.count("detections", len(detections["boxes"]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark ByteTrack association vs crowd density")
+    parser.add_argument("--crowds", type=int, nargs="*", default=[50, 100, 200, 500, 1000, 2000])
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--dense-limit", type=int, default=1000)
+    args = parser.parse_args()
+    for row in run(args.crowds, args.frames, args.dense_limit):
+        dense = f"{row['dense_ms']:8.2f}" if "dense_ms" in row else "       -"
+        print(f"{row['objects']:6d} objects | sparse {row['sparse_ms']:8.2f} ms/frame | dense {dense} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmark: detect → track → permanence loop on a synthetic crowd, stage by stage.
+
+Suite case ``end_to_end``; run with ``python -m benchmarks.run_suite --case end_to_end``.
+"""
+from __future__ import annotations
+
+import tempfile
+from typing import Any, Dict
+
+import numpy as np
+
+from amodal_cctv.permanence.gating import GatingConfig, mahalanobis_gate_batch, pairwise_residuals
+from amodal_cctv.permanence.intervals import IntervalLogger
+from amodal_cctv.permanence.kalman import BatchedKalmanFilter, KalmanConfig
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker
+
+from .harness import WARMUP_FRAMES, Recorder, crowd
+
+
+class Permanence:
+    """Permanence stage of the loop: Kalman per track, gating of coasting tracks, interval log."""
+
+    def __init__(self, logger: IntervalLogger) -> None:
+        self.kalman = BatchedKalmanFilter(KalmanConfig(), capacity=1024)
+        self.gating = GatingConfig()
+        self.logger = logger
+        self.coasting: set = set()
+
+    def step(self, tracks: Any, detections: Dict[str, Any], frame: int, recorder: Recorder) -> None:
+        ids = np.asarray(tracks.track_id)
+        boxes = np.asarray(tracks.box, dtype=float)
+        coasting = np.asarray(tracks.time_since_update) > 0
+        with recorder.stage("kalman"):
+            self.kalman.remove(~np.isin(self.kalman.track_id, ids))
+            fresh = ~np.isin(ids, self.kalman.track_id)
+            self.kalman.add(ids[fresh], boxes[fresh])
+            rows = self.kalman.rows_of(ids)
+            occluded = np.zeros(len(self.kalman), dtype=bool)
+            occluded[rows[coasting]] = True
+            self.kalman.predict(dt=1.0, occluded=occluded)
+            self.kalman.update(rows[~coasting], boxes[~coasting])
+        with recorder.stage("gating"):
+            if coasting.any() and len(detections["boxes"]):
+                means, innovation = self.kalman.project(rows[coasting])
+                residuals = pairwise_residuals(means, detections["boxes"])
+                mahalanobis_gate_batch(residuals, tracks.time_since_update[coasting], self.gating, covariances=innovation)
+        with recorder.stage("intervals"):
+            now = set(ids[coasting].tolist())
+            for track_id in now - self.coasting:
+                self.logger.start(track_id, frame, "occlusion")
+            for track_id in self.coasting - now:
+                self.logger.end(track_id, frame)
+            self.coasting = now
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    tracker = build_bytetrack_tracker({"match_thresh": 0.3, "existence_config": {}})
+    stream = crowd(params["objects"], params["frames"], feature_dim=0).detections()
+    with tempfile.TemporaryDirectory() as sink:
+        permanence = Permanence(IntervalLogger(sink_dir=sink))
+        for index in range(params["frames"] + WARMUP_FRAMES):
+            if index == WARMUP_FRAMES:
+                recorder.start()
+            with recorder.stage("end_to_end"):
+                with recorder.stage("detect"):
+                    detections = next(stream)
+                with recorder.stage("track"):
+                    tracks = tracker.update(detections)
+                with recorder.stage("permanence"):
+                    permanence.step(tracks, detections, index, recorder)
+            recorder.count("frames")
@@ -0,0 +1,30 @@
+"""Benchmark: existence-probability bank stepping and retiring a dense crowd.
+
+Suite case ``existence``; run with ``python -m benchmarks.run_suite --case existence``.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import numpy as np
+
+from amodal_cctv.permanence.existence_filter import ExistenceBank, ExistenceConfig
+
+from .harness import WARMUP_FRAMES, Recorder, crowd
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    bank = ExistenceBank(ExistenceConfig(), capacity=params["tracks"])
+    bank.add(params["tracks"])
+    load = crowd(params["tracks"], params["frames"], false_positives=0.0, feature_dim=0)
+    for index, (_, truth) in enumerate(load.stream()):
+        if index == WARMUP_FRAMES:
+            recorder.start()
+        with recorder.stage("step"):
+            retired = bank.step(truth["det_rows"] >= 0)
+        with recorder.stage("retire"):
+            mask = np.zeros(len(bank), dtype=bool)
+            mask[retired] = True
+            bank.remove(mask)
+            bank.add(int(mask.sum()))
+        recorder.count("track_updates", len(bank))
@@ -0,0 +1,86 @@
+"""Benchmark: batched Mahalanobis gating vs. one ``pinv`` per residual.
+
+Run with ``python -m benchmarks.bench_gating``; :func:`case` is the ``gating`` suite case.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from amodal_cctv.data.synthetic_crowd import SyntheticCrowd
+from amodal_cctv.permanence.gating import (
+    GatingConfig,
+    mahalanobis_gate,
+    mahalanobis_gate_batch,
+    pairwise_residuals,
+    whitening_factors,
+)
+
+from .harness import Recorder
+
+
+def make_inputs(tracks: int, dets: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(tracks, 4, 4))
+    covariances = base @ base.transpose(0, 2, 1) + np.eye(4)
+    # Track means are the crowd's true boxes; measurements are that frame's (noisy, partly false) detections.
+    detections, truth = next(SyntheticCrowd(num_objects=max(tracks, dets), num_frames=1, seed=seed).stream())
+    residuals = pairwise_residuals(truth["boxes"][:tracks], detections["boxes"][:dets])
+    dt = rng.integers(0, 30, size=tracks)
+    return residuals, covariances, dt
+
+
+def time_scalar(residuals: np.ndarray, covariances: np.ndarray, dt: np.ndarray, config: GatingConfig) -> float:
+    start = time.perf_counter()
+    for n in range(residuals.shape[0]):
+        for m in range(residuals.shape[1]):
+            mahalanobis_gate(residuals[n, m], covariances[n], int(dt[n]), config)
+    return 1e3 * (time.perf_counter() - start)
+
+
+def time_batched(residuals: np.ndarray, covariances: np.ndarray, dt: np.ndarray, config: GatingConfig) -> float:
+    start = time.perf_counter()
+    mahalanobis_gate_batch(residuals, dt, config, covariances=covariances)
+    return 1e3 * (time.perf_counter() - start)
+
+
+def run(sizes: List[Tuple[int, int]], scalar_limit: int) -> List[dict]:
+    config = GatingConfig()
+    rows = []
+    for tracks, dets in sizes:
+        inputs = make_inputs(tracks, dets)
+        row = {"tracks": tracks, "dets": dets, "batched_ms": min(time_batched(*inputs, config) for _ in range(5))}
+        if tracks * dets <= scalar_limit:
+            row["scalar_ms"] = time_scalar(*inputs, config)
+        rows.append(row)
+    return rows
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    residuals, covariances, dt = make_inputs(params["tracks"], params["dets"])
+    config = GatingConfig()
+    recorder.start()
+    for _ in range(params["iterations"]):
+        with recorder.stage("factors"):
+            factors = whitening_factors(covariances)
+        with recorder.stage("gate"):
+            mahalanobis_gate_batch(residuals, dt, config, factors=factors)
+        recorder.count("pairs", residuals.shape[0] * residuals.shape[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Mahalanobis gating")
+    parser.add_argument("--sizes", nargs="*", default=["50x50", "200x200", "1000x200", "5000x200"])
+    parser.add_argument("--scalar-limit", type=int, default=40_000)
+    args = parser.parse_args()
+    sizes = [tuple(int(v) for v in size.split("x")) for size in args.sizes]
+    for row in run(sizes, args.scalar_limit):
+        scalar = f"{row['scalar_ms']:10.2f}" if "scalar_ms" in row else "         -"
+        print(f"{row['tracks']:5d} tracks x {row['dets']:4d} dets | scalar {scalar} ms | batched {row['batched_ms']:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Benchmark: occlusion interval logging, range queries and flushing.
+
+Suite case ``intervals``; run with ``python -m benchmarks.run_suite --case intervals``.
+"""
+from __future__ import annotations
+
+import tempfile
+from typing import Any, Dict
+
+import numpy as np
+
+from amodal_cctv.permanence.intervals import IntervalLogger
+
+from .harness import WARMUP_FRAMES, Recorder, crowd
+
+
+def log_transitions(
+    logger: IntervalLogger, ids: np.ndarray, occluded: np.ndarray, before: np.ndarray, frame: int
+) -> None:
+    for track_id in ids[occluded & ~before].tolist():
+        logger.start(track_id, frame, "occlusion")
+    for track_id in ids[~occluded & before].tolist():
+        logger.end(track_id, frame)
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    load = crowd(params["objects"], params["frames"], occlusion_rate=0.02, turnover=0.001)
+    with tempfile.TemporaryDirectory() as sink:
+        logger = IntervalLogger(sink_dir=sink, chunk_size=4096)
+        before = np.zeros(params["objects"], dtype=bool)
+        for index, (_, truth) in enumerate(load.stream()):
+            if index == WARMUP_FRAMES:
+                recorder.start()
+            occluded = truth["det_rows"] < 0
+            with recorder.stage("log"):
+                log_transitions(logger, truth["track_ids"], occluded, before, index)
+            before = occluded
+            if index % params["query_every"] == 0:
+                with recorder.stage("query"):
+                    logger.query(max(index - 300, 0), index)
+            recorder.count("frames")
+        with recorder.stage("flush"):
+            logger.flush()
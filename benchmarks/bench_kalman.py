@@ -0,0 +1,95 @@
+"""Benchmark: batched Kalman predict/update vs. a loop of single-track filters.
+
+Run with ``python -m benchmarks.bench_kalman``; :func:`case` is the ``kalman`` suite case.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from amodal_cctv.data.synthetic_crowd import SyntheticCrowd
+from amodal_cctv.permanence.kalman import BatchedKalmanFilter, KalmanConfig, KalmanPermanenceFilter
+
+from .harness import WARMUP_FRAMES, Recorder
+
+
+def crowd_inputs(count: int, frames: int, seed: int = 0) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Per-object measured boxes and hit masks; misses come from dropouts and occlusion episodes."""
+    crowd = SyntheticCrowd(num_objects=count, num_frames=frames, miss_rate=0.2, false_positives=0.0, seed=seed)
+    for detections, truth in crowd.stream():
+        detected = truth["det_rows"] >= 0
+        measurements = truth["boxes"].copy()
+        measurements[detected] = detections["boxes"][truth["det_rows"][detected]]
+        yield measurements, detected
+
+
+def time_loop(count: int, frames: int, seed: int = 0) -> float:
+    filters = [KalmanPermanenceFilter(KalmanConfig()) for _ in range(count)]
+    elapsed = 0.0
+    for measurements, detected in crowd_inputs(count, frames, seed):
+        start = time.perf_counter()
+        for kf, z, hit in zip(filters, measurements, detected):
+            kf.predict(dt=1.0, occluded=not hit)
+            if hit:
+                kf.update(z)
+        elapsed += time.perf_counter() - start
+    return 1e3 * elapsed / frames
+
+
+def time_batched(count: int, frames: int, seed: int = 0) -> float:
+    bank = BatchedKalmanFilter(KalmanConfig(), capacity=count)
+    bank.add(np.arange(count), np.zeros((count, 4)))
+    elapsed = 0.0
+    for measurements, detected in crowd_inputs(count, frames, seed):
+        start = time.perf_counter()
+        bank.predict(dt=1.0, occluded=~detected)
+        rows = np.flatnonzero(detected)
+        bank.update(rows, measurements[rows])
+        elapsed += time.perf_counter() - start
+    return 1e3 * elapsed / frames
+
+
+def run(counts: List[int], frames: int, loop_limit: int) -> List[dict]:
+    rows = []
+    for count in counts:
+        row = {"tracks": count, "batched_ms": time_batched(count, frames)}
+        if count <= loop_limit:
+            row["loop_ms"] = time_loop(count, frames)
+        rows.append(row)
+    return rows
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    count = params["tracks"]
+    bank = BatchedKalmanFilter(KalmanConfig(), capacity=count)
+    for index, (measurements, detected) in enumerate(crowd_inputs(count, params["frames"] + WARMUP_FRAMES)):
+        if index == 0:
+            bank.add(np.arange(count), measurements)
+            continue
+        if index == WARMUP_FRAMES:
+            recorder.start()
+        with recorder.stage("predict"):
+            bank.predict(dt=1.0, occluded=~detected)
+        rows = np.flatnonzero(detected)
+        with recorder.stage("update"):
+            bank.update(rows, measurements[rows])
+        recorder.count("track_updates", len(bank))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batched Kalman permanence filter")
+    parser.add_argument("--tracks", type=int, nargs="*", default=[10, 100, 1000, 10000])
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--loop-limit", type=int, default=10000)
+    args = parser.parse_args()
+    for row in run(args.tracks, args.frames, args.loop_limit):
+        loop = f"{row['loop_ms']:9.2f}" if "loop_ms" in row else "        -"
+        speedup = f"{row['loop_ms'] / row['batched_ms']:7.1f}x" if "loop_ms" in row else "      -"
+        print(f"{row['tracks']:6d} tracks | loop {loop} ms/frame | batched {row['batched_ms']:8.3f} ms/frame | {speedup}")
+
+
+if __name__ == "__main__":
+    main()
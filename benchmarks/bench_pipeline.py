@@ -0,0 +1,28 @@
+"""Benchmark: the pipelined runner (detect / track overlap) on a synthetic crowd.
+
+Suite case ``pipeline``; run with ``python -m benchmarks.run_suite --case pipeline``.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from amodal_cctv.runtime.pipeline import PipelineConfig, PipelinedRunner
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker
+
+from .harness import Recorder, crowd
+
+
+class CrowdReplay:
+    """Detector stand-in returning the synthetic detections carried by each frame."""
+
+    def infer(self, frame: Dict[str, Any]) -> Dict[str, Any]:
+        return frame["detections"]
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    frames = list(crowd(params["objects"], params["frames"]).frames())
+    runner = PipelinedRunner(CrowdReplay(), build_bytetrack_tracker({"match_thresh": 0.3}), PipelineConfig())
+    recorder.start()
+    stats = runner.run(iter(frames))
+    recorder.merge({**stats["stages"], "end_to_end": stats["end_to_end"]})
+    recorder.count("frames", stats["frames"])
@@ -0,0 +1,78 @@
+"""Benchmark: Paste-N-Occlude augmentation throughput per worker.
+
+Run with ``python -m benchmarks.bench_pno``; :func:`case` is the ``pno`` suite case.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from amodal_cctv.amodal.pno_augment import PnOAugmenter, PnOConfig, build_occluder_bank
+
+from .harness import Recorder
+
+
+def synthetic_bank(out_dir: str, count: int, seed: int = 0):
+    """Occluder bank cut from random images with elliptical instance masks."""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[:96, :64]
+    ellipse = ((yy - 48) / 48) ** 2 + ((xx - 32) / 32) ** 2 <= 1.0
+    samples = []
+    for _ in range(count):
+        image = rng.integers(0, 255, (96, 64, 3), dtype=np.uint8)
+        samples.append((image, np.array([[0, 0, 64, 96]]), ellipse[None]))
+    return build_occluder_bank(samples, out_dir)
+
+
+def random_scene(rng: np.random.Generator, height: int, width: int, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    corners = rng.uniform(0, [width - 160, height - 160], (count, 2))
+    return image, np.concatenate([corners, corners + rng.uniform(30, 150, (count, 2))], axis=1)
+
+
+def run(resolutions: List[Tuple[int, int]], boxes_per_image: int, images: int, bank_size: int) -> List[dict]:
+    rows = []
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as bank_dir:
+        augmenter = PnOAugmenter(synthetic_bank(bank_dir, bank_size), PnOConfig(copy_paste_prob=1.0))
+        for height, width in resolutions:
+            image, boxes = random_scene(rng, height, width, boxes_per_image)
+            augmenter(image, boxes, inplace=True)
+            start = time.perf_counter()
+            for _ in range(images):
+                augmenter(image, boxes, inplace=True)
+            seconds = time.perf_counter() - start
+            rows.append({"height": height, "width": width, "images_per_s": images / seconds})
+    return rows
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    image, boxes = random_scene(np.random.default_rng(1), params["height"], params["width"], params["boxes"])
+    with tempfile.TemporaryDirectory() as bank_dir:
+        augmenter = PnOAugmenter(synthetic_bank(bank_dir, params["bank_size"]), PnOConfig(copy_paste_prob=1.0))
+        augmenter(image, boxes, inplace=True)
+        recorder.start()
+        for _ in range(params["images"]):
+            with recorder.stage("augment"):
+                augmenter(image, boxes, inplace=True)
+            recorder.count("images")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Paste-N-Occlude augmentation")
+    parser.add_argument("--resolutions", type=str, nargs="*", default=["480x640", "720x1280", "1080x1920"])
+    parser.add_argument("--boxes", type=int, default=12)
+    parser.add_argument("--images", type=int, default=2000)
+    parser.add_argument("--bank-size", type=int, default=512)
+    args = parser.parse_args()
+    resolutions = [tuple(int(v) for v in item.split("x")) for item in args.resolutions]
+    for row in run(resolutions, args.boxes, args.images, args.bank_size):
+        print(f"{row['height']:5d}x{row['width']:<5d} | {row['images_per_s']:8.1f} images/s per worker")
+
+
+if __name__ == "__main__":
+    main()
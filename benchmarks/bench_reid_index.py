@@ -0,0 +1,89 @@
+"""Benchmark: IVF retired-track index vs brute-force cosine search (recall and latency).
+
+Run with ``python -m benchmarks.bench_reid_index``; :func:`case` is the ``reid_index``
+suite case.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from amodal_cctv.trackers.reid_index import RetiredTrackIndex, build_reid_index, cosine_topk
+
+from .harness import Recorder
+
+
+def clustered_embeddings(count: int, dim: int, identities: int, seed: int = 0) -> np.ndarray:
+    """Appearance embeddings scattered around ``identities`` cluster centres, unit-normalised."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(identities, dim))
+    vectors = centers[rng.integers(0, identities, count)] + 0.35 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def indexed(
+    size: int, dim: int, queries: int, n_lists: int, n_probe: int
+) -> Tuple[RetiredTrackIndex, np.ndarray, np.ndarray]:
+    """Index over ``size`` retired embeddings, the raw vectors and near-duplicate probe queries."""
+    rng = np.random.default_rng(1)
+    vectors = clustered_embeddings(size, dim, identities=max(size // 20, 10))
+    index = build_reid_index({"n_lists": n_lists, "n_probe": n_probe, "train_size": min(size, 4096), "exact_below": 0})
+    index.add(vectors, np.arange(size))
+    probe = vectors[rng.integers(0, size, queries)] + 0.05 * rng.normal(size=(queries, dim)).astype(np.float32)
+    probe /= np.linalg.norm(probe, axis=1, keepdims=True)
+    return index, vectors, probe
+
+
+def run(sizes: List[int], dim: int, queries: int, k: int, n_lists: int, n_probe: int, repeats: int) -> List[dict]:
+    rows = []
+    for size in sizes:
+        index, vectors, probe = indexed(size, dim, queries, n_lists, n_probe)
+        index.search(probe, k)  # pack outside the timed loop
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            exact, _ = cosine_topk(probe, vectors, k)
+        brute_ms = 1e3 * (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            approx = index.search(probe, k)["track_id"]
+        ivf_ms = 1e3 * (time.perf_counter() - start) / repeats
+        recall = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(approx, exact)]))
+        rows.append({"size": size, "brute_ms": brute_ms, "ivf_ms": ivf_ms, "recall": recall})
+    return rows
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    index, vectors, probe = indexed(params["size"], params["dim"], params["queries"], params["n_lists"], params["n_probe"])
+    index.search(probe, params["k"])
+    recorder.start()
+    for _ in range(params["iterations"]):
+        with recorder.stage("brute"):
+            cosine_topk(probe, vectors, params["k"])
+        with recorder.stage("ivf"):
+            index.search(probe, params["k"])
+        recorder.count("queries", len(probe))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the retired-track ANN index")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[5000, 20000, 100000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-lists", type=int, default=128)
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+    for row in run(args.sizes, args.dim, args.queries, args.k, args.n_lists, args.n_probe, args.repeats):
+        print(
+            f"{row['size']:7d} retired | brute {row['brute_ms']:7.2f} ms | ivf {row['ivf_ms']:7.2f} ms"
+            f" | recall@k {row['recall']:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
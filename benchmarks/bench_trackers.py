@@ -0,0 +1,64 @@
+"""Benchmark: OC-SORT vs ByteTrack throughput on the same synthetic crowd.
+
+Run with ``python -m benchmarks.bench_trackers``; :func:`case` is the ``trackers`` suite case.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from amodal_cctv.data.synthetic_crowd import SyntheticCrowd
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker
+from amodal_cctv.trackers.ocsort import build_ocsort_tracker
+
+from .harness import WARMUP_FRAMES, Recorder, crowd
+
+TRACKERS: Dict[str, Callable[[], object]] = {
+    "bytetrack": lambda: build_bytetrack_tracker({"match_thresh": 0.3}),
+    "ocsort": lambda: build_ocsort_tracker({"match_thresh": 0.3}),
+}
+
+
+def time_tracker(name: str, stream: List[dict], warmup: int = 3) -> float:
+    """Frames per second after ``warmup`` frames have populated the track table."""
+    tracker = TRACKERS[name]()
+    for dets in stream[:warmup]:
+        tracker.update(dets)
+    start = time.perf_counter()
+    for dets in stream[warmup:]:
+        tracker.update(dets)
+    return (len(stream) - warmup) / (time.perf_counter() - start)
+
+
+def run(crowds: List[int], frames: int) -> List[dict]:
+    rows = []
+    for count in crowds:
+        stream = list(SyntheticCrowd(num_objects=count, num_frames=frames + 3).detections())
+        rows.append({"objects": count, **{name: time_tracker(name, stream) for name in TRACKERS}})
+    return rows
+
+
+def case(params: Dict[str, Any], recorder: Recorder) -> None:
+    stream = list(crowd(params["objects"], params["frames"]).detections())
+    trackers = {name: build() for name, build in TRACKERS.items()}
+    for index, detections in enumerate(stream):
+        if index == WARMUP_FRAMES:
+            recorder.start()
+        for name, tracker in trackers.items():
+            with recorder.stage(name):
+                tracker.update(detections)
+        recorder.count("frames")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark OC-SORT against ByteTrack")
+    parser.add_argument("--crowds", type=int, nargs="*", default=[50, 200, 500, 1000, 2000])
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+    for row in run(args.crowds, args.frames):
+        print(f"{row['objects']:6d} objects | " + " | ".join(f"{n} {row[n]:8.1f} fps" for n in TRACKERS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Shared harness for the benchmark suite: per-stage timing, RSS growth and baselines.
+
+A case is a ``case(params, recorder)`` function in a ``benchmarks/bench_*.py``
+module; it runs its own loop and wraps each stage in ``recorder.stage(name)``.
+Latency percentiles come from
+:class:`~amodal_cctv.runtime.pipeline.StageStats`, the same summary the inference
+pipeline reports, so suite numbers and ``run_infer --stats-out`` numbers agree.
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from amodal_cctv.data.synthetic_crowd import SyntheticCrowd
+from amodal_cctv.runtime.pipeline import StageStats
+
+ROOT = Path(__file__).resolve().parent.parent
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+WARMUP_FRAMES = 3
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (``ru_maxrss`` is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def crowd(objects: int, frames: int, **overrides: Any) -> SyntheticCrowd:
+    """Synthetic crowd load with :data:`WARMUP_FRAMES` extra frames ahead of the timed ones."""
+    return SyntheticCrowd(num_objects=objects, num_frames=frames + WARMUP_FRAMES, **overrides)
+
+
+class Recorder:
+    """Collects per-stage latencies and processed item counts for one case.
+
+    Nothing is recorded until :meth:`start` is called, so cases can warm up caches
+    and JIT paths with the same code they time.
+    """
+
+    def __init__(self, window: int = 100000) -> None:
+        self.window = window
+        self.stats: Dict[str, StageStats] = {}
+        self.items: Dict[str, int] = {}
+        self.merged: Dict[str, Dict[str, float]] = {}
+        self.recording = False
+        self._started: Optional[float] = None
+
+    def start(self) -> None:
+        self.recording = True
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        if self.recording:
+            if name not in self.stats:
+                self.stats[name] = StageStats(name, self.window)
+            self.stats[name].record(time.perf_counter() - start)
+
+    def merge(self, stages: Dict[str, Dict[str, float]]) -> None:
+        """Adopt stage summaries measured elsewhere (e.g. by :class:`PipelinedRunner`)."""
+        self.merged.update(stages)
+
+    def count(self, unit: str, amount: int = 1) -> None:
+        if self.recording:
+            self.items[unit] = self.items.get(unit, 0) + int(amount)
+
+    def summary(self) -> Dict[str, Any]:
+        wall = time.perf_counter() - self._started if self._started is not None else 0.0
+        return {
+            "wall_s": wall,
+            "stages": {**{name: stats.summary(wall) for name, stats in self.stats.items()}, **self.merged},
+            "throughput": {f"{unit}_per_s": amount / wall if wall > 0 else 0.0 for unit, amount in self.items.items()},
+        }
+
+
+def run_case(name: str, case: Callable[[Dict[str, Any], Recorder], None], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one case; ``rss_growth_mb`` is how far it pushed peak RSS past the imports."""
+    floor = peak_rss_mb()
+    recorder = Recorder()
+    case(params, recorder)
+    peak = peak_rss_mb()
+    return {"case": name, "params": params, **recorder.summary(), "peak_rss_mb": peak, "rss_growth_mb": peak - floor}
+
+
+def run_isolated(module: str, name: str, preset: str) -> Dict[str, Any]:
+    """Run one case in a fresh interpreter so its peak RSS is not shared with other cases."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))}
+    completed = subprocess.run(
+        [sys.executable, "-m", module, "--case", name, "--preset", preset, "--emit-case"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark case {name!r} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=False
+        ).stdout.strip()
+    except OSError:  # pragma: no cover - git missing
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor() or None,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.2,
+    min_delta_ms: float = 0.05,
+    min_delta_mb: float = 1.0,
+) -> List[Dict[str, Any]]:
+    """Regressions of ``results`` against ``baseline`` (both suite JSON documents).
+
+    A stage latency percentile regresses when it is more than ``tolerance`` slower and
+    at least ``min_delta_ms`` slower in absolute terms (so microsecond jitter on tiny
+    stages is ignored); throughput regresses when it drops by more than ``tolerance``.
+    Memory is compared on ``rss_growth_mb`` rather than ``peak_rss_mb``, whose import
+    floor (torch included) would hide growth below ``tolerance`` times that floor; it
+    regresses when it grows by more than ``tolerance`` and at least ``min_delta_mb``.
+    Cases or stages missing from either side are skipped.
+    """
+    regressions: List[Dict[str, Any]] = []
+    for name, current in results.get("cases", {}).items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference is None:
+            continue
+        for stage, stats in current["stages"].items():
+            base_stats = reference["stages"].get(stage)
+            if base_stats is None:
+                continue
+            for key in LATENCY_KEYS:
+                now, before = stats[key], base_stats[key]
+                if now > before * (1.0 + tolerance) and now - before >= min_delta_ms:
+                    regressions.append({"case": name, "metric": f"{stage}.{key}", "baseline": before, "current": now})
+        for key, now in current["throughput"].items():
+            before = reference["throughput"].get(key)
+            if before and now < before * (1.0 - tolerance):
+                regressions.append({"case": name, "metric": f"throughput.{key}", "baseline": before, "current": now})
+        before_rss = reference.get("rss_growth_mb")
+        now_rss = current.get("rss_growth_mb")
+        if before_rss is not None and now_rss is not None:
+            if now_rss > before_rss * (1.0 + tolerance) and now_rss - before_rss >= min_delta_mb:
+                regressions.append(
+                    {"case": name, "metric": "rss_growth_mb", "baseline": before_rss, "current": now_rss}
+                )
+    for regression in regressions:
+        regression["ratio"] = regression["current"] / regression["baseline"] if regression["baseline"] else None
+    return regressions
+
+
+def write_json(path: str, document: Dict[str, Any]) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(document, indent=2, sort_keys=True))
+
+
+def format_table(results: Dict[str, Any]) -> str:
+    lines = []
+    for name, result in results["cases"].items():
+        throughput = ", ".join(f"{key} {value:,.0f}" for key, value in result["throughput"].items())
+        lines.append(
+            f"{name:<12} RSS +{result['rss_growth_mb']:7.1f} MB (peak {result['peak_rss_mb']:7.1f} MB) | {throughput}"
+        )
+        for stage, stats in result["stages"].items():
+            lines.append(
+                f"  {stage:<14} p50 {stats['p50_ms']:9.3f} ms | p95 {stats['p95_ms']:9.3f} ms | p99 {stats['p99_ms']:9.3f} ms"
+            )
+    return "\n".join(lines)
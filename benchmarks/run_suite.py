@@ -0,0 +1,122 @@
+"""Benchmark suite: per-stage p50/p95/p99, throughput and RSS growth, with baseline comparison.
+
+Run with ``python -m benchmarks.run_suite`` (``--preset smoke`` for a quick check).
+Every case is the ``case(params, recorder)`` function of a ``benchmarks/bench_*.py``
+module, imported only when that case runs. Each case runs in its own interpreter
+unless ``--in-process`` is given. Results go to ``--out`` as JSON; ``--baseline``
+compares against a stored result document and exits non-zero on regressions, and
+``--save-baseline`` stores the current run.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+from .harness import Recorder, compare, environment, format_table, run_case, run_isolated, write_json
+
+# Suite case name -> module defining ``case(params, recorder)``.
+CASES: Dict[str, str] = {
+    "iou": "benchmarks.bench_iou",
+    "association": "benchmarks.bench_association",
+    "kalman": "benchmarks.bench_kalman",
+    "gating": "benchmarks.bench_gating",
+    "existence": "benchmarks.bench_existence",
+    "intervals": "benchmarks.bench_intervals",
+    "end_to_end": "benchmarks.bench_end_to_end",
+    "pipeline": "benchmarks.bench_pipeline",
+    "trackers": "benchmarks.bench_trackers",
+    "reid_index": "benchmarks.bench_reid_index",
+    "pno": "benchmarks.bench_pno",
+}
+
+# Sizes per preset. "production" matches dense 1080p CCTV scenes; "smoke" keeps CI fast.
+PRESETS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "production": {
+        "iou": {"tracks": 1000, "dets": 1000, "iterations": 200},
+        "association": {"objects": 1000, "frames": 300},
+        "kalman": {"tracks": 5000, "frames": 300},
+        "gating": {"tracks": 1000, "dets": 300, "iterations": 200},
+        "existence": {"tracks": 20000, "frames": 1000},
+        "intervals": {"objects": 2000, "frames": 1000, "query_every": 100},
+        "end_to_end": {"objects": 1000, "frames": 300},
+        "pipeline": {"objects": 500, "frames": 300},
+        "trackers": {"objects": 1000, "frames": 100},
+        "reid_index": {
+            "size": 20000, "dim": 128, "queries": 64, "k": 10, "n_lists": 128, "n_probe": 8, "iterations": 20
+        },
+        "pno": {"height": 1080, "width": 1920, "boxes": 12, "images": 500, "bank_size": 512},
+    },
+    "smoke": {
+        "iou": {"tracks": 50, "dets": 50, "iterations": 5},
+        "association": {"objects": 30, "frames": 10},
+        "kalman": {"tracks": 50, "frames": 10},
+        "gating": {"tracks": 20, "dets": 20, "iterations": 5},
+        "existence": {"tracks": 100, "frames": 10},
+        "intervals": {"objects": 50, "frames": 20, "query_every": 5},
+        "end_to_end": {"objects": 30, "frames": 10},
+        "pipeline": {"objects": 30, "frames": 10},
+        "trackers": {"objects": 30, "frames": 10},
+        "reid_index": {"size": 500, "dim": 32, "queries": 8, "k": 5, "n_lists": 8, "n_probe": 2, "iterations": 3},
+        "pno": {"height": 240, "width": 320, "boxes": 4, "images": 5, "bank_size": 8},
+    },
+}
+
+
+def load_case(name: str) -> Callable[[Dict[str, Any], Recorder], None]:
+    return importlib.import_module(CASES[name]).case
+
+
+def run_suite(cases: List[str], preset: str = "production", isolate: bool = True) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"preset": preset, "environment": environment(), "cases": {}}
+    for name in cases:
+        if isolate:
+            results["cases"][name] = run_isolated("benchmarks.run_suite", name, preset)
+        else:
+            results["cases"][name] = run_case(name, load_case(name), PRESETS[preset][name])
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--case", nargs="*", default=None, choices=sorted(CASES), help="Cases to run (default: all)")
+    parser.add_argument("--preset", default="production", choices=sorted(PRESETS))
+    parser.add_argument("--out", default="outputs/benchmarks/results.json")
+    parser.add_argument("--baseline", default=None, help="Stored results JSON to compare against")
+    parser.add_argument("--save-baseline", default=None, help="Also write this run as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Ignore latency changes smaller than this")
+    parser.add_argument("--min-delta-mb", type=float, default=1.0, help="Ignore RSS growth changes smaller than this")
+    parser.add_argument("--in-process", action="store_true", help="Run cases in this process (RSS growth is shared)")
+    parser.add_argument("--emit-case", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    cases = args.case or list(CASES)
+    if args.emit_case:
+        print(json.dumps(run_case(cases[0], load_case(cases[0]), PRESETS[args.preset][cases[0]])))
+        return 0
+    results = run_suite(cases, args.preset, isolate=not args.in_process)
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        results["baseline"] = {"path": args.baseline, "environment": baseline.get("environment")}
+        results["regressions"] = compare(results, baseline, args.tolerance, args.min_delta_ms, args.min_delta_mb)
+    write_json(args.out, results)
+    if args.save_baseline:
+        write_json(args.save_baseline, {key: value for key, value in results.items() if key not in ("baseline", "regressions")})
+    print(format_table(results))
+    for regression in results.get("regressions", []):
+        print(
+            f"REGRESSION {regression['case']} {regression['metric']}: "
+            f"{regression['baseline']:.3f} -> {regression['current']:.3f}"
+        )
+    return 1 if results.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Batched amodal expansion stage."""
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from amodal_cctv.amodal.expansion import build_amodal_stage  # noqa: E402
+from amodal_cctv.runtime.pipeline import PipelineConfig, PipelinedRunner  # noqa: E402
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker  # noqa: E402
+
+
+class ConstantHead(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = []
+
+    def forward(self, features):
+        self.calls.append(features.shape[0])
+        return torch.tensor([-0.1, -0.1, 0.1, 0.1]).expand(features.shape[0], 4)
+
+
+def _dets(boxes, dim=8):
+    boxes = np.asarray(boxes, dtype=float)
+    return {
+        "boxes": boxes,
+        "scores": np.full(len(boxes), 0.9),
+        "features": np.arange(len(boxes) * dim, dtype=float).reshape(len(boxes), dim),
+    }
+
+
+def test_stage_expands_only_occluded_tracks_in_one_batch():
+    head = ConstantHead()
+    stage = build_amodal_stage({"enabled": True, "head_config": {"input_dim": 8}}, head=head)
+    tracker = build_bytetrack_tracker()
+    lone, pair_a, pair_b, hidden = [0, 0, 10, 10], [100, 0, 120, 20], [110, 0, 130, 20], [300, 0, 320, 20]
+    tracks = tracker.update(_dets([lone, pair_a, pair_b, hidden])).copy()
+    stage.expand(tracks)
+    tracks = tracker.update(_dets([lone, pair_a, pair_b])).copy()
+    before = tracks.box.copy()
+    rows = stage.expand(tracks)
+    assert sorted(tracks.track_id[rows].tolist()) == [2, 3, 4]
+    assert head.calls[-1] == 3
+    assert np.allclose(tracks.box[0], before[0])
+    assert np.allclose(tracks.box[3], before[3] + [-2, -2, 2, 2])
+    assert stage.cache.stats()["hits"] >= 3
+
+
+def test_torchscript_stage_runs_in_pipeline_and_is_measured():
+    with pytest.warns(RuntimeWarning, match="without weights"):
+        stage = build_amodal_stage({"enabled": True, "torchscript": True, "head_config": {"input_dim": 8}})
+
+    class Detector:
+        def infer(self, frame):
+            x = float(frame["frame_id"])
+            return _dets([[x, 0, x + 20, 20], [x + 10, 0, x + 30, 20]])
+
+    runner = PipelinedRunner(Detector(), build_bytetrack_tracker(), PipelineConfig(), amodal_stage=stage)
+    stats = runner.run({"frame_id": idx} for idx in range(5))
+    assert stats["stages"]["amodal"]["count"] == 5
+    assert build_amodal_stage({"enabled": False}) is None
+
+
+def test_targets_match_dense_neighbour_overlap():
+    from amodal_cctv.trackers.box_ops import iou_matrix
+
+    config = {"enabled": True, "max_tracks": 10000, "head_config": {"input_dim": 8}}
+    stage = build_amodal_stage(config, head=ConstantHead())
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0, 2000, size=(800, 2))
+    boxes = np.concatenate([xy, xy + rng.uniform(20, 60, size=(800, 2))], axis=1)
+    tracks = build_bytetrack_tracker().update(_dets(boxes)).copy()
+    tracks.time_since_update[::7] = 1
+    overlap = iou_matrix(tracks.box, tracks.box)
+    np.fill_diagonal(overlap, 0.0)
+    expected = np.flatnonzero((overlap.max(axis=1) >= 0.1) | (tracks.time_since_update > 0))
+    assert np.array_equal(np.sort(stage.targets(tracks)), expected)
@@ -0,0 +1,79 @@
+"""Benchmark suite: result schema, stage percentiles and baseline comparison."""
+import copy
+import json
+from pathlib import Path
+
+import benchmarks
+
+from benchmarks.harness import Recorder, compare, run_case
+from benchmarks.run_suite import CASES, PRESETS, load_case, main, run_suite
+
+
+def test_recorder_skips_warmup_and_counts_items():
+    recorder = Recorder()
+    with recorder.stage("warmup"):
+        pass
+    recorder.start()
+    for _ in range(3):
+        with recorder.stage("work"):
+            recorder.count("items", 2)
+    summary = recorder.summary()
+    assert set(summary["stages"]) == {"work"} and summary["stages"]["work"]["count"] == 3
+    assert summary["throughput"]["items_per_s"] > 0
+
+
+def test_smoke_preset_reports_every_case():
+    results = run_suite(list(CASES), "smoke", isolate=False)
+    assert set(results["cases"]) == set(CASES) and results["environment"]["python"]
+    for name, result in results["cases"].items():
+        assert result["params"] == PRESETS["smoke"][name]
+        assert 0 <= result["rss_growth_mb"] <= result["peak_rss_mb"]
+        assert result["throughput"] and result["stages"]
+        for stats in result["stages"].values():
+            assert 0 <= stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+    stages = results["cases"]["end_to_end"]["stages"]
+    assert {"detect", "track", "kalman", "gating", "intervals", "end_to_end"} <= set(stages)
+    assert set(results["cases"]["trackers"]["stages"]) == {"bytetrack", "ocsort"}
+
+
+def test_every_bench_module_is_a_suite_case():
+    modules = {path.stem for path in Path(benchmarks.__file__).parent.glob("bench_*.py")}
+    assert modules == {module.rsplit(".", 1)[1] for module in CASES.values()}
+    assert all(set(CASES) == set(preset) for preset in PRESETS.values())
+
+
+def test_compare_flags_slower_stages_lower_throughput_and_memory():
+    kalman_case = run_case("kalman", load_case("kalman"), PRESETS["smoke"]["kalman"])
+    baseline = {"cases": {"kalman": kalman_case}}
+    same = copy.deepcopy(baseline)
+    assert compare(same, baseline) == []
+    slower = copy.deepcopy(baseline)
+    kalman = slower["cases"]["kalman"]
+    kalman["stages"]["update"]["p99_ms"] = baseline["cases"]["kalman"]["stages"]["update"]["p99_ms"] * 2 + 1.0
+    kalman["throughput"]["track_updates_per_s"] /= 3
+    kalman["rss_growth_mb"] = baseline["cases"]["kalman"]["rss_growth_mb"] * 2 + 50.0
+    metrics = {regression["metric"] for regression in compare(slower, baseline)}
+    assert metrics == {"update.p99_ms", "throughput.track_updates_per_s", "rss_growth_mb"}
+    # The import floor in peak RSS is not compared; only growth past it is.
+    floor = copy.deepcopy(baseline)
+    floor["cases"]["kalman"]["peak_rss_mb"] += 100.0
+    assert compare(floor, baseline) == []
+    # Sub-threshold absolute changes are jitter, not regressions.
+    tiny = copy.deepcopy(baseline)
+    tiny["cases"]["kalman"]["stages"]["predict"]["p50_ms"] += 0.01
+    tiny["cases"]["kalman"]["rss_growth_mb"] += 0.5
+    assert compare(tiny, baseline, min_delta_ms=0.05) == []
+
+
+def test_cli_writes_results_and_fails_on_regression(tmp_path):
+    out, base = tmp_path / "results.json", tmp_path / "baseline.json"
+    assert main(["--preset", "smoke", "--case", "iou", "--in-process", "--out", str(out), "--save-baseline", str(base)]) == 0
+    stored = json.loads(base.read_text())
+    assert "regressions" not in stored and stored["cases"]["iou"]["stages"]["iou"]["count"] == 5
+    for stats in stored["cases"]["iou"]["stages"].values():
+        stats.update(p50_ms=0.0, p95_ms=0.0, p99_ms=0.0)
+    stored["cases"]["iou"]["throughput"]["pairs_per_s"] = 1e15
+    base.write_text(json.dumps(stored))
+    args = ["--preset", "smoke", "--case", "iou", "--in-process", "--out", str(out), "--baseline", str(base)]
+    assert main(args + ["--min-delta-ms", "0"]) == 1
+    assert json.loads(out.read_text())["regressions"]
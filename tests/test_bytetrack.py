@@ -0,0 +1,92 @@
+"""ByteTrack association behaviour."""
+import numpy as np
+
+from amodal_cctv.trackers.association import associate_boxes, candidate_pairs
+from amodal_cctv.trackers.box_ops import iou_matrix
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker
+from amodal_cctv.trackers.track_store import TrackStore
+
+
+def _crowd(rng, count):
+    xy = rng.uniform(0, 1000, size=(count, 2))
+    wh = rng.uniform(20, 60, size=(count, 2))
+    return np.concatenate([xy, xy + wh], axis=1)
+
+
+def test_candidate_pairs_cover_all_overlaps():
+    rng = np.random.default_rng(3)
+    tracks, dets = _crowd(rng, 300), _crowd(rng, 280)
+    rows, cols = candidate_pairs(tracks, dets)
+    candidates = set(zip(rows.tolist(), cols.tolist()))
+    overlapping = set(zip(*np.nonzero(iou_matrix(tracks, dets) > 0)))
+    assert overlapping <= candidates
+
+
+def test_candidate_pairs_with_degenerate_boxes_stay_bounded():
+    rng = np.random.default_rng(5)
+    points = np.repeat(rng.uniform(0, 1000, size=(200, 2)), 2, axis=1)
+    tracks = np.concatenate([points, _crowd(rng, 20)])
+    dets = np.concatenate([_crowd(rng, 20), points[:50]])
+    rows, cols = candidate_pairs(tracks, dets)
+    assert rows.size < tracks.shape[0] * dets.shape[0]
+    overlapping = set(zip(*np.nonzero(iou_matrix(tracks, dets) > 0)))
+    assert overlapping <= set(zip(rows.tolist(), cols.tolist()))
+
+
+def test_sparse_matches_dense_assignment():
+    rng = np.random.default_rng(4)
+    tracks = _crowd(rng, 200)
+    dets = tracks + rng.normal(0, 4, size=tracks.shape)
+    dense = associate_boxes(tracks, dets, 0.3, sparse=False)
+    sparse = associate_boxes(tracks, dets, 0.3, sparse=True)
+    iou = iou_matrix(tracks, dets)
+    assert len(dense[0]) == len(sparse[0])
+    assert np.isclose(iou[dense].sum(), iou[sparse].sum())
+
+
+def test_low_score_detection_rescues_track():
+    tracker = build_bytetrack_tracker({"match_thresh": 0.5})
+    box = np.array([[10.0, 10.0, 50.0, 50.0]])
+    first = tracker.update({"boxes": box, "scores": [0.9]}).to_dicts()
+    second = tracker.update({"boxes": box + 1.0, "scores": [0.3]}).to_dicts()
+    assert len(first) == len(second) == 1
+    assert second[0]["track_id"] == first[0]["track_id"]
+    assert second[0]["status"] == "tracked"
+    # Low-score detections never spawn new tracks.
+    assert len(build_bytetrack_tracker().update({"boxes": box, "scores": [0.3]})) == 0
+
+
+def test_track_store_growth_retire_and_lookup():
+    store = TrackStore(capacity=2)
+    ids = store.add(np.zeros((5, 4)), np.ones(5), np.zeros(5, dtype=int), np.eye(5), np.ones(5, dtype=bool))
+    assert store.capacity >= 5 and ids.tolist() == [1, 2, 3, 4, 5]
+    retired = store.retire(np.array([False, True, False, True, False]))
+    assert retired.track_id.tolist() == [2, 4]
+    assert np.array_equal(retired.feature, np.eye(5)[[1, 3]])
+    assert store.column("track_id").tolist() == [1, 3, 5]
+    assert store.rows_of([5, 1]).tolist() == [2, 0]
+    assert np.array_equal(store.column("feature"), np.eye(5)[[0, 2, 4]])
+
+
+def test_tracker_output_is_view_with_legacy_dicts():
+    tracker = build_bytetrack_tracker()
+    boxes = np.array([[0.0, 0.0, 10.0, 10.0], [100.0, 100.0, 120.0, 130.0]])
+    batch = tracker.update({"boxes": boxes, "scores": [0.9, 0.8], "features": np.ones((2, 3))})
+    assert np.shares_memory(batch.box, tracker.store.column("box"))
+    records = batch.to_records()
+    assert records.track_id.tolist() == [1, 2]
+    item = batch[1]
+    assert item["status"] == "tracked" and item["feature"].shape == (3,)
+
+
+def test_motion_prediction_is_opt_in():
+    box = np.array([[10.0, 10.0, 50.0, 50.0]])
+    frames = [{"boxes": box + 2.0 * step, "scores": [0.9]} for step in range(3)]
+    coasting = {"boxes": np.empty((0, 4)), "scores": np.empty(0)}
+    default = build_bytetrack_tracker({"match_thresh": 0.5})
+    moving = build_bytetrack_tracker({"match_thresh": 0.5, "velocity_gain": 1.0})
+    for frame in frames:
+        default.update(frame)
+        moving.update(frame)
+    assert np.allclose(default.update(coasting).box, frames[-1]["boxes"])
+    assert moving.update(coasting).box[0, 0] > frames[-1]["boxes"][0, 0]
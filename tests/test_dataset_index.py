@@ -0,0 +1,148 @@
+"""Cached columnar annotation index behind the MOT17 / UA-DETRAC / TAO-Amodal adapters."""
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pytest
+
+from amodal_cctv.data.datasets import build_dataset
+from amodal_cctv.data.detrac import UADETRACDataset
+from amodal_cctv.data.mot17 import MOT17Dataset
+from amodal_cctv.data.tao_amodal import TAOAmodalDataset
+
+
+def _mot17(root):
+    for name in ("MOT17-02-FRCNN", "MOT17-02-DPM", "MOT17-04-FRCNN"):
+        seq = root / "train" / name
+        (seq / "gt").mkdir(parents=True)
+        (seq / "seqinfo.ini").write_text(
+            f"[Sequence]\nname={name}\nimDir=img1\nframeRate=30\nseqLength=4\nimWidth=1920\nimHeight=1080\nimExt=.jpg\n"
+        )
+        (seq / "gt" / "gt.txt").write_text("3,2,10,20,30,40,1,1,0.5\n1,1,0,0,10,10,1,1,1.0\n1,2,5,5,10,10,0,7,0.25\n")
+
+
+def test_mot17_rows_are_grouped_by_frame_and_cached(tmp_path, monkeypatch):
+    _mot17(tmp_path / "mot")
+    dataset = MOT17Dataset(str(tmp_path / "mot"), cache_dir=str(tmp_path / "index"))
+    assert dataset.sequences() == ["MOT17-02-FRCNN", "MOT17-04-FRCNN"] and len(dataset) == 2
+    frames = dataset.sequence("MOT17-02-FRCNN")
+    assert len(frames) == 4 and frames[1]["boxes"].shape == (0, 4)
+    first, third = frames[0], frames[-2]
+    assert first["frame_id"] == 1 and first["track_ids"].tolist() == [1, 2] and first["flags"].tolist() == [1, 0]
+    assert third["boxes"].tolist() == [[10, 20, 40, 60]] and third["visibility"][0] == pytest.approx(0.5)
+    assert third["image_path"].endswith("MOT17-02-FRCNN/img1/000003.jpg")
+    table = dataset.table("MOT17-02-FRCNN")
+    assert table["image_id"].tolist() == [1, 1, 3] and table["width"] == 1920
+    assert len(list(dataset.frames())) == 8 and dataset.categories()[0] == "pedestrian"
+
+    # Re-opening maps the existing index; nothing is parsed again.
+    monkeypatch.setattr(MOT17Dataset, "_build", lambda self, builder: pytest.fail("re-parsed"))
+    reopened = MOT17Dataset(str(tmp_path / "mot"), cache_dir=str(tmp_path / "index"))
+    assert isinstance(reopened.index.columns["boxes"], np.memmap)
+    assert pickle.loads(pickle.dumps(reopened)).sequence("MOT17-04-FRCNN")[2]["track_ids"].tolist() == [2]
+    monkeypatch.undo()
+
+    gt = tmp_path / "mot" / "train" / "MOT17-04-FRCNN" / "gt" / "gt.txt"
+    gt.write_text("2,9,0,0,5,5,1,1,1.0\n")
+    os.utime(gt, ns=(time.time_ns(), time.time_ns() + 10**9))
+    edited = MOT17Dataset(str(tmp_path / "mot"), cache_dir=str(tmp_path / "index"))
+    assert edited.sequence("MOT17-04-FRCNN")[1]["track_ids"].tolist() == [9]
+    assert edited.index.meta["rows"] == 4
+
+
+def test_detrac_xml_with_occlusion_and_truncation(tmp_path):
+    xml_dir = tmp_path / "detrac" / "DETRAC-Train-Annotations-XML"
+    xml_dir.mkdir(parents=True)
+    (xml_dir / "MVI_20011.xml").write_text(
+        """<?xml version="1.0" encoding="utf-8"?>
+<sequence name="MVI_20011">
+  <sequence_attribute camera_state="unstable" sence_weather="sunny"/>
+  <ignored_region><box left="0" top="0" width="5" height="5"/></ignored_region>
+  <frame density="2" num="2"><target_list>
+    <target id="1"><box left="0" top="0" width="10" height="10"/>
+      <attribute orientation="0" speed="1" trajectory_length="2" truncation_ratio="0.1" vehicle_type="bus"/>
+      <occlusion><region_overlap occlusion_id="2" occlusion_status="1" left="5" top="0" width="10" height="10"/></occlusion>
+    </target>
+    <target id="2"><box left="5" top="0" width="10" height="10"/>
+      <attribute orientation="0" speed="1" trajectory_length="2" truncation_ratio="0" vehicle_type="car"/>
+    </target>
+  </target_list></frame>
+  <frame density="1" num="1"><target_list>
+    <target id="1"><box left="1" top="1" width="10" height="10"/>
+      <attribute orientation="0" speed="1" trajectory_length="1" truncation_ratio="0" vehicle_type="bus"/>
+    </target>
+  </target_list></frame>
+</sequence>"""
+    )
+    dataset = build_dataset("ua_detrac", root=str(tmp_path / "detrac"), cache_dir=str(tmp_path / "index"))
+    frames = dataset.sequence("MVI_20011")
+    assert [frame["frame_id"] for frame in frames] == [1, 2]
+    second = frames[1]
+    assert second["track_ids"].tolist() == [1, 2] and second["category_ids"].tolist() == [1, 0]
+    assert second["visibility"].tolist() == pytest.approx([0.4, 1.0])
+    assert frames[0]["image_path"].endswith("Insight-MVT_Annotation_Train/MVI_20011/img00001.jpg")
+
+
+def test_tao_json_indexes_amodal_and_visible_boxes(tmp_path):
+    data = {
+        "videos": [{"id": 7, "name": "train/YFCC100M/v_1"}, {"id": 3, "name": "train/LaSOT/v_2"}],
+        "images": [
+            {"id": 11, "video_id": 7, "frame_index": 30, "file_name": "a/30.jpg", "width": 640, "height": 480},
+            {"id": 10, "video_id": 7, "frame_index": 0, "file_name": "a/0.jpg", "width": 640, "height": 480},
+            {"id": 12, "video_id": 3, "frame_index": 0, "file_name": "b/0.jpg", "width": 320, "height": 240},
+        ],
+        "annotations": [
+            {"id": 1, "image_id": 11, "track_id": 4, "category_id": 805, "bbox": None, "amodal_bbox": [-5, 0, 20, 20], "visibility": 0.0},
+            {"id": 2, "image_id": 10, "track_id": 4, "category_id": 805, "bbox": [0, 0, 10, 20], "amodal_bbox": [0, 0, 20, 20], "visibility": 0.5},
+            {"id": 3, "image_id": 12, "track_id": 5, "category_id": 95, "bbox": [1, 1, 2, 2], "visibility": 1.0},
+            # Orphans: image ids above and below every listed image.
+            {"id": 4, "image_id": 99, "track_id": 6, "category_id": 95, "bbox": [5, 5, 5, 5]},
+            {"id": 5, "image_id": 9, "track_id": 7, "category_id": 95, "bbox": [6, 6, 6, 6]},
+        ],
+        "categories": [{"id": 805, "name": "person"}, {"id": 95, "name": "car"}],
+    }
+    (tmp_path / "amodal_annotations").mkdir()
+    (tmp_path / "amodal_annotations" / "train.json").write_text(json.dumps(data))
+    dataset = TAOAmodalDataset(str(tmp_path), cache_dir=str(tmp_path / "index"))
+    assert dataset.sequences() == ["train/LaSOT/v_2", "train/YFCC100M/v_1"]
+    assert dataset.categories() == ["car", "person"]
+    video = dataset.sequence("train/YFCC100M/v_1")
+    assert [frame["frame_id"] for frame in video] == [0, 30]
+    assert video[0]["boxes"].tolist() == [[0, 0, 20, 20]] and video[0]["visible_boxes"].tolist() == [[0, 0, 10, 20]]
+    assert video[1]["boxes"].tolist() == [[-5, 0, 15, 20]] and video[1]["visibility"].tolist() == [0.0]
+    assert dataset.sequence("train/LaSOT/v_2")[0]["boxes"].tolist() == [[1, 1, 3, 3]]
+    assert sorted(np.concatenate([dataset.table(name)["track_ids"] for name in dataset.sequences()])) == [4, 4, 5]
+    assert dataset.table("train/YFCC100M/v_1")["width"] == 640
+
+
+def test_dataset_tables_feed_slice_evaluation(tmp_path):
+    from amodal_cctv.eval import slices
+
+    data = {
+        "videos": [{"id": 1, "name": "v1"}],
+        "images": [{"id": i, "video_id": 1, "frame_index": i, "file_name": f"{i}.jpg", "width": 100, "height": 100} for i in range(3)],
+        "annotations": [
+            {"id": 1, "image_id": 0, "track_id": 1, "category_id": 5, "bbox": [10, 10, 20, 20], "visibility": 1.0},
+            {"id": 2, "image_id": 1, "track_id": 1, "category_id": 5, "bbox": None, "amodal_bbox": [12, 10, 20, 20], "visibility": 0.0},
+            {"id": 3, "image_id": 2, "track_id": 2, "category_id": 7, "bbox": [90, 90, 30, 30], "visibility": 0.5},
+        ],
+        "categories": [{"id": 5, "name": "person"}, {"id": 7, "name": "car"}],
+    }
+    (tmp_path / "amodal_annotations").mkdir()
+    (tmp_path / "amodal_annotations" / "train.json").write_text(json.dumps(data))
+    table = TAOAmodalDataset(str(tmp_path), cache_dir=str(tmp_path / "index")).table("v1")
+    assert table["category_id"].tolist() == [5, 5, 7] and "category_ids" not in table
+    predictions = {key: table[key] for key in ("image_id", "category_id", "boxes")}
+    predictions["scores"] = np.ones(3)
+    result = slices.evaluate_slices({"v1": table}, {"v1": predictions})
+    assert result["slices"]["full"] == pytest.approx(1.0)
+    assert result["counts"]["full"] == 3 and result["counts"]["out_of_fov"] == 1
+
+
+def test_missing_roots_raise():
+    with pytest.raises(FileNotFoundError):
+        UADETRACDataset("/nonexistent").sequences()
+    with pytest.raises(FileNotFoundError):
+        TAOAmodalDataset("/nonexistent").sequences()
@@ -0,0 +1,124 @@
+"""Content-addressed detection cache: round trip, keying and replay."""
+import numpy as np
+import pytest
+
+from amodal_cctv.detectors.cache import DetectionCache, RecordingDetector, cached_or_run, detector_cache_key
+from amodal_cctv.detectors.yolo_v10 import YOLOv10Config
+from amodal_cctv.runtime.sweep import SweepConfig, SweepExecutor, _DETECTION_MEMO
+from amodal_cctv.scripts import run_eval, run_infer
+
+
+def _frames(count, dim=None):
+    rng = np.random.default_rng(0)
+    frames = []
+    for idx in range(count):
+        n = idx % 4
+        frame = {"boxes": rng.uniform(0, 100, (n, 4)), "scores": rng.uniform(size=n), "classes": np.arange(n)}
+        if dim is not None:
+            frame["features"] = rng.normal(size=(n, dim))
+        frames.append(frame)
+    return frames
+
+
+def test_round_trip_is_memory_mapped(tmp_path):
+    cache = DetectionCache(str(tmp_path))
+    frames = _frames(9, dim=6)
+    cache.write("k", "seq/01", frames)
+    cached = cache.read("k", "seq/01")
+    assert len(cached) == 9 and cache.contains("k", "seq/01") and not cache.contains("k", "other")
+    assert isinstance(cached.columns["boxes"], np.memmap)
+    for original, replayed in zip(frames, cached):
+        assert np.allclose(original["boxes"], replayed["boxes"])
+        assert np.allclose(original["scores"], replayed["scores"])
+        assert np.array_equal(original["classes"], replayed["classes"])
+        assert replayed["features"].shape == (len(original["boxes"]), 6)
+    assert [entry["sequence"] for entry in cache.entries()] == ["seq/01"]
+
+
+def test_key_tracks_outputs_relevant_config_and_weights_content(tmp_path):
+    weights = tmp_path / "w.pt"
+    weights.write_bytes(b"a")
+    base = detector_cache_key("yolov10", YOLOv10Config(weights_path=str(weights)))
+    assert base == detector_cache_key("yolov10", YOLOv10Config(weights_path=str(weights), device="cpu", batch_size=1))
+    assert base != detector_cache_key("yolov10", YOLOv10Config(weights_path=str(weights), confidence=0.5))
+    weights.write_bytes(b"bb")
+    assert base != detector_cache_key("yolov10", YOLOv10Config(weights_path=str(weights)))
+
+
+def test_cached_or_run_only_runs_detector_on_miss(tmp_path):
+    calls = []
+
+    class Detector:
+        def infer(self, frame):
+            calls.append(frame)
+            return {"boxes": [frame["boxes"][0]], "scores": [0.5], "classes": [0]}
+
+    frames = [{"boxes": [[i, i, i + 5, i + 5]]} for i in range(4)]
+    cache = DetectionCache(str(tmp_path))
+    _, hit = cached_or_run(cache, "k", "toy", Detector(), frames)
+    replayed, hit_again = cached_or_run(cache, "k", "toy", Detector(), frames)
+    assert (hit, hit_again) == (False, True) and len(calls) == 4
+    assert np.allclose(replayed[3]["boxes"], [[3, 3, 8, 8]])
+
+
+def test_sweep_replays_cached_detections_across_runs(tmp_path):
+    infers = []
+
+    class Detector:
+        def infer(self, frame):
+            infers.append(1)
+            return {"boxes": [frame["boxes"][0]], "scores": [0.9], "classes": [0]}
+
+    grid = {"detector": ["a"], "tracker": ["bytetrack"], "tmax_gap": [5]}
+    for run in range(2):
+        _DETECTION_MEMO.clear()
+        config = SweepConfig(
+            workers=0, results_path=str(tmp_path / f"results{run}.jsonl"), detection_cache=str(tmp_path / "dets")
+        )
+        executor = SweepExecutor(grid, config=config, detector_factory=lambda name, config: Detector())
+        assert executor.run()["completed"] == 1
+        assert executor.store.records()[0]["detections"] == ("computed", "cached")[run]
+    assert len(infers) == 5
+
+
+def test_run_infer_and_eval_replay_from_cache(tmp_path):
+    key = detector_cache_key("yolov10", YOLOv10Config())
+    frames = [{"boxes": [[10 + i, 10, 50, 50]], "scores": [0.9], "classes": [0]} for i in range(5)]
+    DetectionCache(str(tmp_path)).write(key, "toy", frames)
+    result = run_infer.run("missing.yaml", detection_cache=str(tmp_path))
+    assert result["detection_cache"] == "hit" and len(result["predictions"]) == 5
+    assert run_eval.run("full", detection_cache=str(tmp_path), cache_key=key)["sequences"] == {"toy": 5}
+
+
+def test_recording_refuses_to_cache_dropped_frames(tmp_path):
+    class Detector:
+        def infer(self, frame):
+            return {"boxes": [[0, 0, 5, 5]], "scores": [0.9], "classes": [0]}
+
+    cache = DetectionCache(str(tmp_path))
+    recorder = RecordingDetector(Detector())
+    for frame_id in (0, 1, 3):
+        recorder.infer({"frame_id": frame_id})
+    assert recorder.missing_frames() == [2] and recorder.missing_frames(num_frames=5) == [2, 4]
+    with pytest.raises(ValueError, match="never detected"):
+        recorder.save(cache, "k", "toy")
+    recorder.infer({"frame_id": 2})
+    with pytest.raises(ValueError, match="never detected"):
+        recorder.save(cache, "k", "toy", num_frames=5)
+    assert not cache.contains("k", "toy")
+    assert len(recorder.save(cache, "k", "toy", num_frames=4)) == 4
+
+
+def test_run_infer_only_records_lossless_runs(tmp_path, monkeypatch):
+    class Detector:
+        config = YOLOv10Config()
+
+        def infer(self, frame):
+            return {"boxes": [frame["boxes"][0]], "scores": [0.9], "classes": [0]}
+
+    monkeypatch.setattr(run_infer, "build_yolov10_detector", lambda config=None: Detector())
+    config = tmp_path / "infer.yaml"
+    config.write_text("pipeline:\n  drop_policy: drop_oldest\n")
+    assert run_infer.run(str(config), detection_cache=str(tmp_path / "dets"))["detection_cache"] == "skipped"
+    assert DetectionCache(str(tmp_path / "dets")).entries() == []
+    assert run_infer.run("missing.yaml", detection_cache=str(tmp_path / "dets"))["detection_cache"] == "written"
@@ -0,0 +1,97 @@
+"""Detector wrappers exercised against an in-memory model double."""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from amodal_cctv.detectors.yolo_v10 import build_yolov10_detector, letterbox_boxes, roi_mean_pool
+
+torch = pytest.importorskip("torch")
+
+
+class RecordingModel:
+    """Mimics ``ultralytics.YOLO.predict``: one result per input image."""
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    def predict(self, source, stream=False, batch=1, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        self.calls.append((len(images), stream, batch))
+        results = [
+            SimpleNamespace(
+                boxes=SimpleNamespace(
+                    xyxy=torch.tensor([[float(img), 0.0, float(img) + 5.0, 5.0]]),
+                    conf=torch.tensor([0.9]),
+                    cls=torch.tensor([2.0]),
+                )
+            )
+            for img in images
+        ]
+        return iter(results) if stream else results
+
+
+def _detector(batch_size):
+    detector = build_yolov10_detector({"device": "cpu", "batch_size": batch_size})
+    detector._model = RecordingModel()
+    return detector
+
+
+def test_infer_batch_chunks_forward_passes_and_keeps_order():
+    detector = _detector(batch_size=4)
+    outputs = detector.infer_batch(list(range(10)), frame_ids=list(range(100, 110)))
+    assert [call[0] for call in detector._model.calls] == [4, 4, 2]
+    assert [out["frame_id"] for out in outputs] == list(range(100, 110))
+    assert np.allclose([out["boxes"][0, 0] for out in outputs], np.arange(10))
+    assert outputs[0]["classes"].dtype.kind == "i"
+
+
+def test_infer_stream_consumes_iterables_lazily():
+    detector = _detector(batch_size=3)
+    stream = detector.infer_stream(iter(range(7)))
+    first = next(stream)
+    assert first["frame_id"] == 0 and len(detector._model.calls) == 1
+    assert [out["frame_id"] for out in stream] == list(range(1, 7))
+    assert all(call[1] for call in detector._model.calls)
+
+
+class NeckModel(RecordingModel):
+    """Adds the ``model.model[-1]`` detection head that ROI pooling hooks, fed two neck levels."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        head = torch.nn.Identity()
+        head.stride = torch.tensor([8.0, 16.0])
+        self.model = SimpleNamespace(model=[head])
+
+    def predict(self, source, stream=False, batch=1, **kwargs):
+        images = source if isinstance(source, list) else [source]
+        level = torch.tensor([float(img) for img in images]).view(-1, 1, 1, 1)
+        self.model.model[-1]([level.expand(-1, 2, 4, 4), -level.expand(-1, 3, 2, 2)])
+        results = super().predict(source, stream=False, batch=batch)
+        for result in results:
+            result.orig_shape = (32, 32)
+        return iter(results) if stream else results
+
+
+def test_roi_mean_pool_matches_brute_force():
+    rng = np.random.default_rng(0)
+    feature_map = rng.normal(size=(3, 10, 12))
+    boxes = np.array([[0.0, 0.0, 12.0, 10.0], [2.3, 1.7, 5.1, 4.0], [11.5, 9.5, 14.0, 12.0], [-3.0, -2.0, -1.0, -1.0]])
+    pooled = roi_mean_pool(feature_map, boxes)
+    for box, got in zip(boxes, pooled):
+        x1, y1 = int(min(max(np.floor(box[0]), 0), 11)), int(min(max(np.floor(box[1]), 0), 9))
+        x2, y2 = max(int(min(np.ceil(box[2]), 12)), x1 + 1), max(int(min(np.ceil(box[3]), 10)), y1 + 1)
+        assert np.allclose(got, feature_map[:, y1:y2, x1:x2].mean(axis=(1, 2)), atol=1e-5)
+    assert np.allclose(letterbox_boxes([[0, 0, 64, 32]], (32, 64), (48, 64)), [[0, 8, 64, 40]])
+
+
+def test_roi_features_pool_each_batch_row_from_the_neck():
+    detector = build_yolov10_detector({"device": "cpu", "batch_size": 2, "roi_features": True})
+    detector._model = NeckModel()
+    outputs = detector.infer_batch([1, 2, 3])
+    assert [out["features"].shape for out in outputs] == [(1, 5)] * 3
+    for img, out in zip([1, 2, 3], outputs):
+        assert np.allclose(out["features"], [[img, img, -img, -img, -img]])
+    assert next(detector.infer_stream(iter([7])))["features"][0, 0] == 7
+    assert _detector(batch_size=1).infer(4)["features"] is None
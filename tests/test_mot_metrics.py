@@ -0,0 +1,104 @@
+"""Streaming MOTChallenge writer and in-process HOTA/CLEAR/Identity metrics."""
+import numpy as np
+import pytest
+
+from amodal_cctv.eval.mot_metrics import MOTMetricsConfig, evaluate_sequence, evaluate_sequences, summarize
+from amodal_cctv.eval.trackeval_adapter import MOTWriter, TrackEvalConfig, format_for_trackeval, read_mot_file
+from amodal_cctv.scripts import run_eval, run_infer
+from amodal_cctv.trackers.track_store import TrackBatch
+
+
+def _ground_truth(frames=20):
+    rows = []
+    for frame in range(1, frames + 1):
+        rows.append([frame, 1, 10 + frame, 10, 20, 40, 1, 1, 1])
+        rows.append([frame, 2, 100, 10 + frame, 20, 40, 1, 1, 1])
+    return np.asarray(rows, dtype=float)
+
+
+def _batch(ids, boxes):
+    n = len(ids)
+    return TrackBatch(
+        track_id=np.asarray(ids),
+        box=np.asarray(boxes, dtype=float).reshape(n, 4),
+        score=np.full(n, 0.9),
+        class_id=np.zeros(n, dtype=int),
+        age=np.ones(n, dtype=int),
+        hits=np.ones(n, dtype=int),
+        time_since_update=np.zeros(n, dtype=int),
+        is_confirmed=np.ones(n, dtype=bool),
+        has_feature=np.zeros(n, dtype=bool),
+    )
+
+
+def test_perfect_tracking_scores_one():
+    gt = _ground_truth()
+    metrics = summarize(evaluate_sequence(gt, gt[:, :7]))
+    for name in ("HOTA", "DetA", "AssA", "MOTA", "IDF1"):
+        assert metrics[name] == pytest.approx(1.0)
+
+
+def test_identity_split_halves_association():
+    gt = _ground_truth()
+    pred = gt.copy()
+    pred[pred[:, 0] > 10, 1] += 10
+    metrics = summarize(evaluate_sequence(gt, pred))
+    assert metrics["DetA"] == pytest.approx(1.0) and metrics["AssA"] == pytest.approx(0.5)
+    assert metrics["HOTA"] == pytest.approx(np.sqrt(0.5))
+    assert metrics["IDSW"] == 2 and metrics["MOTA"] == pytest.approx(0.95)
+    assert metrics["IDF1"] == pytest.approx(0.5)
+
+
+def test_missing_track_and_ignored_ground_truth():
+    gt = _ground_truth()
+    metrics = summarize(evaluate_sequence(gt, gt[gt[:, 1] == 1]))
+    assert metrics["DetRe"] == pytest.approx(0.5) and metrics["MOTA"] == pytest.approx(0.5)
+    assert metrics["IDF1"] == pytest.approx(2 / 3)
+    ignored = gt.copy()
+    ignored[ignored[:, 1] == 2, 6] = 0
+    assert summarize(evaluate_sequence(ignored, gt[gt[:, 1] == 1]))["MOTA"] == pytest.approx(1.0)
+
+
+def test_writer_streams_and_parallel_evaluation_combines(tmp_path):
+    gt = _ground_truth()
+    seqs = {}
+    for name, offset in (("a", 0), ("b", 10)):
+        frames = []
+        for frame in range(1, 21):
+            rows = gt[gt[:, 0] == frame]
+            boxes = np.concatenate([rows[:, 2:4], rows[:, 2:4] + rows[:, 4:6]], axis=1)
+            ids = rows[:, 1] + (offset if frame > 10 else 0)
+            frames.append((frame, _batch(ids.astype(int), boxes)))
+        seqs[name] = frames
+    written = format_for_trackeval(seqs, TrackEvalConfig(eval_dir=str(tmp_path), flush_every=4))
+    assert read_mot_file(written["files"]["a"]).shape == (40, 10)
+    pairs = {name: (gt, path) for name, path in written["files"].items()}
+    result = evaluate_sequences(pairs, MOTMetricsConfig(workers=2))
+    assert result["sequences"]["a"]["HOTA"] == pytest.approx(1.0)
+    assert result["combined"]["MOTA"] == pytest.approx(1 - 2 / 80)
+    assert result == evaluate_sequences(pairs, MOTMetricsConfig(workers=0))
+
+
+def test_writer_skips_unconfirmed_and_coasting(tmp_path):
+    batch = _batch([1, 2, 3], [[0, 0, 10, 10]] * 3)
+    batch.is_confirmed[1] = False
+    batch.time_since_update[2] = 2
+    with MOTWriter(str(tmp_path / "seq.txt")) as writer:
+        writer.write(1, batch)
+    rows = read_mot_file(str(tmp_path / "seq.txt"))
+    assert rows[:, 1].tolist() == [1] and rows[0, 4:6].tolist() == [10, 10]
+
+
+def test_run_infer_streams_mot_rows_and_run_eval_scores_them(tmp_path):
+    from amodal_cctv.detectors.cache import DetectionCache, detector_cache_key
+    from amodal_cctv.detectors.yolo_v10 import YOLOv10Config
+
+    frames = [{"boxes": [[10 + i, 10, 50, 50]], "scores": [0.9], "classes": [0]} for i in range(5)]
+    DetectionCache(str(tmp_path / "dets")).write(detector_cache_key("yolov10", YOLOv10Config()), "toy", frames)
+    mot_path = tmp_path / "pred" / "toy.txt"
+    result = run_infer.run("missing.yaml", detection_cache=str(tmp_path / "dets"), mot_out=str(mot_path))
+    assert result["predictions"] == str(mot_path)
+    rows = read_mot_file(str(mot_path))
+    assert rows.shape[0] > 0 and rows[:, 0].max() <= 5
+    scored = run_eval.run_mot(str(tmp_path / "pred"), str(tmp_path / "pred"), workers=0)
+    assert scored["sequences"]["toy"]["HOTA"] == pytest.approx(1.0)
@@ -0,0 +1,127 @@
+"""Permanence filtering math."""
+import numpy as np
+
+from amodal_cctv.permanence.existence_filter import ExistenceBank, ExistenceConfig, ExistenceFilter
+from amodal_cctv.permanence.gating import (
+    GatingConfig,
+    mahalanobis_gate,
+    mahalanobis_gate_batch,
+    pairwise_residuals,
+    whitening_factors,
+)
+from amodal_cctv.permanence.intervals import IntervalLogger
+from amodal_cctv.permanence.kalman import BatchedKalmanFilter, KalmanConfig, KalmanPermanenceFilter
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker
+
+
+def test_batched_kalman_matches_single_track_loop():
+    rng = np.random.default_rng(0)
+    config = KalmanConfig()
+    count = 6
+    singles = [KalmanPermanenceFilter(config) for _ in range(count)]
+    bank = BatchedKalmanFilter(config, capacity=2)
+    bank.add(np.arange(count), np.zeros((count, 4)))
+    for _ in range(5):
+        dt = rng.uniform(0.5, 2.0, size=count)
+        detected = rng.random(count) > 0.3
+        z = rng.normal(0, 10, size=(count, 4))
+        bank.predict(dt=dt, occluded=~detected)
+        bank.update(np.flatnonzero(detected), z[detected])
+        for i, kf in enumerate(singles):
+            kf.predict(dt=dt[i], occluded=not detected[i])
+            if detected[i]:
+                kf.update(z[i])
+    for i, kf in enumerate(singles):
+        assert np.allclose(bank.state[i], kf.state.ravel())
+        assert np.allclose(bank.covariance[i], kf.covariance)
+
+
+def test_batched_kalman_tracks_constant_velocity_and_removes_rows():
+    bank = BatchedKalmanFilter(KalmanConfig(process_noise=0.01, measurement_noise=0.01))
+    bank.add([10, 11], np.zeros((2, 4)))
+    velocity = np.array([1.0, 2.0, 0.0, 0.0])
+    for step in range(1, 30):
+        bank.predict()
+        bank.update([0, 1], np.stack([velocity * step, -velocity * step]))
+    assert np.allclose(bank.state[0, 4:], velocity, atol=1e-2)
+    bank.remove(np.array([True, False]))
+    assert bank.track_id.tolist() == [11] and bank.rows_of([11]).tolist() == [0]
+    assert np.allclose(bank.state[0, 4:], -velocity, atol=1e-2)
+
+
+def test_batched_gate_matches_scalar_gate():
+    rng = np.random.default_rng(5)
+    config = GatingConfig()
+    tracks, dets = 5, 7
+    base = rng.normal(size=(tracks, 4, 4))
+    covariances = base @ base.transpose(0, 2, 1) + 0.5 * np.eye(4)
+    covariances[2] = np.diag([1.0, 2.0, 0.0, 0.0])  # singular: falls back to pseudo-inverse
+    residuals = pairwise_residuals(rng.normal(size=(tracks, 4)), rng.normal(size=(dets, 4)))
+    dt = np.arange(tracks)
+    result = mahalanobis_gate_batch(residuals, dt, config, covariances=covariances)
+    for n in range(tracks):
+        for m in range(dets):
+            scalar = mahalanobis_gate(residuals[n, m], covariances[n], int(dt[n]), config)
+            assert np.isclose(result["distance"][n, m], scalar["distance"])
+            assert result["accepted"][n, m] == scalar["accepted"]
+    reused = mahalanobis_gate_batch(residuals, dt, config, factors=whitening_factors(covariances))
+    assert np.allclose(reused["distance"], result["distance"])
+
+
+def test_existence_bank_matches_scalar_filter_and_retires():
+    config = ExistenceConfig(alpha_decay=0.5, retire_probability=0.2)
+    bank = ExistenceBank(config, capacity=1)
+    bank.add(3)
+    singles = [ExistenceFilter(config) for _ in range(3)]
+    pattern = np.array([[True, False, False], [False, False, True], [False, False, False]])
+    for detected in pattern:
+        dead = bank.step(detected)
+        for single, hit in zip(singles, detected):
+            single.boost() if hit else single.decay()
+    assert np.allclose(bank.probability, [s.probability for s in singles])
+    assert dead.tolist() == [1]
+    bank.remove(np.array([False, True, False]))
+    assert len(bank) == 2 and np.allclose(bank.probability, [singles[0].probability, singles[2].probability])
+
+
+def test_tracker_retires_tracks_through_existence_bank():
+    tracker = build_bytetrack_tracker({"existence_config": {"alpha_decay": 0.5, "retire_probability": 0.2}})
+    tracker.update({"boxes": [[0.0, 0.0, 10.0, 10.0]], "scores": [0.9]})
+    lengths = [len(tracker.update({"boxes": np.empty((0, 4))})) for _ in range(3)]
+    assert lengths == [1, 1, 0]
+    assert len(tracker.existence) == 0
+
+
+def test_interval_logger_streams_shards_and_answers_range_queries(tmp_path):
+    logger = IntervalLogger(sink_dir=str(tmp_path), chunk_size=2)
+    for track_id, (start, end) in enumerate([(0, 5), (3, 4), (10, 20), (12, 13), (30, 31)]):
+        logger.start(track_id, start, cause="occluder" if track_id == 2 else None)
+        logger.end(track_id, end)
+    logger.start(99, 15)
+    logger.end(1234, 7)  # no open interval: ignored
+    assert len(list(tmp_path.glob("intervals_*.npy"))) == 2
+
+    hits = logger.query(4, 12)
+    assert [(i.track_id, i.start_frame, i.end_frame) for i in hits] == [(0, 0, 5), (1, 3, 4), (2, 10, 20), (3, 12, 13)]
+    assert hits[2].cause == "occluder"
+    assert [i.track_id for i in logger.query(16, 16)] == [2, 99]
+
+    reopened = IntervalLogger(sink_dir=str(tmp_path), chunk_size=2)
+    assert [i.track_id for i in reopened.query(0, 100)] == [0, 1, 2, 3]
+    assert len(logger.to_serializable()) == 6
+
+
+def test_interval_logger_close_persists_buffer_and_open_intervals(tmp_path):
+    with IntervalLogger(sink_dir=str(tmp_path), chunk_size=100) as logger:
+        logger.start(1, 0, cause="occluder")
+        logger.end(1, 4)
+        logger.start(2, 3)
+    assert not (tmp_path / "open.json.tmp").exists()
+
+    reopened = IntervalLogger(sink_dir=str(tmp_path))
+    assert [(i.track_id, i.end_frame, i.cause) for i in reopened.query(0, 10)] == [(1, 4, "occluder"), (2, None, None)]
+    reopened.end(2, 9)
+    reopened.close()
+    final = IntervalLogger(sink_dir=str(tmp_path))
+    assert [(i.track_id, i.start_frame, i.end_frame) for i in final.query(0, 10)] == [(1, 0, 4), (2, 3, 9)]
+    assert final.open_intervals() == [] and not (tmp_path / "open.json").exists()
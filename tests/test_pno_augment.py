@@ -0,0 +1,133 @@
+"""Paste-N-Occlude: occluder bank, compositing and bulk target recomputation."""
+import pickle
+
+import numpy as np
+import pytest
+
+from amodal_cctv.amodal.pno_augment import (
+    OccluderBank,
+    PnOAugmenter,
+    PnOConfig,
+    apply_pno,
+    build_occluder_bank,
+    build_pno_config,
+    visible_box_targets,
+)
+
+
+def _bank(tmp_path, count=6, opaque=True):
+    rng = np.random.default_rng(0)
+    samples = []
+    for _ in range(count):
+        image = rng.integers(0, 255, (40, 30, 3), dtype=np.uint8)
+        mask = None if opaque else (rng.uniform(size=(1, 40, 30)) > 0.3)
+        samples.append((image, np.array([[0, 0, 30, 40]]), mask))
+    return build_occluder_bank(samples, str(tmp_path / "bank"), patch_size=16)
+
+
+def test_bank_is_memory_mapped_and_pickles_by_path(tmp_path):
+    bank = _bank(tmp_path)
+    assert len(bank) == 6 and bank.patch_size == 16
+    assert bank.patches.shape == (6, 16, 16, 3) and bank.alphas.max() == 255
+    assert bank.aspects == pytest.approx(np.full(6, 0.75))
+    payload = pickle.dumps(bank)
+    assert len(payload) < 200
+    assert np.array_equal(pickle.loads(payload).patches, bank.patches)
+
+
+def test_visible_targets_match_brute_force(tmp_path):
+    bank = _bank(tmp_path, opaque=False)
+    rng = np.random.default_rng(3)
+    augmenter = PnOAugmenter(bank, PnOConfig(copy_paste_prob=1.0, min_occluders=3, max_occluders=6, seed=4))
+    for _ in range(20):
+        image = rng.integers(0, 255, (120, 160, 3), dtype=np.uint8)
+        corners = rng.uniform(-10, 140, (6, 2))
+        boxes = np.concatenate([corners, corners + rng.uniform(5, 50, (6, 2))], axis=1)
+        out = augmenter(image, boxes)
+        assert out["image"].shape == image.shape
+        if out["occluder_boxes"].shape[0] == 0:  # every occluder landed off-image
+            assert np.array_equal(out["image"], image)
+        assert np.array_equal(out["boxes"], boxes)
+        assert np.all((out["visibility"] >= 0) & (out["visibility"] <= 1))
+        shown = out["visibility"] > 0
+        inside = (out["visible_boxes"][:, :2] >= boxes[:, :2] - 1e-6) & (out["visible_boxes"][:, 2:] <= boxes[:, 2:] + 1e-6)
+        assert inside[shown].all()
+
+    coverage = np.zeros((30, 40), dtype=bool)
+    coverage[5:20, 10:25] = True
+    coverage[12:30, 30:40] = True
+    origin = (20, 10)
+    boxes = np.array([[25.0, 12.0, 50.0, 35.0], [30.2, 15.5, 44.7, 29.9], [48.0, 20.0, 70.0, 45.0], [0.0, 0.0, 8.0, 8.0]])
+    visible, pixels = visible_box_targets(boxes, coverage, origin, (100, 100))
+    full = np.zeros((100, 100), dtype=bool)
+    full[10:40, 20:60] = coverage
+    for box, got, count in zip(boxes, visible, pixels):
+        x1, y1, x2, y2 = int(np.floor(box[0])), int(np.floor(box[1])), int(np.ceil(box[2])), int(np.ceil(box[3]))
+        open_pixels = ~full[y1:y2, x1:x2]
+        assert count == open_pixels.sum()
+        if not open_pixels.any():
+            assert np.all(got == 0)
+            continue
+        rows, cols = np.flatnonzero(open_pixels.any(axis=1)), np.flatnonzero(open_pixels.any(axis=0))
+        expected = [max(box[0], x1 + cols[0]), max(box[1], y1 + rows[0]), min(box[2], x1 + cols[-1] + 1), min(box[3], y1 + rows[-1] + 1)]
+        assert got == pytest.approx(expected)
+
+
+def test_fully_hidden_box_and_compositing(tmp_path):
+    bank = _bank(tmp_path)
+    coverage = np.ones((10, 10), dtype=bool)
+    visible, pixels = visible_box_targets(np.array([[2.0, 2.0, 8.0, 8.0]]), coverage, (0, 0), (10, 10))
+    assert np.all(visible == 0) and pixels[0] == 0
+    augmenter = PnOAugmenter(bank, PnOConfig(copy_paste_prob=1.0, min_occluders=1, max_occluders=1))
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    out = augmenter(image, [[10, 10, 50, 50]])
+    x1, y1, x2, y2 = out["occluder_boxes"][0].astype(int)
+    assert image.sum() == 0  # input left untouched unless inplace=True
+    assert out["image"][y1:y2, x1:x2].any() and out["visibility"][0] < 1.0
+
+
+def test_seed_reproduces_augmentations(tmp_path):
+    bank = _bank(tmp_path)
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    runs = [PnOAugmenter(bank, PnOConfig(copy_paste_prob=1.0, seed=7))(image, [[5, 5, 40, 50]]) for _ in range(2)]
+    assert np.array_equal(runs[0]["image"], runs[1]["image"])
+    assert np.array_equal(runs[0]["occluder_boxes"], runs[1]["occluder_boxes"])
+
+
+def test_occluders_landing_off_image_leave_frame_untouched(tmp_path):
+    augmenter = PnOAugmenter(_bank(tmp_path), PnOConfig(copy_paste_prob=1.0, min_occluders=3, max_occluders=3))
+    image = np.full((64, 64, 3), 9, dtype=np.uint8)
+    boxes = np.array([[100.0, 80.0, 140.0, 150.0], [-60.0, -50.0, -20.0, -5.0]])
+    out = augmenter(image, boxes, force=True)
+    assert out["occluder_boxes"].shape == (0, 4) and out["metadata"]["occluder_count"] == 0
+    assert np.array_equal(out["image"], image)
+    assert np.array_equal(out["visible_boxes"], boxes) and np.allclose(out["visibility"], 1.0)
+
+
+def test_workers_seed_from_torch_worker_seed(tmp_path, monkeypatch):
+    torch_data = pytest.importorskip("torch.utils.data")
+    bank = _bank(tmp_path)
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+
+    def draw(worker_seed):
+        info = None if worker_seed is None else type("Info", (), {"id": 0, "seed": worker_seed})()
+        monkeypatch.setattr(torch_data, "get_worker_info", lambda: info)
+        return PnOAugmenter(bank, PnOConfig(copy_paste_prob=1.0, seed=7))(image, [[5, 5, 40, 50]])["occluder_boxes"]
+
+    assert np.array_equal(draw(1234), draw(1234))
+    assert not np.array_equal(draw(1234), draw(1235))
+    assert not np.array_equal(draw(None), draw(1234))
+
+
+def test_probability_zero_and_missing_bank_pass_through(tmp_path):
+    bank = _bank(tmp_path)
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    out = PnOAugmenter(bank, PnOConfig(copy_paste_prob=0.0))(image, [[1, 1, 10, 10]])
+    assert out["metadata"]["occluder_count"] == 0 and out["visibility"][0] == pytest.approx(1.0)
+    passthrough = apply_pno(image, [(1, 1, 10, 10)], build_pno_config())
+    assert passthrough["image"] is image and passthrough["metadata"]["occluder_count"] == 0
+    config = build_pno_config({"bank_dir": bank.root, "copy_paste_prob": 1.0})
+    first, second = apply_pno(image, [(1, 1, 20, 20)], config), apply_pno(image, [(1, 1, 20, 20)], config)
+    assert first["metadata"]["occluder_count"] >= 2
+    assert not np.array_equal(first["occluder_boxes"], second["occluder_boxes"])
+    assert isinstance(OccluderBank(bank.root).patches, np.ndarray)
@@ -0,0 +1,59 @@
+"""Retired-track ANN index: exactness, recall, eviction and tracker hook."""
+import numpy as np
+
+from amodal_cctv.trackers.reid_index import build_reid_index, cosine_topk
+from amodal_cctv.trackers.strongsort import build_strongsort_tracker
+
+
+def _clustered(count, dim=32, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return centers[rng.integers(0, clusters, count)] + 0.3 * rng.normal(size=(count, dim))
+
+
+def test_untrained_index_is_exact_and_trained_index_keeps_recall():
+    vectors = _clustered(6000)
+    queries = vectors[:64] + 0.05 * np.random.default_rng(1).normal(size=(64, 32))
+    index = build_reid_index({"train_size": 4000, "exact_below": 0, "n_lists": 32, "n_probe": 6})
+    index.add(vectors[:1000], np.arange(1000))
+    assert not index.is_trained
+    normed = vectors[:1000] / np.linalg.norm(vectors[:1000], axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    expected, _ = cosine_topk(q, normed, 5)
+    assert np.array_equal(index.search(queries, 5)["track_id"], expected)
+
+    for start in range(1000, 6000, 500):
+        index.add(vectors[start : start + 500], np.arange(start, start + 500))
+    assert index.is_trained
+    approx = index.search(queries, 10)["track_id"]
+    exact = index.search(queries, 10, exact=True)["track_id"]
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(approx, exact)])
+    assert recall >= 0.9
+    assert (approx[:, 0] == np.arange(64)).all()
+
+
+def test_time_window_and_capacity_eviction():
+    index = build_reid_index({"window": 10.0, "max_items": 5})
+    vectors = _clustered(8, dim=4)
+    for t in range(8):
+        index.add(vectors[t], [t], timestamp=float(t))
+        assert len(index) <= 5
+    # Exceeding max_items drops the oldest down to evict_to * max_items (4) at once.
+    assert len(index) == 4
+    assert sorted(index.search(vectors[:8], k=8)["track_id"][0].tolist())[-4:] == [4, 5, 6, 7]
+    index.add(vectors[0], [100], timestamp=20.0)
+    result = index.search(vectors[0], k=3)
+    assert len(index) == 1
+    assert result["track_id"][0].tolist() == [100, -1, -1]
+    assert result["retired_at"][0, 0] == 20.0
+
+
+def test_strongsort_keeps_retired_embeddings():
+    tracker = build_strongsort_tracker({"reid_enabled": True, "embedding_dim": 2, "max_age": 1, "reid_index": {}})
+    dets = {"boxes": np.array([[0.0, 0, 10, 20]]), "scores": np.array([0.9]), "features": np.array([[1.0, 0.0]])}
+    for _ in range(3):
+        tracker.update(dets, timestamp=0.0)
+    for t in range(1, 4):
+        tracker.update({"boxes": np.empty((0, 4))}, timestamp=float(t))
+    hits = tracker.retired_index.search(np.array([[1.0, 0.1]]), k=1)
+    assert hits["track_id"].tolist() == [[1]] and hits["similarity"][0, 0] > 0.99
@@ -0,0 +1,39 @@
+"""ROI feature cache: LRU order, frame TTL, byte budget and batch API."""
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from amodal_cctv.amodal.roi_cache import ROICache  # noqa: E402
+
+
+def test_lru_keeps_recently_read_entries():
+    cache = ROICache(max_items=2)
+    cache.put(1, torch.ones(4))
+    cache.put(2, torch.ones(4))
+    assert cache.get(1) is not None
+    cache.put(3, torch.ones(4))
+    assert cache.keys() == [1, 3]
+    assert cache.stats()["evictions"] == 1 and cache.stats()["hits"] == 1
+
+
+def test_byte_budget_and_ttl():
+    cache = ROICache(max_items=100, max_bytes=3 * 16, ttl_frames=2)
+    for track_id in range(5):
+        cache.put(track_id, torch.zeros(4, dtype=torch.float32), frame=track_id)
+    assert cache.keys() == [2, 3, 4] and cache.nbytes == 48
+    cache.advance(5)
+    assert cache.keys() == [3, 4] and cache.expirations == 1
+    cache.put(9, torch.zeros(100))
+    assert 9 not in cache
+
+
+def test_batch_roundtrip_stacks_contiguously_and_does_not_pin_batch():
+    cache = ROICache()
+    batch = torch.arange(12, dtype=torch.float32).view(3, 4)
+    cache.put_many([10, 11, 12], batch)
+    assert cache.nbytes == 3 * 4 * 4
+    features, found = cache.get_many([11, 99, 12])
+    assert found.tolist() == [True, False, True]
+    assert features.is_contiguous() and features.shape == (3, 4)
+    assert torch.equal(features[0], batch[1]) and torch.equal(features[1], torch.zeros(4))
+    assert cache.misses == 1
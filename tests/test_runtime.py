@@ -0,0 +1,179 @@
+"""Pipelined runtime behaviour with a stand-in detector."""
+import time
+
+import numpy as np
+
+from amodal_cctv.runtime.pipeline import PipelineConfig, PipelinedRunner
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker
+
+
+class SlowDetector:
+    reentrant = True
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+
+    def infer(self, frame):
+        time.sleep(self.delay)
+        x = float(frame["frame_id"])
+        return {"boxes": np.array([[x, 0.0, x + 40.0, 40.0]]), "scores": np.array([0.9]), "classes": np.array([0])}
+
+
+def _frames(count):
+    return ({"frame_id": idx} for idx in range(count))
+
+
+def test_pipeline_keeps_tracking_ordered_and_reports_stages():
+    seen = []
+    runner = PipelinedRunner(
+        SlowDetector(0.002),
+        build_bytetrack_tracker(),
+        PipelineConfig(detect_workers=4, queue_size=4),
+        sink=lambda frame, tracks: seen.append((frame["frame_id"], tracks.track_id.tolist(), tracks.timestamp)),
+    )
+    stats = runner.run(_frames(30))
+    assert [frame_id for frame_id, _, _ in seen] == list(range(30))
+    assert all(ids == [1] for _, ids, _ in seen)
+    assert stats["frames"] == 30 and stats["dropped"] == 0
+    assert set(stats["stages"]) == {"decode", "detect", "track", "sink"}
+    assert stats["stages"]["detect"]["p95_ms"] >= 2.0
+
+
+def test_pipeline_drops_frames_under_back_pressure():
+    seen = []
+    runner = PipelinedRunner(
+        SlowDetector(0.01),
+        build_bytetrack_tracker(),
+        PipelineConfig(detect_workers=1, queue_size=1, drop_policy="drop_newest"),
+        sink=lambda frame, tracks: seen.append(frame["frame_id"]),
+    )
+    stats = runner.run(_frames(50))
+    assert stats["dropped"] > 0
+    assert stats["frames"] + stats["dropped"] == 50
+    assert seen == sorted(seen)
+
+
+class StatefulDetector:
+    """Detector that breaks if two calls overlap, like a shared Ultralytics predictor."""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.overlaps = 0
+
+    def infer(self, frame):
+        self.active += 1
+        self.overlaps += self.active > 1
+        time.sleep(0.002)
+        self.active -= 1
+        return SlowDetector().infer(frame)
+
+
+def test_pipeline_never_runs_a_shared_non_reentrant_detector_concurrently():
+    detector = StatefulDetector()
+    runner = PipelinedRunner(detector, build_bytetrack_tracker(), PipelineConfig(detect_workers=4))
+    assert PipelinedRunner(detector, build_bytetrack_tracker()).detect_workers == 1
+    assert PipelinedRunner(SlowDetector(), build_bytetrack_tracker()).detect_workers == 2
+    assert runner.run(_frames(20))["frames"] == 20 and detector.overlaps == 0
+
+    built = []
+
+    def factory(config):
+        built.append(StatefulDetector())
+        return built[-1]
+
+    runner = PipelinedRunner(None, build_bytetrack_tracker(), PipelineConfig(detect_workers=3), detector_factory=factory)
+    assert runner.run(_frames(30))["frames"] == 30
+    assert 1 <= len(built) <= 3 and sum(d.overlaps for d in built) == 0
+
+
+class BatchDetector(SlowDetector):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batch_sizes = []
+
+    def infer_batch(self, frames):
+        self.batch_sizes.append(len(frames))
+        return [self.infer(frame) for frame in frames]
+
+
+def test_multiplexer_batches_across_cameras_and_keeps_per_camera_order():
+    from amodal_cctv.runtime.multiplex import MultiCameraMux, MuxConfig, simulate_cameras
+
+    for workers in (0, 2):
+        seen = {}
+        detector = BatchDetector()
+        mux = MultiCameraMux(
+            detector,
+            build_bytetrack_tracker,
+            config=MuxConfig(batch_size=8, shard_workers=workers),
+            sink=lambda cam, idx, tracks: seen.setdefault(cam, []).append((idx, tracks.track_id.tolist())),
+        )
+        stats = mux.run(simulate_cameras(12, max_frames=5))
+        assert stats["frames"] == 60 and len(seen) == 12
+        assert max(detector.batch_sizes) == 8 and sum(detector.batch_sizes) == 60
+        for frames in seen.values():
+            assert [idx for idx, _ in frames] == list(range(5))
+            assert all(ids == [1] for _, ids in frames)
+        if workers:
+            assert sum(shard["cameras"] for shard in stats["shards"]) == 12
+
+
+def test_run_multicam_builds_detector_and_trackers_from_config(tmp_path, monkeypatch):
+    from amodal_cctv.scripts import run_multicam
+    from amodal_cctv.trackers.registry import build_tracker
+
+    config = tmp_path / "multicam.yaml"
+    config.write_text(
+        "detector: {name: yolov10, weights: w.pt, device: cpu, confidence: 0.6}\n"
+        "tracker: {name: ocsort, max_age: 7}\n"
+        "multicam: {batch_size: 4, shard_workers: 0}\n"
+    )
+    detector_options, trackers = [], []
+
+    def detecting(options):
+        detector_options.append(options)
+        return BatchDetector()
+
+    def tracking(name, options):
+        trackers.append(build_tracker(name, options))
+        return trackers[-1]
+
+    monkeypatch.setattr(run_multicam, "build_yolov10_detector", detecting)
+    monkeypatch.setattr(run_multicam, "build_tracker", tracking)
+    result = run_multicam.run(str(config), simulate=3, max_frames=2)
+    assert result["stats"]["frames"] == 6
+    assert detector_options == [{"weights_path": "w.pt", "device": "cpu", "confidence": 0.6}]
+    assert len(trackers) == 3 and all(type(t).__name__ == "OCSortTracker" and t.config.max_age == 7 for t in trackers)
+
+
+class _FailingTracker:
+    def __init__(self, config=None) -> None:
+        self.updates = 0
+
+    def update(self, detections, timestamp=None):
+        self.updates += 1
+        if self.updates == 3:
+            raise ValueError("tracker exploded")
+        return []
+
+
+class _DyingTracker(_FailingTracker):
+    def update(self, detections, timestamp=None):
+        import os
+
+        os._exit(3)
+
+
+def test_multiplexer_surfaces_shard_worker_failures():
+    import pytest
+
+    from amodal_cctv.runtime.multiplex import MultiCameraMux, MuxConfig, ShardFailed, simulate_cameras
+
+    mux = MultiCameraMux(BatchDetector(), _FailingTracker, config=MuxConfig(batch_size=4, shard_workers=2, queue_size=2, poll_interval=0.1))
+    start = time.perf_counter()
+    with pytest.raises(ShardFailed, match="tracker exploded"):
+        mux.run(simulate_cameras(6, max_frames=50))
+    mux.tracker_factory = _DyingTracker
+    with pytest.raises(ShardFailed, match="exited with code 3"):
+        mux.run(simulate_cameras(6, max_frames=50))
+    assert time.perf_counter() - start < 30
@@ -0,0 +1,85 @@
+"""Slice masks, their on-disk index and single-pass sliced evaluation."""
+import numpy as np
+import pytest
+
+from amodal_cctv.eval import slices
+from amodal_cctv.eval.tao_amodal_metrics import compute_visibility_binned_ap
+from amodal_cctv.scripts import run_eval
+
+
+def _table():
+    return {
+        "image_id": np.array([0, 0, 1, 1]),
+        "category_id": np.array([1, 1, 1, 2]),
+        "boxes": np.array([[10, 10, 50, 50], [-20, 0, 20, 40], [60, 60, 90, 90], [0, 0, 30, 30]], dtype=float),
+        "visibility": np.array([1.0, 0.5, 0.05, 0.9]),
+        "width": 100,
+        "height": 100,
+    }
+
+
+def test_slice_masks_from_visibility_and_fov():
+    masks = slices.slice_masks(_table())
+    assert masks["full"].all()
+    assert masks["occlusion_only"].tolist() == [False, True, True, False]
+    assert masks["out_of_fov"].tolist() == [False, True, False, False]
+    filtered = slices.filter_by_slice({"seq": _table()}, "occlusion_only")
+    assert filtered["seq"]["visibility"].tolist() == [0.5, 0.05] and filtered["seq"]["width"] == 100
+    with pytest.raises(ValueError):
+        slices.filter_by_slice(_table(), "nope")
+
+
+def test_slice_index_is_cached_on_disk_and_keyed_by_content(tmp_path):
+    config = slices.SliceConfig(cache_dir=str(tmp_path))
+    masks = slices.SliceIndex(config).masks("seq/1", _table())
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+    reloaded = slices.SliceIndex(config).masks("seq/1", _table())
+    assert all(np.array_equal(masks[name], reloaded[name]) for name in masks)
+    edited = _table()
+    edited["visibility"] = np.ones(4)
+    assert not slices.SliceIndex(config).masks("seq/1", edited)["occlusion_only"].any()
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+
+
+def test_single_pass_matches_per_slice_evaluation(tmp_path):
+    rng = np.random.default_rng(0)
+    gt, pred = {}, {}
+    for seq in ("a", "b"):
+        table = _table()
+        table["boxes"] = table["boxes"] + rng.uniform(0, 5, (4, 4))
+        gt[seq] = table
+        pred[seq] = {
+            "image_id": np.r_[table["image_id"], 1],
+            "category_id": np.r_[table["category_id"], 1],
+            "boxes": np.r_[table["boxes"] + rng.normal(0, 2, (4, 4)), [[0, 0, 5, 5]]],
+            "scores": rng.uniform(size=5),
+        }
+    result = slices.evaluate_slices(gt, pred, slices.SliceIndex(slices.SliceConfig(cache_dir=str(tmp_path))))
+    assert result["counts"] == {"full": 8, "occlusion_only": 4, "out_of_fov": 2}
+    assert set(result["visibility"]) == {"visible", "partially_occluded", "heavily_occluded"}
+    # "full" is plain AP over everything: evaluate each sequence as one batch for reference.
+    whole = {
+        key: np.concatenate([np.atleast_1d(gt["a"][key]), np.atleast_1d(gt["b"][key]) + (2 if key == "image_id" else 0)])
+        for key in ("image_id", "category_id", "boxes", "visibility")
+    }
+    whole_pred = {
+        key: np.concatenate([pred["a"][key], pred["b"][key] + (2 if key == "image_id" else 0)]) for key in pred["a"]
+    }
+    assert result["slices"]["full"] == pytest.approx(compute_visibility_binned_ap(whole_pred, whole)["all"])
+
+
+def test_run_eval_loads_sequence_split_tables(tmp_path):
+    table = _table()
+    gt_path, pred_path = tmp_path / "gt.npz", tmp_path / "pred.npz"
+    np.savez(gt_path, sequence=np.array(["s1", "s1", "s2", "s2"]), **{k: v for k, v in table.items()})
+    np.savez(
+        pred_path,
+        sequence=np.array(["s1", "s1", "s2", "s2"]),
+        image_id=table["image_id"],
+        category_id=table["category_id"],
+        boxes=table["boxes"],
+        scores=np.array([0.9, 0.8, 0.7, 0.6]),
+    )
+    result = run_eval.run_slices(str(gt_path), str(pred_path), str(tmp_path / "masks"))
+    assert result["slices"]["full"] == pytest.approx(1.0)
+    assert result["counts"]["out_of_fov"] == 1
@@ -0,0 +1,71 @@
+"""StrongSORT appearance matching and batched Re-ID embedding."""
+import numpy as np
+import pytest
+
+from amodal_cctv.trackers.strongsort import build_strongsort_tracker
+
+
+def _frame(boxes, features=None):
+    boxes = np.asarray(boxes, dtype=float)
+    dets = {"boxes": boxes, "scores": np.full(len(boxes), 0.9), "classes": np.zeros(len(boxes), dtype=int)}
+    if features is not None:
+        dets["features"] = np.asarray(features, dtype=float)
+    return dets
+
+
+@pytest.mark.parametrize("mode", ["ema", "ring"])
+def test_appearance_keeps_identities_when_targets_swap_places(mode):
+    tracker = build_strongsort_tracker(
+        {"reid_enabled": True, "embedding_dim": 2, "gallery_mode": mode, "appearance_weight": 0.9, "motion_weight": 0.1,
+         "gating_config": {"base_sigma": 50.0}}
+    )
+    left, right = [0, 0, 20, 40], [30, 0, 50, 40]
+    look = np.eye(2)
+    for _ in range(4):
+        out = tracker.update(_frame([left, right], look))
+    ids = dict(zip(out.track_id.tolist(), out.box[:, 0].tolist()))
+    assert ids == {1: 0.0, 2: 30.0} and out.is_confirmed.all()
+    # Swap positions: motion alone prefers keeping ids in place, appearance overrides it.
+    out = tracker.update(_frame([right, left], look))
+    assert dict(zip(out.track_id.tolist(), out.box[:, 0].tolist())) == {1: 30.0, 2: 0.0}
+    assert out.feature.shape == (2, 2)
+
+
+def test_motion_only_without_embeddings_and_tentative_tracks_expire():
+    tracker = build_strongsort_tracker()
+    for t in range(4):
+        out = tracker.update(_frame([[10 + t, 10, 50 + t, 90]]))
+    assert out.track_id.tolist() == [1] and out.is_confirmed.all()
+    tracker.update(_frame([[10, 10, 50, 90], [300, 300, 340, 380]]))
+    out = tracker.update(_frame([[10, 10, 50, 90]]))
+    assert out.track_id.tolist() == [1]
+
+
+def test_reid_model_embeds_all_rois_in_one_batch():
+    pytest.importorskip("torch")
+    from amodal_cctv.trackers.reid_backbones import build_reid_model
+
+    model = build_reid_model({"device": "cpu", "embedding_dim": 16})
+    image = np.random.default_rng(0).integers(0, 255, size=(120, 160, 3), dtype=np.uint8)
+    boxes = np.array([[0, 0, 40, 80], [60, 20, 100, 100], [0, 0, 40, 80]], dtype=float)
+    with pytest.warns(RuntimeWarning, match="randomly initialised"):
+        emb = model.embed(image, boxes)
+    assert emb.shape == (3, 16)
+    assert np.allclose(np.linalg.norm(emb, axis=1), 1.0, atol=1e-5)
+    assert np.allclose(emb[0], emb[2], atol=1e-5)
+    tracker = build_strongsort_tracker({"reid_enabled": True, "embedding_dim": 16}, reid_model=model)
+    out = tracker.update(_frame(boxes[:2]), image=image)
+    assert out.has_feature.all() and out.feature.shape == (2, 16)
+
+
+def test_reid_disabled_ignores_detection_features():
+    features = np.array([[1.0, 0.0]])
+    off = build_strongsort_tracker({"embedding_dim": 2}).update(_frame([[0, 0, 20, 40]], features))
+    on = build_strongsort_tracker({"reid_enabled": True, "embedding_dim": 2}).update(_frame([[0, 0, 20, 40]], features))
+    assert not off.has_feature.any() and on.has_feature.all()
+
+
+def test_mismatched_feature_width_fails_clearly():
+    tracker = build_strongsort_tracker({"reid_enabled": True, "embedding_dim": 128})
+    with pytest.raises(ValueError, match="448-dim but embedding_dim is 128"):
+        tracker.update(_frame([[0, 0, 20, 40]], np.ones((1, 448))))
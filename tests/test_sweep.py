@@ -0,0 +1,95 @@
+"""Ablation sweep expansion, detection sharing and resume."""
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+from amodal_cctv.runtime.sweep import SweepConfig, SweepExecutor, _DETECTION_MEMO, effective_cell, expand_grid, run_cell
+
+ABLATION = Path(__file__).resolve().parent.parent / "configs" / "ablation.yaml"
+GRID = {"detector": ["a", "b"], "tracker": ["bytetrack", "ocsort"], "tmax_gap": [5, 10], "pno": [False, True]}
+SHARED = {"weights": {"a_pno": "a_pno.pt", "b_pno": "b_pno.pt"}}
+
+
+class CountingDetector:
+    built = []
+
+    def __init__(self, name):
+        CountingDetector.built.append(name)
+
+    def infer(self, frame):
+        return {"boxes": [frame["boxes"][0]], "scores": [0.9], "classes": [0]}
+
+
+def counting_factory(name, config):
+    return CountingDetector(name)
+
+
+def test_full_ablation_grid_expands_every_axis_and_collapses_inert_ones(tmp_path):
+    config = yaml.safe_load(ABLATION.read_text())
+    grid = config["grid"]
+    cells = expand_grid(grid)
+    assert len(grid) == 9 and len(cells) == 3 * 3 * 2**7 and "calibration" in grid
+    assert len({tuple(sorted(cell.items())) for cell in cells}) == len(cells)
+    # Calibration is not wired in and placeholder pno/amodal/Re-ID weights make those axes
+    # inert; tracker-specific knobs only vary for their tracker:
+    # 3 detectors x 2 tmax_gap x (bytetrack 2 + ocsort 1 + strongsort 2).
+    executor = SweepExecutor(grid, config["shared"], SweepConfig(results_path=str(tmp_path / "r.jsonl")))
+    assert len(executor.cells()) == 3 * 2 * (2 + 1 + 2)
+    strongsort = {"tracker": "strongsort", "reid": "on", "calibration": "on"}
+    assert effective_cell(strongsort, {}) == {"tracker": "strongsort"}
+    assert effective_cell(strongsort, {"reid_weights": "osnet.pt"}) == {"tracker": "strongsort", "reid": "on"}
+    ocsort = effective_cell({"tracker": "ocsort", "reid": "on", "alpha_decay": 0.9, "tmax_gap": 20}, {})
+    assert ocsort == {"tracker": "ocsort", "tmax_gap": 20}
+    assert len(SweepExecutor(GRID, config=executor.config).cells()) == 8  # no pno weights: pno is inert
+
+
+def test_sweep_shares_detections_and_resumes(tmp_path):
+    _DETECTION_MEMO.clear()
+    CountingDetector.built = []
+    failing = {"on": True}
+
+    def runner(cell, shared, frames, detections):
+        if failing["on"] and cell["tracker"] == "ocsort" and cell["tmax_gap"] == 10:
+            raise RuntimeError("interrupted")
+        return {"frames": len(detections)}
+
+    config = SweepConfig(workers=0, results_path=str(tmp_path / "results.jsonl"), chunk_size=4)
+    executor = SweepExecutor(GRID, SHARED, config, cell_runner=runner, detector_factory=counting_factory)
+    summary = executor.run()
+    assert summary["completed"] == 12 and summary["failed"] == 4
+    # One detector run per (detector, pno) group, reused by the tracker/permanence variants.
+    assert len(CountingDetector.built) == 4
+
+    failing["on"] = False
+    summary = SweepExecutor(GRID, SHARED, config, cell_runner=runner, detector_factory=counting_factory).run()
+    assert summary["skipped"] == 12 and summary["completed"] == 4
+    assert SweepExecutor(GRID, SHARED, config).pending() == []
+
+
+def test_sweep_runs_default_cells_on_process_pool(tmp_path):
+    config = SweepConfig(workers=2, results_path=str(tmp_path / "results.jsonl"), chunk_size=2)
+    grid = {"detector": ["rtdetrv2"], "tracker": ["bytetrack", "ocsort", "strongsort"], "tmax_gap": [20]}
+    summary = SweepExecutor(grid, config=config).run()
+    assert summary["completed"] == 3 and summary["failed"] == 0
+
+
+def test_reid_cells_embed_frame_crops(monkeypatch):
+    from amodal_cctv.trackers import reid_backbones
+
+    calls = []
+
+    class Embedder:
+        def embed(self, image, boxes):
+            calls.append(image.shape)
+            return np.ones((len(boxes), 128))
+
+    monkeypatch.setattr(reid_backbones, "build_reid_model", lambda config: calls.append(config) or Embedder())
+    frames = [{"frame_id": idx, "image": np.zeros((48, 64, 3), np.uint8)} for idx in range(3)]
+    detections = [{"boxes": np.array([[4.0 + idx, 4.0, 24.0, 40.0]]), "scores": np.array([0.9])} for idx in range(3)]
+    cell = {"tracker": "strongsort", "reid": "on", "tmax_gap": 5}
+    assert run_cell(cell, {"reid_weights": "osnet.pt"}, frames, detections)["frames"] == 3
+    assert calls == [{"weights_path": "osnet.pt"}] + [(48, 64, 3)] * 3
+    calls.clear()
+    run_cell({**cell, "reid": "off"}, {"reid_weights": "osnet.pt"}, frames, detections)
+    assert calls == []
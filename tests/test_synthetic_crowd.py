@@ -0,0 +1,56 @@
+"""Streaming synthetic crowd load generator."""
+import itertools
+
+import numpy as np
+import pytest
+
+from amodal_cctv.data.datasets import build_dataset
+from amodal_cctv.data.synthetic_crowd import MOTION_MODELS, SyntheticCrowd
+from amodal_cctv.trackers.bytetrack import build_bytetrack_tracker
+
+
+def test_stream_is_seeded_and_ground_truth_lines_up_with_detections():
+    crowd = SyntheticCrowd(num_objects=50, num_frames=20, feature_dim=8, false_positives=3.0, seed=4)
+    first, second = list(crowd.stream()), list(crowd.stream())
+    assert len(first) == 20
+    for (dets, truth), (dets2, _) in zip(first, second):
+        assert np.array_equal(dets["boxes"], dets2["boxes"])
+        hit = truth["det_rows"] >= 0
+        assert dets["features"].shape == (len(dets["boxes"]), 8)
+        assert np.abs(dets["boxes"][truth["det_rows"][hit]] - truth["visible_boxes"][hit]).max() < 10
+        assert np.all(truth["visible_boxes"][:, :2] >= truth["boxes"][:, :2] - 1e-9)
+        assert np.all(truth["visible_boxes"][:, 2:] <= truth["boxes"][:, 2:] + 1e-9)
+    assert not np.array_equal(list(SyntheticCrowd(num_objects=50, seed=5).stream())[0][0]["boxes"], first[0][0]["boxes"])
+
+
+@pytest.mark.parametrize("motion", MOTION_MODELS)
+def test_objects_stay_in_the_scene_and_occlusions_cause_misses(motion):
+    crowd = SyntheticCrowd(num_objects=300, num_frames=200, motion=motion, occlusion_rate=0.05, miss_rate=0.0)
+    width, height = crowd.extent()
+    occluded = missed_when_occluded = 0
+    for _, truth in crowd.stream():
+        boxes = truth["boxes"]
+        assert boxes[:, :2].min() >= 0 and boxes[:, 2].max() <= width + 1e-6 and boxes[:, 3].max() <= height + 1e-6
+        heavy = truth["visibility"] < 0.25
+        occluded += heavy.sum()
+        missed_when_occluded += (truth["det_rows"][heavy] < 0).sum()
+        assert np.all(truth["det_rows"][truth["visibility"] == 1.0] >= 0)
+    assert occluded > 0 and missed_when_occluded / occluded > 0.4
+
+
+def test_turnover_introduces_new_identities_and_stream_is_unbounded():
+    crowd = SyntheticCrowd(num_objects=100, num_frames=None, turnover=0.05)
+    frames = list(itertools.islice(crowd.stream(), 50))
+    ids = np.concatenate([truth["track_ids"] for _, truth in frames])
+    assert ids.max() >= 100 and len(frames[-1][1]["track_ids"]) == 100
+    assert SyntheticCrowd(num_objects=400).extent() == pytest.approx((2 * SyntheticCrowd(num_objects=100).extent()[0],) * 2)
+
+
+def test_registered_dataset_drives_a_tracker():
+    dataset = build_dataset("synthetic_crowd", num_objects=30, num_frames=10)
+    tracker = build_bytetrack_tracker()
+    for frame in dataset.frames():
+        tracks = tracker.update(frame["detections"])
+    assert len(tracks) >= 20
+    with pytest.raises(ValueError):
+        SyntheticCrowd(motion="teleport")
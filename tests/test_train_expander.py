@@ -0,0 +1,129 @@
+"""ROI shard dump and the shard-backed expander training loop."""
+import pickle
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from amodal_cctv.amodal.train_expander import (  # noqa: E402
+    CosineWarmup,
+    ExpanderTrainConfig,
+    ROIShardDataset,
+    ShardBatchSampler,
+    amodal_delta_targets,
+    dump_roi_shards,
+    roi_samples,
+    schedule_config,
+    train_expander,
+)
+
+
+def _samples(rows=1000, dim=8, chunk=130, seed=0):
+    rng = np.random.default_rng(seed)
+    weights = rng.normal(size=(dim, 4)) * 0.1
+    for lo in range(0, rows, chunk):
+        features = rng.normal(size=(min(chunk, rows - lo), dim)).astype(np.float32)
+        yield features, features @ weights
+
+
+def test_dump_writes_fixed_size_shards_and_gathers_batches(tmp_path):
+    samples = list(_samples())
+    meta = dump_roi_shards(iter(samples), str(tmp_path), shard_size=256)
+    assert meta["shards"] == [256, 256, 256, 232] and meta["feature_dim"] == 8
+    dataset = pickle.loads(pickle.dumps(ROIShardDataset(str(tmp_path))))
+    features = np.concatenate([f for f, _ in samples])
+    rows = np.array([999, 3, 255, 256, 700])
+    got, targets = dataset[rows]
+    assert np.allclose(got.numpy(), features[np.sort(rows)])
+    assert targets.shape == (5, 4)
+
+
+def test_sampler_is_seeded_per_epoch_and_skips_to_start():
+    sampler = ShardBatchSampler(10, 4, seed=1)
+    first = [batch.tolist() for batch in sampler]
+    assert len(first) == 3 and sorted(sum(first, [])) == list(range(10))
+    sampler.set_epoch(0, start=1)
+    assert [batch.tolist() for batch in sampler] == first[1:]
+    sampler.set_epoch(1)
+    assert [batch.tolist() for batch in sampler] != first
+
+
+def test_cosine_warmup_schedule():
+    schedule = CosineWarmup(schedule_config(100, warmup_fraction=0.1))
+    assert schedule(0) == pytest.approx(0.1) and schedule(9) == pytest.approx(1.0)
+    assert schedule(55) == pytest.approx(0.5) and schedule(100) == pytest.approx(0.0)
+
+
+def test_roi_samples_target_the_amodal_box():
+    gt = {
+        "image_id": np.array([1, 0]),
+        "boxes": np.array([[0, 0, 20, 40], [100, 100, 110, 110]], dtype=float),
+        "visible_boxes": np.array([[0, 0, 20, 20], [100, 100, 110, 110]], dtype=float),
+    }
+    frames = [
+        {"frame_id": 0, "boxes": np.array([[100, 100, 110, 110]]), "features": np.ones((1, 3))},
+        {"frame_id": 1, "boxes": np.array([[0, 0, 20, 20], [60, 60, 70, 70]]), "features": np.eye(2, 3)},
+        {"frame_id": 2, "boxes": np.array([[0, 0, 20, 20]]), "features": np.ones((1, 3))},
+    ]
+    out = list(roi_samples(frames, gt))
+    assert len(out) == 2
+    assert np.allclose(out[0][1], 0.0)
+    features, targets = out[1]
+    assert np.allclose(features, [[1, 0, 0]]) and np.allclose(targets, [[0, 0, 0, 1]])
+    assert np.allclose(amodal_delta_targets(gt["visible_boxes"][:1], gt["boxes"][:1]), targets)
+
+
+def test_empty_or_featureless_inputs_fail_instead_of_hanging(tmp_path):
+    with pytest.raises(ValueError, match="No ROI samples"):
+        dump_roi_shards([], str(tmp_path / "empty"))
+    assert not (tmp_path / "empty" / "meta.json").exists()
+    (tmp_path / "stale").mkdir()
+    (tmp_path / "stale" / "meta.json").write_text('{"shards": [], "rows": 0, "feature_dim": 0, "dtype": "float32"}')
+    with pytest.raises(ValueError, match="no rows"):
+        train_expander(ExpanderTrainConfig(shard_dir=str(tmp_path / "stale"), checkpoint_path=str(tmp_path / "h.pt")))
+    gt = {"image_id": np.array([0]), "boxes": np.ones((1, 4)), "visible_boxes": np.ones((1, 4))}
+    frames = [{"frame_id": 0, "boxes": np.array([[0, 0, 5, 5]])}]
+    with pytest.raises(ValueError, match="roi_features"):
+        list(roi_samples(frames, gt))
+
+
+def test_training_reduces_loss_and_resumes(tmp_path):
+    dump_roi_shards(_samples(rows=2048), str(tmp_path / "shards"), shard_size=512)
+    config = ExpanderTrainConfig(
+        shard_dir=str(tmp_path / "shards"),
+        checkpoint_path=str(tmp_path / "head.pt"),
+        batch_size=256,
+        num_workers=0,
+        total_steps=60,
+        lr=3e-3,
+        checkpoint_every=20,
+        head_config={"hidden_dim": 32, "dropout": 0.0},
+    )
+    partial = train_expander(config)
+    assert partial["steps"] == 60 and not partial["resumed"] and partial["lr"] == pytest.approx(0.0)
+    state = torch.load(tmp_path / "head.pt", weights_only=False)
+    assert state["step"] == 60 and "model" in state
+    config.total_steps, config.num_workers = 200, 1
+    resumed = train_expander(config)
+    assert resumed["resumed"] and resumed["steps"] == 200
+    assert resumed["loss"] < partial["loss"] and resumed["loss"] < 0.01
+
+
+def test_expansion_stage_loads_a_trained_checkpoint(tmp_path):
+    from amodal_cctv.amodal.expansion import build_amodal_stage
+
+    dump_roi_shards(_samples(rows=512, dim=12), str(tmp_path / "shards"), shard_size=256)
+    config = ExpanderTrainConfig(
+        shard_dir=str(tmp_path / "shards"),
+        checkpoint_path=str(tmp_path / "head.pt"),
+        batch_size=128,
+        num_workers=0,
+        total_steps=4,
+        head_config={"hidden_dim": 16},
+    )
+    train_expander(config)
+    stage = build_amodal_stage({"enabled": True, "weights": config.checkpoint_path})
+    assert stage.input_dim == 12
+    trained = torch.load(config.checkpoint_path, weights_only=False)["model"]
+    assert all(torch.equal(value, trained[name]) for name, value in stage.head.state_dict().items())